@@ -0,0 +1,35 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the row values that determine a response body."""
+    material = "|".join(str(part) for part in parts)
+    return quote_etag(hashlib.sha1(material.encode("utf-8")).hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 (or 412) response when the client's validators still match,
+    otherwise None. Call it before running the expensive part of a view.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        getattr(request, "_request", request),
+        etag=etag,
+        last_modified=timestamp,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Per-user data: browsers may keep it but must revalidate every time.
+    response["Cache-Control"] = "private, no-cache"
+    return response
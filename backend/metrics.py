@@ -0,0 +1,173 @@
+import hmac
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+QUERY_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LABELS = ("method", "route")
+
+REQUEST_LATENCY = Histogram(
+    "django_http_request_duration_seconds",
+    "Request latency by route, including middleware.",
+    LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "django_http_db_queries",
+    "Database queries executed per request.",
+    LABELS,
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_SECONDS = Histogram(
+    "django_http_db_duration_seconds",
+    "Time spent in database queries per request.",
+    LABELS,
+    buckets=QUERY_TIME_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "django_http_response_size_bytes",
+    "Response body size; streaming responses are not measured.",
+    LABELS,
+    buckets=SIZE_BUCKETS,
+)
+RESPONSES = Counter(
+    "django_http_responses",
+    "Responses by route and status code.",
+    (*LABELS, "status"),
+)
+EXCEPTIONS = Counter(
+    "django_http_exceptions",
+    "Unhandled view exceptions by route and type.",
+    (*LABELS, "exception"),
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _QueryRecorder:
+    """execute_wrapper that counts queries and their time, on every DB alias."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def _route(request) -> str:
+    # The URL pattern, not the path, so ids do not explode label cardinality.
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.route:
+        return UNMATCHED_ROUTE
+    return "/" + match.route
+
+
+class MetricsMiddleware:
+    """
+    Records per-route latency, DB query count/time, response size and status
+    codes. Place it first in MIDDLEWARE so the latency covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = _QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            # Wrappers live on the per-thread handler, so queries on connections
+            # opened later in the request are recorded as well.
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        labels = (request.method, _route(request))
+        REQUEST_LATENCY.labels(*labels).observe(elapsed)
+        REQUEST_QUERIES.labels(*labels).observe(recorder.count)
+        REQUEST_QUERY_SECONDS.labels(*labels).observe(recorder.seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(*labels).observe(len(response.content))
+        RESPONSES.labels(*labels, str(response.status_code)).inc()
+        return response
+
+    def process_exception(self, request, exception):
+        EXCEPTIONS.labels(request.method, _route(request), type(exception).__name__).inc()
+
+
+def _registry():
+    """
+    Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+    (see gunicorn.conf.py); a scrape must aggregate all of them, not just the
+    worker that happens to answer.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """`Authorization: Bearer <METRICS_TOKEN>` for the Prometheus scraper."""
+
+    def authenticate(self, request):
+        token = settings.METRICS_TOKEN
+        if not token:
+            return None
+        header = get_authorization_header(request).split()
+        if len(header) != 2 or header[0].lower() != b"bearer":
+            return None
+        if not hmac.compare_digest(header[1], token.encode()):
+            return None
+        return (AnonymousUser(), "metrics")
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
+
+
+class CanReadMetrics(BasePermission):
+    def has_permission(self, request, view):
+        if request.auth == "metrics":
+            return True
+        return bool(
+            request.user
+            and request.user.is_authenticated
+            and request.user.role == 'ROOT'
+        )
+
+
+class MetricsView(APIView):
+    authentication_classes = [MetricsTokenAuthentication, JWTAuthentication]
+    permission_classes = [CanReadMetrics]
+
+    def get(self, request):
+        return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,132 @@
+import base64
+import binascii
+import json
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first keyset pagination on (created_at, id).
+    The cursor carries the last row's key, so page N costs one index range
+    scan no matter how deep it is, and rows inserted meanwhile never shift
+    the pages a client is walking through.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by("-created_at", "-id")
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            created_at, pk = cursor
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return settings.API_PAGE_SIZE
+        try:
+            size = int(raw)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Debe ser un entero"})
+        return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            padded = raw + "=" * (-len(raw) % 4)
+            created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (binascii.Error, ValueError, TypeError):
+            raise NotFound("Cursor invalido")
+        if created_at is None:
+            raise NotFound("Cursor invalido")
+        return created_at, pk
+
+    def encode_cursor(self, row):
+        payload = json.dumps([row.created_at.isoformat(), row.pk], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+def filter_date_range(queryset, request, field, param):
+    """
+    Apply `<param>_from` / `<param>_to` (YYYY-MM-DD, both inclusive) to `field`.
+    DateTimeFields get half-open datetime bounds so the column index stays usable.
+    """
+    model_field = queryset.model._meta.get_field(field)
+    bounds = {}
+    for suffix in ("from", "to"):
+        name = f"{param}_{suffix}"
+        raw = request.query_params.get(name)
+        if not raw:
+            continue
+        try:
+            value = parse_date(raw)
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValidationError({name: "Formato de fecha invalido, usa YYYY-MM-DD"})
+        bounds[suffix] = value
+
+    if isinstance(model_field, models.DateTimeField):
+        if "from" in bounds:
+            start = datetime.combine(bounds["from"], time.min)
+            queryset = queryset.filter(**{f"{field}__gte": _aware(start)})
+        if "to" in bounds:
+            end = datetime.combine(bounds["to"] + timedelta(days=1), time.min)
+            queryset = queryset.filter(**{f"{field}__lt": _aware(end)})
+    else:
+        if "from" in bounds:
+            queryset = queryset.filter(**{f"{field}__gte": bounds["from"]})
+        if "to" in bounds:
+            queryset = queryset.filter(**{f"{field}__lte": bounds["to"]})
+    return queryset
+
+
+def _aware(value):
+    if settings.USE_TZ:
+        return timezone.make_aware(value)
+    return value
@@ -0,0 +1,39 @@
+"""
+JSON parser backed by orjson, a drop-in for DRF's JSONParser.
+
+Bodies orjson rejects (invalid JSON, NaN/Infinity, lone surrogates) are
+parsed again by JSONParser, so accepted input and error messages stay the
+same. So are bodies with integers that may not fit in 64 bits, which orjson
+would silently read as floats. Non UTF-8 request charsets and a missing
+orjson also take the stdlib path.
+"""
+import codecs
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from backend.renderers import FastJSONRenderer, orjson
+
+# 19+ digits in a row (possibly inside a string) may be an integer beyond int64.
+# Masking digits with translate() and a substring search is far cheaper than a regex.
+_DIGIT_MASK = bytes(ord('0') if chr(byte).isdigit() else ord(' ') for byte in range(256))
+_LONG_NUMBER = b'0' * 19
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if _LONG_NUMBER not in body.translate(_DIGIT_MASK):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
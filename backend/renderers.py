@@ -0,0 +1,54 @@
+"""
+JSON renderer backed by orjson, a drop-in for DRF's JSONRenderer.
+
+The output is byte-identical to JSONRenderer with the default settings
+(UNICODE_JSON, COMPACT_JSON): datetimes and Decimals go through DRF's own
+encoder, \\u2028/\\u2029 are escaped the same way, and anything orjson would
+write differently (small floats, non-string keys, huge integers, indented
+output for the browsable API) is handed to JSONRenderer. The one exception
+is NaN/Infinity, which STRICT_JSON rejects and orjson writes as null; our
+models have no float fields that can hold them. Without orjson installed
+every response takes the stdlib path.
+"""
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson writes 1e-05 as 0.00001 and 1e-07 as 1e-7. Either shape (or a false
+# positive inside a string) sends the payload to json.dumps instead.
+_NEGATIVE_EXPONENT = re.compile(rb"[0-9]e-")
+
+
+def _may_differ(ret: bytes) -> bool:
+    # Substring checks run in C at memchr speed; the regex only confirms.
+    return b"0.000" in ret or (b"e-" in ret and _NEGATIVE_EXPONENT.search(ret) is not None)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            # Also raised for values json.dumps rejects: let it raise its own error.
+            return super().render(data, accepted_media_type, renderer_context)
+        if _may_differ(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -15,6 +15,7 @@ load_dotenv()
 from pathlib import Path
 from pathlib import Path
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -61,6 +62,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -107,6 +109,35 @@ DATABASES = {
     )
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # El worker de generacion escribe desde varios hilos; esperar el lock en vez de fallar.
+    DATABASES['default'].setdefault('OPTIONS', {}).update({
+        'timeout': 20,
+        'transaction_mode': 'IMMEDIATE',
+    })
+
+# Cache compartida entre workers de gunicorn y el worker de generacion: versiones de la
+# cache del catalogo, buckets de admision y contadores de la cache DeepSeek.
+# Sin REDIS_URL se usa la base de datos (tabla creada por plans/migrations/0016_cache_table.py);
+# una cache en memoria no se comparte entre procesos y romperia esos contadores.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", "3600"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -153,8 +184,22 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON con orjson (misma salida byte a byte que el JSONRenderer de DRF); sin orjson usa json.
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'backend.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# Paginacion por cursor de los listados (catalogo, alumnos, semanas)
+API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", "200"))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -163,6 +208,83 @@ SIMPLE_JWT = {
 AUTH_USER_MODEL = 'accounts.User'
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (
+    *default_headers,
+    "if-none-match",
+    "if-modified-since",
+)
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified", "Retry-After"]
+
+# Cola de generacion IA (ver plans/management/commands/run_generation_worker.py)
+GENERATION_WORKER_CONCURRENCY = int(os.environ.get("GENERATION_WORKER_CONCURRENCY", "4"))
+GENERATION_WORKER_POLL_SECONDS = float(os.environ.get("GENERATION_WORKER_POLL_SECONDS", "1"))
+GENERATION_JOB_STALE_SECONDS = int(os.environ.get("GENERATION_JOB_STALE_SECONDS", "600"))
+GENERATION_STALE_SWEEP_SECONDS = float(os.environ.get("GENERATION_STALE_SWEEP_SECONDS", "60"))
+GENERATION_BULK_MAX_WEEKS = int(os.environ.get("GENERATION_BULK_MAX_WEEKS", "500"))
+
+# Control de admision de generaciones IA (plans/admission.py)
+GENERATION_COACH_RATE_PER_MINUTE = float(os.environ.get("GENERATION_COACH_RATE_PER_MINUTE", "10"))
+GENERATION_COACH_BURST = int(os.environ.get("GENERATION_COACH_BURST", "5"))
+GENERATION_GLOBAL_RATE_PER_MINUTE = float(os.environ.get("GENERATION_GLOBAL_RATE_PER_MINUTE", "120"))
+GENERATION_GLOBAL_BURST = int(os.environ.get("GENERATION_GLOBAL_BURST", "30"))
+GENERATION_COACH_MAX_IN_FLIGHT = int(os.environ.get("GENERATION_COACH_MAX_IN_FLIGHT", "6"))
+GENERATION_MAX_QUEUE_DEPTH = int(os.environ.get("GENERATION_MAX_QUEUE_DEPTH", "2000"))
+# Lotes masivos: un token por trabajo en su bucket y en el global; un lote mayor que la rafaga
+# se admite con el bucket lleno y lo deja en deuda (ver TokenBucket).
+GENERATION_BULK_COACH_RATE_PER_MINUTE = float(os.environ.get("GENERATION_BULK_COACH_RATE_PER_MINUTE", "20"))
+GENERATION_BULK_COACH_BURST = int(os.environ.get("GENERATION_BULK_COACH_BURST", str(GENERATION_BULK_MAX_WEEKS * 2)))
+GENERATION_COACH_MAX_QUEUED = int(os.environ.get("GENERATION_COACH_MAX_QUEUED", str(GENERATION_BULK_MAX_WEEKS * 2)))
+
+# Long-poll de estado (plans/views.py PlanStatusWaitView)
+# Cada espera ocupa un thread de gunicorn (WEB_THREADS, ver gunicorn.conf.py): por defecto
+# se permite esperar a una cuarta parte de los threads de cada proceso y el resto queda para
+# las demas peticiones; las esperas de mas responden al momento con Retry-After.
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "8"))
+PLAN_STATUS_WAIT_SECONDS = float(os.environ.get("PLAN_STATUS_WAIT_SECONDS", "10"))
+PLAN_STATUS_WAIT_INTERVAL = float(os.environ.get("PLAN_STATUS_WAIT_INTERVAL", "2"))
+PLAN_STATUS_MAX_WAITERS = int(os.environ.get("PLAN_STATUS_MAX_WAITERS", str(max(1, WEB_THREADS // 4))))
+PLAN_STATUS_RETRY_AFTER = int(os.environ.get("PLAN_STATUS_RETRY_AFTER", "3"))
+
+# Cache persistente de respuestas DeepSeek (plans/ai/cache.py)
+DEEPSEEK_CACHE_ENABLED = os.environ.get("DEEPSEEK_CACHE_ENABLED", "True") == "True"
+DEEPSEEK_CACHE_TTL_SECONDS = int(os.environ.get("DEEPSEEK_CACHE_TTL_SECONDS", str(24 * 3600)))
+DEEPSEEK_CACHE_MAX_ENTRIES = int(os.environ.get("DEEPSEEK_CACHE_MAX_ENTRIES", "500"))
+
+# Cliente HTTP DeepSeek (plans/ai/client.py)
+# DEEPSEEK_BASE_URL apunta a otro servidor compatible, p. ej. el stub local de manage.py deepseek_stub.
+DEEPSEEK_BASE_URL = os.environ.get("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+DEEPSEEK_POOL_SIZE = int(os.environ.get("DEEPSEEK_POOL_SIZE", str(GENERATION_WORKER_CONCURRENCY)))
+DEEPSEEK_MAX_ATTEMPTS = int(os.environ.get("DEEPSEEK_MAX_ATTEMPTS", "3"))
+DEEPSEEK_DEADLINE_SECONDS = float(os.environ.get("DEEPSEEK_DEADLINE_SECONDS", "90"))
+DEEPSEEK_BACKOFF_BASE_SECONDS = float(os.environ.get("DEEPSEEK_BACKOFF_BASE_SECONDS", "1"))
+DEEPSEEK_BACKOFF_MAX_SECONDS = float(os.environ.get("DEEPSEEK_BACKOFF_MAX_SECONDS", "8"))
+DEEPSEEK_BREAKER_THRESHOLD = int(os.environ.get("DEEPSEEK_BREAKER_THRESHOLD", "5"))
+DEEPSEEK_BREAKER_COOLDOWN_SECONDS = float(os.environ.get("DEEPSEEK_BREAKER_COOLDOWN_SECONDS", "60"))
+
+# Presupuesto (tokens estimados) de la lista de ejercicios del prompt de rutina
+DEEPSEEK_PROMPT_CATALOG_TOKENS = int(os.environ.get("DEEPSEEK_PROMPT_CATALOG_TOKENS", "900"))
+
+# Logs de la app (worker de generacion, cliente DeepSeek) a stdout
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'plans': {
+            'handlers': ['console'],
+            'level': os.environ.get("PLANS_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+# Metricas Prometheus en /api/metrics (backend/metrics.py); sin token solo ROOT puede leerlas.
+# Con varios workers de gunicorn definir PROMETHEUS_MULTIPROC_DIR (ver gunicorn.conf.py).
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
 
 
 import os
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
 from accounts.views import CustomTokenObtainPairView
+from backend.metrics import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -15,5 +16,8 @@ urlpatterns = [
     path('api/students/', include('students.urls')),
     path('api/plans/', include('plans.urls')),
     path('api/catalog/', include('catalog.urls')),
+
+    # Prometheus (METRICS_TOKEN o usuario ROOT)
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
 ]
 
@@ -0,0 +1,37 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+VERSION_KEY = "catalog:version"
+
+
+def _fresh_version() -> int:
+    # Milliseconds, so a version key lost to eviction never restarts at a number
+    # that older cached pages were stored under.
+    return int(time.time() * 1000)
+
+
+def get_catalog_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _fresh_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> int:
+    """Invalidate every cached catalog page in all processes sharing the cache."""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(VERSION_KEY, version, timeout=None)
+        return version
+
+
+def list_cache_key(scope: str, params) -> str:
+    query = urlencode(sorted((key, value) for key in params for value in params.getlist(key)))
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    return f"catalog:list:v{get_catalog_version()}:{scope}:{digest}"
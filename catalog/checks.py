@@ -0,0 +1,24 @@
+from django.core.checks import Tags, Warning, register
+
+from .search import FTS_TABLE, missing_fts_triggers
+
+
+@register(Tags.database)
+def check_fts_triggers(app_configs, databases=None, **kwargs):
+    """
+    Run by `manage.py check --database default` and by `migrate`. A warning,
+    not an error, so it never blocks the migration that repairs the triggers.
+    """
+    warnings = []
+    for alias in databases or ():
+        missing = missing_fts_triggers(alias)
+        if missing:
+            warnings.append(Warning(
+                f"Faltan los triggers de {FTS_TABLE}: {', '.join(missing)}",
+                hint=(
+                    "Una migracion reconstruyo catalog_visualresource; vuelve a ejecutar "
+                    "SQLITE_FORWARD de catalog/migrations/0004_visualresource_search_index.py."
+                ),
+                id="catalog.W001",
+            ))
+    return warnings
@@ -0,0 +1,256 @@
+import logging
+import threading
+from difflib import SequenceMatcher
+from typing import Iterable, List, Optional
+
+from django.db.models import Count, Max
+
+from .models import VisualResource
+from .normalize import normalize_title, title_tokens
+
+logger = logging.getLogger(__name__)
+
+# Columns needed to prompt, match and save plans; `description` stays in the DB.
+SNAPSHOT_FIELDS = (
+    "id",
+    "title",
+    "normalized_title",
+    "muscle_group",
+    "level",
+    "equipment",
+    "video_url",
+)
+
+STOPWORDS = frozenset({
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "los", "para", "por", "y",
+})
+
+# Spanish/English gym vocabulary mapped to the word used in the catalog.
+SYNONYMS = {
+    "banco": "banca",
+    "bench": "banca",
+    "barbell": "barra",
+    "dumbbell": "mancuerna",
+    "dumbbells": "mancuerna",
+    "db": "mancuerna",
+    "squat": "sentadilla",
+    "deadlift": "muerto",
+    "pullup": "dominada",
+    "pullups": "dominada",
+    "pushup": "flexion",
+    "pushups": "flexion",
+    "lagartija": "flexion",
+    "lagartijas": "flexion",
+    "estocada": "zancada",
+    "estocadas": "zancada",
+    "lunge": "zancada",
+    "lunges": "zancada",
+    "abs": "abdominal",
+    "crunches": "crunch",
+}
+
+FUZZY_THRESHOLD = 0.6
+
+# Words that make a different exercise; a fuzzy match must keep them exactly.
+MODIFIER_WORDS = frozenset({
+    "inclinado", "declinado", "plano", "rumano", "sumo", "frontal", "trasero",
+    "lateral", "posterior", "anterior", "sentado", "parado", "pie", "acostado",
+    "unilateral", "alterno", "cerrado", "abierto", "supino", "prono", "neutro",
+    "arriba", "abajo", "alto", "bajo", "invertido", "inverso", "bulgara", "hack",
+})
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """One insertion, deletion, substitution or adjacent swap apart."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    for index, (x, y) in enumerate(zip(a, b)):
+        if x == y:
+            continue
+        if len(a) == len(b):
+            swapped = a[index + 1:index + 2] + x + a[index + 2:]
+            return a[index + 1:] == b[index + 1:] or swapped == b[index + 1:]
+        return a[index:] == b[index + 1:]
+    return True
+
+
+def _spelling_variant(query_tokens: List[str], candidate_tokens: List[str]) -> bool:
+    """
+    Same words up to small typos: equal token count, and each query token
+    pairs with a candidate token that is equal or, for words of 4+ letters
+    that are not modifiers, one edit away.
+    """
+    if len(query_tokens) != len(candidate_tokens):
+        return False
+    remaining = list(candidate_tokens)
+    typos = []
+    for token in query_tokens:
+        if token in remaining:
+            remaining.remove(token)
+        else:
+            typos.append(token)
+    for token in typos:
+        match = next(
+            (
+                other for other in remaining
+                if len(token) >= 4
+                and token not in MODIFIER_WORDS
+                and other not in MODIFIER_WORDS
+                and _within_one_edit(token, other)
+            ),
+            None,
+        )
+        if match is None:
+            return False
+        remaining.remove(match)
+    return True
+
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("es"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def canonical_tokens(name: str) -> List[str]:
+    """Tokens with stopwords removed, synonyms applied and plurals folded."""
+    tokens = []
+    for token in title_tokens(name):
+        if token in STOPWORDS:
+            continue
+        token = SYNONYMS.get(token, token)
+        tokens.append(_stem(token))
+    return tokens
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogIndex:
+    """
+    Name lookup over a list of catalog exercises.
+    Exact normalized titles are tried first, then an order-insensitive
+    token key (stopwords, synonyms, plurals), then trigram similarity
+    restricted to spelling variants of the same words (see
+    _spelling_variant). Fuzzy substitutions are logged.
+    Behaves like a read-only sequence of the exercises it was built from.
+    """
+
+    def __init__(self, exercises: Iterable[VisualResource]):
+        self.exercises = list(exercises)
+        self._exact = {}
+        self._by_tokens = {}
+        self._keys = []
+        self._gram_counts = []
+        self._postings = {}
+
+        for position, exercise in enumerate(self.exercises):
+            normalized = exercise.normalized_title or normalize_title(exercise.title)
+            self._exact.setdefault(normalized, exercise)
+
+            tokens = canonical_tokens(exercise.title)
+            self._by_tokens.setdefault(" ".join(sorted(tokens)), exercise)
+
+            key = " ".join(tokens)
+            grams = _trigrams(key)
+            self._keys.append(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __iter__(self):
+        return iter(self.exercises)
+
+    def __len__(self):
+        return len(self.exercises)
+
+    def __getitem__(self, item):
+        return self.exercises[item]
+
+    def lookup(self, name: str) -> Optional[VisualResource]:
+        exercise = self._exact.get(normalize_title(name))
+        if exercise is not None:
+            return exercise
+
+        tokens = canonical_tokens(name)
+        if not tokens:
+            return None
+        exercise = self._by_tokens.get(" ".join(sorted(tokens)))
+        if exercise is not None:
+            return exercise
+
+        exercise = self._fuzzy(tokens)
+        if exercise is not None:
+            logger.info("Fuzzy catalog match: %r -> %r", name, exercise.title)
+        return exercise
+
+    def _fuzzy(self, tokens: List[str]) -> Optional[VisualResource]:
+        key = " ".join(tokens)
+        query_grams = _trigrams(key)
+        shared = {}
+        for gram in query_grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        best_position = None
+        best_score = 0.0
+        for position, overlap in shared.items():
+            union = len(query_grams) + self._gram_counts[position] - overlap
+            score = overlap / union
+            if score < FUZZY_THRESHOLD or score < best_score:
+                continue
+            if not _spelling_variant(tokens, self._keys[position].split()):
+                continue
+            if score == best_score and best_position is not None:
+                # Tie on trigrams: keep the closer edit-distance match.
+                current = SequenceMatcher(None, key, self._keys[best_position]).ratio()
+                challenger = SequenceMatcher(None, key, self._keys[position]).ratio()
+                if challenger <= current:
+                    continue
+            best_position = position
+            best_score = score
+
+        if best_position is None:
+            return None
+        return self.exercises[best_position]
+
+
+class CatalogSnapshot(CatalogIndex):
+    def __init__(self, version, exercises: Iterable[VisualResource]):
+        super().__init__(exercises)
+        self.version = version
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def catalog_version():
+    """Cheap fingerprint that changes on any insert, delete or edit of the catalog."""
+    stats = VisualResource.objects.aggregate(total=Count("id"), changed=Max("updated_at"))
+    return (stats["total"], stats["changed"])
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    Process-wide catalog snapshot with only SNAPSHOT_FIELDS loaded.
+    Rebuilt when the catalog version changes; otherwise shared by every
+    generation running in this process.
+    """
+    global _snapshot
+    version = catalog_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            exercises = VisualResource.objects.only(*SNAPSHOT_FIELDS)
+            _snapshot = CatalogSnapshot(version, exercises)
+        return _snapshot
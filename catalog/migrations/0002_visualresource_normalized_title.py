@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize_title(name):
+    normalized = unicodedata.normalize("NFKD", str(name or ""))
+    ascii_only = normalized.encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "", ascii_only.lower())
+
+
+def populate_normalized_title(apps, schema_editor):
+    VisualResource = apps.get_model("catalog", "VisualResource")
+    pending = []
+    for resource in VisualResource.objects.only("id", "title").iterator():
+        resource.normalized_title = _normalize_title(resource.title)
+        pending.append(resource)
+    VisualResource.objects.bulk_update(pending, ["normalized_title"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visualresource',
+            name='normalized_title',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=120),
+        ),
+        migrations.RunPython(populate_normalized_title, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_visualresource_normalized_title'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='visualresource',
+            index=models.Index(fields=['-created_at', '-id'], name='catalog_vr_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 6.0 on 2026-10-18 20:00
+
+from django.db import migrations
+
+# SQLite: FTS5 external-content table over the catalog, kept current by triggers.
+# unicode61 with remove_diacritics folds "Elevación" and "elevacion" together.
+#
+# The FTS table and triggers are raw SQL, outside Django's model state. A later
+# migration that makes SQLite rebuild catalog_visualresource (most AlterField /
+# RemoveField operations) drops the triggers without a word and the index stops
+# following edits. Such a migration must run SQLITE_FORWARD again afterwards
+# (every statement is idempotent and ends with a 'rebuild'). The catalog.W001
+# database check and catalog/tests.py report missing triggers.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS catalog_visualresource_fts USING fts5(
+        title, description, muscle_group, equipment,
+        content='catalog_visualresource',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_visualresource_fts_ai
+    AFTER INSERT ON catalog_visualresource BEGIN
+        INSERT INTO catalog_visualresource_fts(rowid, title, description, muscle_group, equipment)
+        VALUES (new.id, new.title, new.description, new.muscle_group, new.equipment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_visualresource_fts_ad
+    AFTER DELETE ON catalog_visualresource BEGIN
+        INSERT INTO catalog_visualresource_fts(catalog_visualresource_fts, rowid, title, description, muscle_group, equipment)
+        VALUES ('delete', old.id, old.title, old.description, old.muscle_group, old.equipment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_visualresource_fts_au
+    AFTER UPDATE ON catalog_visualresource BEGIN
+        INSERT INTO catalog_visualresource_fts(catalog_visualresource_fts, rowid, title, description, muscle_group, equipment)
+        VALUES ('delete', old.id, old.title, old.description, old.muscle_group, old.equipment);
+        INSERT INTO catalog_visualresource_fts(rowid, title, description, muscle_group, equipment)
+        VALUES (new.id, new.title, new.description, new.muscle_group, new.equipment);
+    END
+    """,
+    "INSERT INTO catalog_visualresource_fts(catalog_visualresource_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS catalog_visualresource_fts_au",
+    "DROP TRIGGER IF EXISTS catalog_visualresource_fts_ad",
+    "DROP TRIGGER IF EXISTS catalog_visualresource_fts_ai",
+    "DROP TABLE IF EXISTS catalog_visualresource_fts",
+]
+
+# Postgres: unaccent needs an IMMUTABLE wrapper to be usable in a generated
+# column; the stored tsvector is maintained by the database on every write.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    CREATE OR REPLACE FUNCTION catalog_immutable_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    """
+    ALTER TABLE catalog_visualresource ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', catalog_immutable_unaccent(coalesce(title, ''))), 'A') ||
+        setweight(to_tsvector('simple', catalog_immutable_unaccent(coalesce(muscle_group, ''))), 'B') ||
+        setweight(to_tsvector('simple', catalog_immutable_unaccent(coalesce(equipment, ''))), 'C') ||
+        setweight(to_tsvector('simple', catalog_immutable_unaccent(coalesce(description, ''))), 'D')
+    ) STORED
+    """,
+    """
+    CREATE INDEX catalog_vr_search_idx ON catalog_visualresource
+    USING GIN (search_vector)
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS catalog_vr_search_idx",
+    "ALTER TABLE catalog_visualresource DROP COLUMN IF EXISTS search_vector",
+    "DROP FUNCTION IF EXISTS catalog_immutable_unaccent(text)",
+]
+
+
+def _sqlite_has_fts5(cursor):
+    cursor.execute("PRAGMA compile_options")
+    return any("FTS5" in row[0] for row in cursor.fetchall())
+
+
+def _run(statements):
+    def apply(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        with schema_editor.connection.cursor() as cursor:
+            if vendor == "sqlite" and _sqlite_has_fts5(cursor):
+                for sql in statements["sqlite"]:
+                    cursor.execute(sql)
+            elif vendor == "postgresql":
+                for sql in statements["postgresql"]:
+                    cursor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_visualresource_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}),
+        ),
+    ]
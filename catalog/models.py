@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.db import models
 
+from .normalize import normalize_title
+
 
 class VisualResource(models.Model):
     LEVEL_BEGINNER = "BEGINNER"
@@ -14,6 +16,12 @@ class VisualResource(models.Model):
     )
 
     title = models.CharField(max_length=120)
+    normalized_title = models.CharField(
+        max_length=120,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
     description = models.TextField(blank=True)
     video_url = models.URLField()
     muscle_group = models.CharField(max_length=60, blank=True)
@@ -39,9 +47,19 @@ class VisualResource(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="catalog_vr_created_id_idx"),
+        ]
         verbose_name = "Recurso visual"
         verbose_name_plural = "Recursos visuales"
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.normalized_title = normalize_title(self.title)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "title" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "normalized_title"}
+        super().save(*args, **kwargs)
+
@@ -0,0 +1,21 @@
+import re
+import unicodedata
+
+
+def strip_accents(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", str(text or ""))
+    return normalized.encode("ascii", "ignore").decode("ascii")
+
+
+def normalize_title(name: str) -> str:
+    """Normalize exercise names to compare ignoring accents, spaces, and casing."""
+    if not name:
+        return ""
+    return re.sub(r"[^a-z0-9]+", "", strip_accents(name).lower())
+
+
+def title_tokens(name: str) -> list[str]:
+    """Lowercase ASCII word tokens of a title, in order."""
+    if not name:
+        return []
+    return [token for token in re.split(r"[^a-z0-9]+", strip_accents(name).lower()) if token]
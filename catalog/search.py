@@ -0,0 +1,123 @@
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .normalize import title_tokens
+
+FTS_TABLE = "catalog_visualresource_fts"
+# Created by migration 0004; they keep the FTS5 table in step with the catalog.
+FTS_TRIGGERS = (f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au")
+
+# bm25 column weights, in FTS table column order: title, description, muscle_group, equipment.
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+MAX_TERMS = 8
+
+_fts_tables = {}
+
+
+def search_terms(query: str) -> list[str]:
+    """Accent-free lowercase terms of a user query; each one is matched as a prefix."""
+    return title_tokens(query)[:MAX_TERMS]
+
+
+def _has_fts_table() -> bool:
+    alias = connection.alias
+    if alias not in _fts_tables:
+        _fts_tables[alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[alias]
+
+
+def missing_fts_triggers(using=None) -> list[str]:
+    """Sync triggers absent while the SQLite FTS5 table exists (e.g. lost to a table rebuild)."""
+    conn = connections[using or DEFAULT_DB_ALIAS]
+    if conn.vendor != "sqlite":
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name = %s OR type = 'trigger'",
+            [FTS_TABLE],
+        )
+        rows = cursor.fetchall()
+    if ("table", FTS_TABLE) not in rows:
+        return []
+    triggers = {name for kind, name in rows if kind == "trigger"}
+    return [name for name in FTS_TRIGGERS if name not in triggers]
+
+
+def search(queryset, query: str, limit: int, offset: int = 0):
+    """
+    Ranked full-text search over title, description, muscle_group and equipment.
+    Uses the FTS5 table on SQLite and the generated tsvector column on Postgres
+    (see migration 0004); other databases fall back to accent-free substring
+    matching ordered by recency. Returns at most `limit` instances, skipping
+    the first `offset` matches.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    if connection.vendor == "postgresql":
+        return _search_postgres(queryset, terms, limit, offset)
+    if connection.vendor == "sqlite" and _has_fts_table():
+        return _search_sqlite(queryset, terms, limit, offset)
+    return _search_fallback(queryset, terms, limit, offset)
+
+
+def _search_sqlite(queryset, terms, limit, offset):
+    """
+    Ranks, filters and pages inside SQLite: FTS5 drives the query, the
+    caller's queryset restricts it by rowid, and only the page is loaded.
+    """
+    match = " ".join(f'"{term}"*' for term in terms)
+    weights = ", ".join(str(weight) for weight in SQLITE_WEIGHTS)
+    allowed_sql, allowed_params = queryset.order_by().values("id").query.sql_with_params()
+    with connection.cursor() as cursor:
+        # bm25 is negative; lower means more relevant. The unary + keeps SQLite
+        # from handing the rowid filter to FTS5 as one lookup per allowed row.
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND +rowid IN ({allowed_sql}) "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}), rowid DESC "
+            f"LIMIT %s OFFSET %s",
+            [match, *allowed_params, limit, offset],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        return []
+
+    rows = queryset.in_bulk(ids)
+    return [rows[row_id] for row_id in ids if row_id in rows]
+
+
+def _search_postgres(queryset, terms, limit, offset):
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    table = queryset.model._meta.db_table
+    return list(
+        queryset.alias(
+            search_match=RawSQL(
+                f"{table}.search_vector @@ to_tsquery('simple', %s)",
+                [tsquery],
+                output_field=BooleanField(),
+            )
+        )
+        .filter(search_match=True)
+        .annotate(
+            search_rank=RawSQL(
+                f"ts_rank({table}.search_vector, to_tsquery('simple', %s))",
+                [tsquery],
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-search_rank", "-id")[offset:offset + limit]
+    )
+
+
+def _search_fallback(queryset, terms, limit, offset):
+    for term in terms:
+        queryset = queryset.filter(
+            Q(normalized_title__contains=term)
+            | Q(muscle_group__icontains=term)
+            | Q(equipment__icontains=term)
+        )
+    return list(queryset.order_by("-created_at", "-id")[offset:offset + limit])
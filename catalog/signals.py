@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .models import VisualResource
+
+
+@receiver(post_save, sender=VisualResource)
+@receiver(post_delete, sender=VisualResource)
+def bump_version_on_catalog_change(sender, **kwargs):
+    bump_catalog_version()
@@ -0,0 +1,123 @@
+from django.db import connection
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from backend.renderers import FastJSONRenderer
+from catalog.index import CatalogIndex
+from catalog.models import VisualResource
+from catalog.checks import check_fts_triggers
+from catalog.search import FTS_TABLE, missing_fts_triggers, search
+from catalog.serializers import VisualResourceSerializer
+
+
+def make_resource(title, **fields):
+    root, _ = User.objects.get_or_create(username="root", defaults={"role": "ROOT"})
+    return VisualResource.objects.create(
+        title=title,
+        created_by=root,
+        video_url="https://example.com/video.mp4",
+        **fields,
+    )
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.exact = make_resource("Press banca", muscle_group="Pecho", equipment="Barra")
+        self.partial = make_resource("Press militar", muscle_group="Hombro", equipment="Barra")
+        self.hidden = make_resource("Press banca inclinado", muscle_group="Pecho", is_public=False)
+        make_resource("Sentadilla", muscle_group="Piernas")
+
+    def test_ranks_and_pages_within_the_queryset(self):
+        public = VisualResource.objects.filter(is_public=True)
+
+        self.assertEqual(search(public, "press banca", 10), [self.exact])
+        ranked = search(public, "press", 10)
+        self.assertCountEqual(ranked, [self.exact, self.partial])
+        self.assertEqual(search(public, "press", 1) + search(public, "press", 1, offset=1), ranked)
+        self.assertEqual(search(public, "press", 10, offset=2), [])
+
+    def test_unrestricted_queryset_includes_private_rows(self):
+        results = search(VisualResource.objects.all(), "press banca", 10)
+        self.assertCountEqual(results, [self.exact, self.hidden])
+
+
+class CatalogRenderingTests(TestCase):
+    def test_catalog_page_renders_byte_identical(self):
+        make_resource("Press banca", muscle_group="Pecho", duration_seconds=45)
+        make_resource("Remo con barra – agarre supino", description="Línea 1\u2029Línea 2")
+        data = {
+            "next": None,
+            "results": VisualResourceSerializer(VisualResource.objects.order_by("id"), many=True).data,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class CatalogIndexTests(TestCase):
+    def setUp(self):
+        self.index = CatalogIndex([
+            make_resource("Press declinado con mancuerna"),
+            make_resource("Peso muerto rumano"),
+            make_resource("Press banca con barra"),
+            make_resource("Sentadilla bulgara"),
+        ])
+
+    def test_near_miss_exercises_are_not_substituted(self):
+        with self.assertNoLogs("catalog.index"):
+            self.assertIsNone(self.index.lookup("Press inclinado con mancuerna"))
+            self.assertIsNone(self.index.lookup("Peso muerto"))
+            self.assertIsNone(self.index.lookup("Sentadilla frontal"))
+
+    def test_spelling_variants_match_and_are_logged(self):
+        with self.assertLogs("catalog.index", level="INFO") as logs:
+            self.assertEqual(self.index.lookup("Press banka con barra").title, "Press banca con barra")
+            self.assertEqual(self.index.lookup("Sentadila bulgara").title, "Sentadilla bulgara")
+        self.assertEqual(len(logs.records), 2)
+
+
+class SearchPaginationTests(TestCase):
+    def test_search_pages_follow_next_links(self):
+        for index in range(5):
+            make_resource(f"Press variante {index}")
+
+        seen = []
+        url = "/api/catalog/videos/?q=press&page_size=2"
+        while url:
+            response = APIClient().get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row["title"] for row in response.data["results"])
+            url = response.data["next"]
+
+        self.assertCountEqual(seen, [f"Press variante {index}" for index in range(5)])
+
+    def test_invalid_offset_is_rejected(self):
+        response = APIClient().get("/api/catalog/videos/?q=press&offset=x")
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchIndexTriggerTests(TestCase):
+    """Migration 0004 keeps the SQLite FTS5 table current with raw triggers outside model state."""
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 triggers only exist on SQLite")
+
+    def test_sync_triggers_exist(self):
+        self.assertEqual(missing_fts_triggers(), [])
+        self.assertEqual(check_fts_triggers(None, databases=["default"]), [])
+
+    def test_edits_reach_the_index(self):
+        resource = make_resource("Press banca")
+        resource.title = "Remo con barra"
+        resource.save()
+
+        self.assertEqual(search(VisualResource.objects.all(), "remo", 10), [resource])
+        self.assertEqual(search(VisualResource.objects.all(), "banca", 10), [])
+
+    def test_lost_trigger_is_reported(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {FTS_TABLE}_au")
+
+        self.assertEqual(missing_fts_triggers(), [f"{FTS_TABLE}_au"])
+        self.assertEqual([warning.id for warning in check_fts_triggers(None, databases=["default"])], ["catalog.W001"])
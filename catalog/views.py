@@ -1,39 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from accounts.permissions import IsRoot
+from backend.pagination import KeysetPagination, filter_date_range
+from .cache import list_cache_key
 from .models import VisualResource
+from .search import search as search_catalog
 from .serializers import VisualResourceSerializer
 
 
 class VisualResourceListCreateView(generics.ListCreateAPIView):
     serializer_class = VisualResourceSerializer
+    pagination_class = KeysetPagination
 
     def get_permissions(self):
         if self.request.method == "GET":
             return [AllowAny()]
         return [IsAuthenticated(), IsRoot()]
 
+    def _is_root(self):
+        return self.request.user.is_authenticated and self.request.user.role == "ROOT"
+
     def get_queryset(self):
-        queryset = VisualResource.objects.all()
+        queryset = VisualResource.objects.select_related("created_by")
 
-        if self.request.method == "GET" and not (
-            self.request.user.is_authenticated and self.request.user.role == "ROOT"
-        ):
+        if self.request.method == "GET" and not self._is_root():
             queryset = queryset.filter(is_public=True)
 
         muscle_group = self.request.query_params.get("muscle_group")
         level = self.request.query_params.get("level")
-        search = self.request.query_params.get("q")
 
         if muscle_group:
             queryset = queryset.filter(muscle_group__icontains=muscle_group)
         if level:
             queryset = queryset.filter(level=level)
-        if search:
-            queryset = queryset.filter(title__icontains=search)
 
-        return queryset.order_by("-created_at")
+        queryset = filter_date_range(queryset, self.request, "created_at", "created")
+        return queryset.order_by("-created_at", "-id")
+
+    def list(self, request, *args, **kwargs):
+        # Cached per filter set and catalog version; any write bumps the version.
+        scope = "root" if self._is_root() else "public"
+        key = list_cache_key(scope, request.query_params)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        search = request.query_params.get("q", "").strip()
+        if search:
+            data = self._search_page(request, search)
+        else:
+            data = super().list(request, *args, **kwargs).data
+        cache.set(key, data, settings.CATALOG_CACHE_TIMEOUT)
+        return Response(data)
+
+    def _search_page(self, request, search):
+        """
+        One page of ranked results, best match first. Relevance order has no
+        stable key to resume from, so search pages use `offset` instead of
+        the keyset cursor.
+        """
+        limit = self.paginator.get_page_size(request)
+        try:
+            offset = max(0, int(request.query_params.get("offset", 0)))
+        except ValueError:
+            raise ValidationError({"offset": "Debe ser un entero"})
+
+        results = search_catalog(self.get_queryset(), search, limit + 1, offset)
+        next_link = None
+        if len(results) > limit:
+            next_link = replace_query_param(request.build_absolute_uri(), "offset", offset + limit)
+        return {"next": next_link, "results": self.get_serializer(results[:limit], many=True).data}
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
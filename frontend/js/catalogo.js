@@ -341,17 +341,27 @@
     if (muscleSelect?.value) params.append("muscle_group", muscleSelect.value);
     if (levelSelect?.value) params.append("level", levelSelect.value);
 
+    params.append("page_size", "200");
+
     try {
       const token = getAccessToken();
-      const res = await fetch(`${API_BASE}/catalog/videos/${params.toString() ? `?${params.toString()}` : ""}`, {
-        headers: token
-          ? {
-              Authorization: `Bearer ${token}`,
-            }
-          : {},
-      });
-      if (!res.ok) throw new Error("No se pudo obtener el catケlogo");
-      catalogItems = await res.json();
+      const items = [];
+      let next = `${API_BASE}/catalog/videos/?${params.toString()}`;
+      // The list is paginated ({ next, results }); walk every page.
+      while (next) {
+        const res = await fetch(next, {
+          headers: token
+            ? {
+                Authorization: `Bearer ${token}`,
+              }
+            : {},
+        });
+        if (!res.ok) throw new Error("No se pudo obtener el catケlogo");
+        const page = await res.json();
+        items.push(...page.results);
+        next = page.next;
+      }
+      catalogItems = items;
       renderCatalog(catalogItems);
     } catch (err) {
       console.error(err);
@@ -17,7 +17,8 @@
       throw new Error("Sin token");
     }
 
-    const res = await fetch(`${API}${path}`, {
+    const url = path.startsWith("http") ? path : `${API}${path}`;
+    const res = await fetch(url, {
       method: "GET",
       headers: {
         Authorization: `Bearer ${token}`,
@@ -38,6 +39,18 @@
     return res.json();
   }
 
+  // Paginated lists answer { next, results }; follow the cursors to the end.
+  async function apiGetAll(path) {
+    const items = [];
+    let next = path;
+    while (next) {
+      const page = await apiGet(next);
+      items.push(...(page.results || []));
+      next = page.next;
+    }
+    return items;
+  }
+
   async function apiDelete(path) {
     const token = getAccess();
     if (!token) {
@@ -74,7 +87,7 @@
     listEl.innerHTML = "";
 
     try {
-      const students = await apiGet("/api/students/");
+      const students = await apiGetAll("/api/students/");
       if (!students || students.length === 0) {
         statusEl.textContent = "No hay alumnos.";
         return;
@@ -49,10 +49,6 @@
     return res.json();
   }
 
-  function delay(ms) {
-    return new Promise((resolve) => setTimeout(resolve, ms));
-  }
-
   async function fetchWeekStatus(weekId) {
     return apiRequest(`/api/plans/status/?week_id=${weekId}`, { method: "GET" });
   }
@@ -308,15 +304,22 @@
   async function loadCatalogExercises(statusEl) {
     try {
       const token = getAccess();
-      const res = await fetch(`${API}/api/catalog/videos/`, {
-        method: "GET",
-        headers: {
-          Accept: "application/json",
-          ...(token ? { Authorization: `Bearer ${token}` } : {}),
-        },
-      });
-      if (!res.ok) throw new Error("No se pudo cargar el catalogo");
-      catalogExercises = await res.json();
+      const items = [];
+      let next = `${API}/api/catalog/videos/?page_size=200`;
+      while (next) {
+        const res = await fetch(next, {
+          method: "GET",
+          headers: {
+            Accept: "application/json",
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+          },
+        });
+        if (!res.ok) throw new Error("No se pudo cargar el catalogo");
+        const page = await res.json();
+        items.push(...page.results);
+        next = page.next;
+      }
+      catalogExercises = items;
       renderPlanEditor();
     } catch (err) {
       console.error(err);
@@ -342,19 +345,73 @@
     return data;
   }
 
-  async function pollWeekContent(weekId, type, statusEl, workoutForm, dietForm) {
-    const maxAttempts = 40;
-    const delayMs = 3000;
+  async function waitWeekStatus(weekId, etag) {
+    const token = getAccess();
+    if (!token) {
+      redirectToLogin();
+      throw new Error("Sin token");
+    }
+
+    const res = await fetch(`${API}/api/plans/status/wait/?week_id=${weekId}`, {
+      method: "GET",
+      cache: "no-store",
+      headers: {
+        Authorization: `Bearer ${token}`,
+        Accept: "application/json",
+        ...(etag ? { "If-None-Match": etag } : {}),
+      },
+    });
+
+    if (res.status === 401) {
+      redirectToLogin();
+      throw new Error("Token invalido o expirado");
+    }
+    if (res.status === 304) {
+      // Retry-After: el servidor no retuvo la peticion (demasiadas esperas), reintentar mas tarde.
+      const retryAfter = Number(res.headers.get("Retry-After")) || 0;
+      return { etag: res.headers.get("ETag") || etag, data: null, retryAfter };
+    }
+    if (!res.ok) {
+      const text = await res.text();
+      throw new Error(text || "Error en la peticion");
+    }
+
+    return { etag: res.headers.get("ETag"), data: await res.json() };
+  }
+
+  function sleep(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
 
-    for (let attempt = 0; attempt < maxAttempts; attempt += 1) {
-      let data;
+  async function pollWeekContent(weekId, type, statusEl, workoutForm, dietForm) {
+    // Long-poll: el servidor responde solo cuando cambia el estado (o 304 al expirar).
+    const maxWaitMs = 5 * 60 * 1000;
+    const deadline = Date.now() + maxWaitMs;
+    let etag = null;
+    let backoffMs = 1000;
+
+    while (Date.now() < deadline) {
+      let result;
       try {
-        data = await fetchWeekStatus(weekId);
+        result = await waitWeekStatus(weekId, etag);
       } catch (err) {
         if (statusEl) statusEl.textContent = `Error: ${err.message}`;
         return;
       }
 
+      etag = result.etag;
+      const data = result.data;
+      if (!data) {
+        if (result.retryAfter) {
+          // Sin esperar en el servidor: respetar Retry-After con un backoff creciente.
+          backoffMs = Math.min(Math.max(backoffMs * 2, result.retryAfter * 1000), 15000);
+          await sleep(Math.min(backoffMs, Math.max(0, deadline - Date.now())));
+        } else {
+          backoffMs = 1000;
+        }
+        continue;
+      }
+
       if (type === "workout") {
         if (data.workout_status === "ready") {
           if (Array.isArray(data.workout_plan)) loadPlanFromApi(data.workout_plan);
@@ -367,7 +424,7 @@
         }
       } else {
         if (data.diet_status === "ready") {
-          fillDietContent(dietForm, data.diet_content);
+          if (data.diet_content !== undefined) fillDietContent(dietForm, data.diet_content);
           if (statusEl) statusEl.textContent = "Dieta lista.";
           return;
         }
@@ -376,20 +433,17 @@
           return;
         }
       }
-
-      await delay(delayMs);
     }
 
-    if (statusEl) statusEl.textContent = "Sigue en proceso. Puedes dejar la pagina abierta y se actualizara.";
+    if (statusEl) statusEl.textContent = "Sigue en proceso. Recarga la pagina mas tarde para ver el resultado.";
   }
 
   async function loadActiveWeek(student, weekResult, workoutWeekId, dietWeekId) {
     try {
-      const weeks = await apiRequest("/api/plans/status/", { method: "GET" });
-      if (!Array.isArray(weeks)) return;
-
-      const activeWeek = weeks.find((week) => week.is_active && week.student === student.username);
-      if (!activeWeek) return;
+      const activeWeek = await apiRequest(`/api/plans/status/active/?student_id=${student.id}`, {
+        method: "GET",
+      });
+      if (!activeWeek || !activeWeek.id) return null;
 
       if (weekResult) {
         weekResult.textContent = `Semana activa: ${formatWeekLabel(activeWeek)}`;
@@ -417,6 +471,7 @@
     const aiFocus = document.getElementById("aiFocus");
     const aiDays = document.getElementById("aiDays");
     const aiNotes = document.getElementById("aiNotes");
+    const aiMode = document.getElementById("aiMode");
     const dietAiBtn = document.getElementById("dietAiBtn");
     const workoutAiStatus = document.getElementById("workoutAiStatus");
     const dietAiStatus = document.getElementById("dietAiStatus");
@@ -425,6 +480,7 @@
     const addDayBtn = document.getElementById("addDayBtn");
     const dietNotes = document.getElementById("dietNotes");
     const dietCalories = document.getElementById("dietCalories");
+    const dietMode = document.getElementById("dietMode");
 
     if (!statusEl || !weekForm || !workoutForm || !dietForm) return;
 
@@ -516,6 +572,7 @@
           if (aiFocus?.value) payload.focus_muscle = aiFocus.value;
           if (aiDays?.value) payload.days_per_week = Number(aiDays.value);
           if (aiNotes?.value) payload.ai_notes = aiNotes.value.trim();
+          if (aiMode?.value) payload.mode = aiMode.value;
 
           const response = await apiRequest("/api/plans/workouts/ai/", {
             method: "POST",
@@ -524,6 +581,15 @@
           if (workoutAiStatus) {
             workoutAiStatus.textContent = `${response.message} (status: ${response.status})`;
           }
+          if (response.mode === "local" || response.mode === "draft") {
+            // The local plan is already saved; show it while the AI one (if any) runs.
+            const current = await fetchWeekStatus(weekId);
+            if (Array.isArray(current.workout_plan)) loadPlanFromApi(current.workout_plan);
+          }
+          if (response.mode === "local") {
+            if (workoutResult) workoutResult.textContent = "Rutina generada. Ajusta y guarda si es necesario.";
+            return;
+          }
           await pollWeekContent(weekId, "workout", workoutAiStatus, workoutForm, dietForm);
           if (workoutResult) workoutResult.textContent = "Rutina generada. Ajusta y guarda si es necesario.";
         } catch (err) {
@@ -599,6 +665,7 @@
           const payload = { week_id: weekId };
           if (dietNotes?.value) payload.notes = dietNotes.value.trim();
           if (dietCalories?.value) payload.calories = Number(dietCalories.value);
+          if (dietMode?.value) payload.mode = dietMode.value;
 
           const response = await apiRequest("/api/plans/diets/ai/", {
             method: "POST",
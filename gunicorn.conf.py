@@ -0,0 +1,35 @@
+"""
+Gunicorn settings, loaded automatically from the working directory.
+
+Prometheus metrics (backend/metrics.py) run in multiprocess mode: every
+worker writes its samples to PROMETHEUS_MULTIPROC_DIR and /api/metrics
+aggregates them. The directory is set here, before workers are forked,
+and emptied at startup so counters from a previous run are not reported.
+
+The thread count comes from WEB_THREADS, which backend/settings.py also
+reads to size the status long-poll waiter cap.
+"""
+import os
+import shutil
+import tempfile
+
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "8"))
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "prometheus_multiproc"),
+)
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges; its counters/histograms are kept.
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
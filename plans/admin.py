@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Week, Workout, Diet, WorkoutDay, WorkoutExercise
+from .models import Week, Workout, Diet, WorkoutDay, WorkoutExercise, GenerationJob, GenerationBatch, AIResponseCache
 
 
 @admin.register(Week)
@@ -44,3 +44,51 @@ class DietAdmin(admin.ModelAdmin):
         'created_at',
     )
     search_fields = ('week__student__user__username',)
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'week',
+        'kind',
+        'status',
+        'batch',
+        'generation',
+        'attempts',
+        'duration_ms',
+        'http_attempts',
+        'http_status',
+        'prompt_tokens',
+        'completion_tokens',
+        'fallback_used',
+        'missing_count',
+        'created_at',
+        'started_at',
+        'finished_at',
+    )
+    list_filter = ('kind', 'status', 'fallback_used', 'cache_hit')
+    search_fields = ('week__student__user__username',)
+    readonly_fields = (
+        'trace',
+        'duration_ms',
+        'prompt_tokens',
+        'completion_tokens',
+        'http_attempts',
+        'http_status',
+        'cache_hit',
+        'fallback_used',
+        'missing_count',
+    )
+
+
+@admin.register(GenerationBatch)
+class GenerationBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_by', 'created_at')
+    search_fields = ('created_by__username',)
+
+
+@admin.register(AIResponseCache)
+class AIResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ('key', 'model', 'hit_count', 'created_at', 'last_used_at')
+    search_fields = ('key',)
@@ -0,0 +1,174 @@
+import math
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from plans.models import GenerationJob
+
+ACTIVE_STATUSES = GenerationJob.ACTIVE_STATUSES
+
+# Hint sent with 429s caused by in-flight/queue limits, which free up as jobs finish.
+IN_FLIGHT_RETRY_SECONDS = 10
+
+LOCK_ATTEMPTS = 40
+LOCK_WAIT_SECONDS = 0.005
+
+
+@contextmanager
+def _cache_lock(key):
+    """
+    Short mutual exclusion over a cache key using cache.add().
+    If the lock cannot be taken quickly the caller proceeds unlocked: a rare
+    over-admission is better than blocking a request on a stuck lock.
+    """
+    lock_key = f"{key}:lock"
+    acquired = False
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, 1, timeout=2):
+            acquired = True
+            break
+        time.sleep(LOCK_WAIT_SECONDS)
+    try:
+        yield
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+
+class TokenBucket:
+    """
+    Token bucket kept in the shared cache as (tokens, timestamp), so every
+    gunicorn worker sees the same budget. Refills at `rate_per_minute` up
+    to `capacity` tokens.
+    A cost above `capacity` (a large bulk batch) is admitted once the bucket
+    is full and leaves it in debt, so later requests wait until the whole
+    cost has been refilled and the average rate still holds.
+    """
+
+    def __init__(self, key: str, rate_per_minute: float, capacity: int):
+        self.key = key
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+
+    def _ttl(self, tokens):
+        # Once idle this long the bucket is full again, so the entry can expire.
+        return math.ceil((self.capacity - tokens) / self.rate) + 60
+
+    def _level(self, now):
+        state = cache.get(self.key)
+        if state is None:
+            return float(self.capacity)
+        tokens, stamp = state
+        return min(float(self.capacity), tokens + (now - stamp) * self.rate)
+
+    def _store(self, tokens, now):
+        cache.set(self.key, (tokens, now), self._ttl(tokens))
+
+    def take(self, cost: int = 1) -> float:
+        """Consume `cost` tokens. Returns 0 on success, else seconds until they are available."""
+        needed = min(cost, self.capacity)
+        with _cache_lock(self.key):
+            now = time.time()
+            tokens = self._level(now)
+            if tokens >= needed:
+                self._store(tokens - cost, now)
+                return 0.0
+            self._store(tokens, now)
+            return (needed - tokens) / self.rate
+
+    def refund(self, cost: int = 1) -> None:
+        with _cache_lock(self.key):
+            now = time.time()
+            self._store(min(self.capacity, self._level(now) + cost), now)
+
+
+def coach_bucket(user) -> TokenBucket:
+    return TokenBucket(
+        f"generation:bucket:coach:{user.pk}",
+        settings.GENERATION_COACH_RATE_PER_MINUTE,
+        settings.GENERATION_COACH_BURST,
+    )
+
+
+def global_bucket() -> TokenBucket:
+    return TokenBucket(
+        "generation:bucket:global",
+        settings.GENERATION_GLOBAL_RATE_PER_MINUTE,
+        settings.GENERATION_GLOBAL_BURST,
+    )
+
+
+def bulk_bucket(user) -> TokenBucket:
+    """Per-coach budget for bulk batches, counted in jobs rather than requests."""
+    return TokenBucket(
+        f"generation:bucket:coach:{user.pk}:bulk",
+        settings.GENERATION_BULK_COACH_RATE_PER_MINUTE,
+        settings.GENERATION_BULK_COACH_BURST,
+    )
+
+
+def queue_depth() -> int:
+    return GenerationJob.objects.filter(status__in=ACTIVE_STATUSES).count()
+
+
+class Admission:
+    def __init__(self, allowed: bool, queue_depth: int, retry_after: int = 0, detail: str = "", buckets=()):
+        self.allowed = allowed
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.detail = detail
+        self.buckets = buckets
+
+    def refund(self, cost: int) -> None:
+        """Give back tokens for jobs that were admitted but not queued."""
+        if cost > 0:
+            for bucket in self.buckets:
+                bucket.refund(cost)
+
+
+def admit_generation(user, *, jobs: int = 1, interactive: bool = True) -> Admission:
+    """
+    Decide whether `user` may queue `jobs` more AI generation jobs now.
+    Checks, cheapest rejection first: the global queue depth, the coach's
+    active jobs, then the token buckets. Single-week requests count their
+    in-flight single-week jobs and pay from the per-coach bucket; bulk
+    batches count every active job of the coach and pay from the coach's
+    bulk bucket. Both then pay one token per job from the global bucket.
+    """
+    depth = queue_depth()
+    if depth + jobs > settings.GENERATION_MAX_QUEUE_DEPTH:
+        return Admission(False, depth, IN_FLIGHT_RETRY_SECONDS, "La cola de generacion esta llena")
+
+    active = GenerationJob.objects.filter(status__in=ACTIVE_STATUSES, week__student__coach=user)
+    if interactive:
+        in_flight = active.filter(batch__isnull=True).count()
+        if in_flight + jobs > settings.GENERATION_COACH_MAX_IN_FLIGHT:
+            return Admission(
+                False, depth, IN_FLIGHT_RETRY_SECONDS,
+                "Demasiadas generaciones en curso, espera a que terminen",
+            )
+    elif active.count() + jobs > settings.GENERATION_COACH_MAX_QUEUED:
+        return Admission(
+            False, depth, IN_FLIGHT_RETRY_SECONDS,
+            "Demasiadas generaciones en cola, espera a que terminen",
+        )
+
+    if interactive:
+        coach = coach_bucket(user)
+        detail = "Limite de generaciones por minuto alcanzado"
+    else:
+        coach = bulk_bucket(user)
+        detail = "Limite de generaciones masivas alcanzado"
+    wait = coach.take(jobs)
+    if wait:
+        return Admission(False, depth, math.ceil(wait), detail)
+
+    glob = global_bucket()
+    wait = glob.take(jobs)
+    if wait:
+        coach.refund(jobs)
+        return Admission(False, depth, math.ceil(wait), "Servicio de generacion saturado")
+
+    return Admission(True, depth, buckets=(coach, glob))
@@ -1,154 +1,386 @@
-import threading
-from django.db import close_old_connections
-from catalog.models import VisualResource
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from catalog.index import get_catalog_snapshot
 from plans.ai.deepseek import DeepSeekService
-from plans.models import Workout, Diet, Week
+from plans.ai.tracing import record, span, start_trace
+from plans.models import GenerationJob, Workout, Diet, Week
+from plans.nutrition import build_local_diet
+from plans.planner import build_local_plan
 from plans.workout_plan import (
-    build_fallback_plan,
     parse_ai_workout,
     resolve_named_plan,
     save_workout_from_plan,
 )
 
+GENERATION_FIELDS = {
+    GenerationJob.KIND_WORKOUT: "workout_generation",
+    GenerationJob.KIND_DIET: "diet_generation",
+}
 
-def _fallback_diet(context):
-    """Generate a simple deterministic diet when the AI call fails."""
-    weight = float(context.get("weight") or 70)
-    protein = int(weight * 1.6)
-    objective = (context.get("objective") or "").lower()
-    notes = context.get("diet_notes") or ""
-    calories = context.get("diet_calories")
-
-    focus = "balance"  # default
-    if "volumen" in objective or "ganar" in objective:
-        focus = "calorico moderado"
-    elif "def" in objective or "baja" in objective or "perder" in objective:
-        focus = "deficit ligero"
-
-    days = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"]
-    header = [
-        f"Plan semanal ({focus}). Peso: {weight} kg, Proteina diaria: {protein} g aprox.",
-        f"Calorias objetivo: {calories} kcal/dia" if calories else "",
-        f"Notas del coach/alergias: {notes}" if notes else "",
-        "Hidratacion: 2-3 L agua dia. Ajusta por actividad.",
-    ]
-
-    blocks = []
-    for day in days:
-        blocks.append(
-            "\n".join(
-                [
-                    f"{day}:",
-                    "- Desayuno: Avena + fruta + proteina en polvo + nueces.",
-                    "- Comida: Pollo/pavo o pescado + arroz/quinoa + verduras.",
-                    "- Cena: Huevos/claras + vegetales salteados + tortilla integral.",
-                    "- Snack: Yogur griego + fruta o frutos secos.",
-                ]
-            )
-        )
+SUPERSEDED_ERROR = "Reemplazado por una generacion mas reciente"
 
-    return "\n\n".join([line for line in header if line] + blocks)
+logger = logging.getLogger(__name__)
 
 
-def generate_diet_async(week_id, context):
-    def task():
-        try:
-            close_old_connections()
-            if Diet.objects.filter(week_id=week_id).exists():
-                Week.objects.filter(id=week_id).update(
-                    diet_status=Week.STATUS_READY
-                )
-                return
+class Superseded(Exception):
+    """The week was regenerated after this job was issued; its result is discarded."""
 
-            try:
-                content = DeepSeekService.generate_diet(context)
-            except Exception as ai_error:
-                print(">>> DIET AI ERROR, using fallback:", repr(ai_error))
-                content = _fallback_diet(context)
-            if not content or not content.strip():
-                raise RuntimeError("Diet generation returned empty content")
-            if not Diet.objects.filter(week_id=week_id).exists():
-                Diet.objects.create(week_id=week_id, content=content)
 
+@contextmanager
+def fenced_write(week_id, kind, generation):
+    """
+    Transaction that holds the week row while `generation` is still the
+    current one for `kind`, so a superseded job can never overwrite the plan
+    of a newer generation. Raises Superseded otherwise.
+    """
+    field = GENERATION_FIELDS[kind]
+    with transaction.atomic():
+        current = (
+            Week.objects.select_for_update()
+            .filter(id=week_id)
+            .values_list(field, flat=True)
+            .first()
+        )
+        if current is None:
+            raise RuntimeError("Week not found")
+        if current != generation:
+            raise Superseded()
+        yield
+
+
+def _fallback_diet(context):
+    """Diet solved locally from the food table when the AI call fails."""
+    return build_local_diet(context)
+
+
+def _run_diet(week_id, context, generation):
+    if not context.get("regenerate") and Diet.objects.filter(week_id=week_id).exists():
+        with fenced_write(week_id, GenerationJob.KIND_DIET, generation):
             Week.objects.filter(id=week_id).update(
                 diet_status=Week.STATUS_READY
             )
-            print(">>> DIET SAVED OK")
-        except Exception as e:
-            Week.objects.filter(id=week_id).update(
-                diet_status=Week.STATUS_ERROR
+        return
+
+    try:
+        with span("ai_call"):
+            content = DeepSeekService.generate_diet(
+                context,
+                use_cache=not context.get("no_cache"),
             )
-            print(">>> DIET THREAD ERROR:", repr(e))
-        finally:
-            try:
-                close_old_connections()
-            except Exception as e:
-                print(">>> DIET THREAD CLOSE ERROR:", repr(e))
+    except Exception as ai_error:
+        logger.warning("Diet AI failed for week %s, using fallback: %r", week_id, ai_error)
+        record(fallback_used=True)
+        with span("fallback"):
+            content = _fallback_diet(context)
+    if not content or not content.strip():
+        raise RuntimeError("Diet generation returned empty content")
 
-    threading.Thread(target=task, daemon=True).start()
+    with span("save"), fenced_write(week_id, GenerationJob.KIND_DIET, generation):
+        # Replace rather than update so the diet gets a new id/ETag.
+        Diet.objects.filter(week_id=week_id).delete()
+        Diet.objects.create(week_id=week_id, content=content)
+        Week.objects.filter(id=week_id).update(
+            diet_status=Week.STATUS_READY
+        )
+    logger.info("Diet saved for week %s", week_id)
 
-def generate_workout_async(week_id, context):
-    def task():
-        try:
-            close_old_connections()
-            week = Week.objects.filter(id=week_id).first()
-            if not week:
-                print(">>> WORKOUT THREAD ERROR: Week not found")
-                Week.objects.filter(id=week_id).update(
-                    workout_status=Week.STATUS_ERROR
-                )
-                return
 
-            if Workout.objects.filter(week_id=week_id).exists():
+def _run_workout(week_id, context, generation):
+    week = Week.objects.filter(id=week_id).first()
+    if not week:
+        raise RuntimeError("Week not found")
+
+    # A local draft is saved up front in "draft" mode; the AI plan replaces it.
+    # Otherwise the current plan stays visible until the new one is saved.
+    has_draft = context.get("draft") and Workout.objects.filter(week_id=week_id).exists()
+
+    with span("catalog_load"):
+        exercises = get_catalog_snapshot()
+    if not exercises:
+        raise RuntimeError("No hay ejercicios en el catalogo")
+
+    try:
+        with span("ai_call"):
+            raw_plan = DeepSeekService.generate_workout(
+                context,
+                exercises,
+                use_cache=not context.get("no_cache"),
+            )
+        with span("parse"):
+            parsed_plan = parse_ai_workout(raw_plan)
+        with span("resolve"):
+            resolved_plan, missing = resolve_named_plan(
+                parsed_plan,
+                exercises,
+                ignore_missing=True,
+            )
+        if missing:
+            record(missing_count=len(missing))
+            logger.info("Workout AI for week %s skipped exercises not in catalog: %s", week_id, missing)
+        if not resolved_plan:
+            raise RuntimeError("DeepSeek sin ejercicios validos")
+    except Exception as ai_error:
+        if has_draft:
+            logger.warning("Workout AI failed for week %s, keeping local draft: %r", week_id, ai_error)
+            with fenced_write(week_id, GenerationJob.KIND_WORKOUT, generation):
                 Week.objects.filter(id=week_id).update(
                     workout_status=Week.STATUS_READY
                 )
-                return
+            return
+        logger.warning("Workout AI failed for week %s, using fallback: %r", week_id, ai_error)
+        record(fallback_used=True)
+        with span("fallback"):
+            resolved_plan = build_local_plan(exercises, context)
 
-            exercises = list(VisualResource.objects.all())
-            if not exercises:
-                raise RuntimeError("No hay ejercicios en el catalogo")
+    if not resolved_plan:
+        raise RuntimeError("No hay ejercicios para guardar")
 
-            try:
-                raw_plan = DeepSeekService.generate_workout(context, exercises)
-                parsed_plan = parse_ai_workout(raw_plan)
-                resolved_plan, missing = resolve_named_plan(
-                    parsed_plan,
-                    exercises,
-                    ignore_missing=True,
-                )
-                if missing:
-                    print(">>> WORKOUT AI skipped exercises not in catalog:", missing)
-                if not resolved_plan:
-                    raise RuntimeError("DeepSeek sin ejercicios validos")
-            except Exception as ai_error:
-                print(">>> WORKOUT AI ERROR, using fallback:", repr(ai_error))
-                resolved_plan = build_fallback_plan(
-                    exercises,
-                    level=context.get("level") if isinstance(context, dict) else None,
-                    days_count=(context or {}).get("days_per_week") if isinstance(context, dict) else None,
-                    focus_muscle=(context or {}).get("focus_muscle") if isinstance(context, dict) else None,
-                )
+    with span("save"), fenced_write(week_id, GenerationJob.KIND_WORKOUT, generation):
+        save_workout_from_plan(week, resolved_plan)
+        Week.objects.filter(id=week_id).update(
+            workout_status=Week.STATUS_READY
+        )
+    logger.info("Workout saved for week %s", week_id)
 
-            if not resolved_plan:
-                raise RuntimeError("No hay ejercicios para guardar")
 
-            save_workout_from_plan(week, resolved_plan)
+_RUNNERS = {
+    GenerationJob.KIND_WORKOUT: (_run_workout, "workout_status"),
+    GenerationJob.KIND_DIET: (_run_diet, "diet_status"),
+}
 
-            Week.objects.filter(id=week_id).update(
-                workout_status=Week.STATUS_READY
+
+def active_job(week_id, kind):
+    """The queued or running job for (week, kind), if any."""
+    return GenerationJob.objects.filter(
+        week_id=week_id,
+        kind=kind,
+        status__in=GenerationJob.ACTIVE_STATUSES,
+    ).first()
+
+
+def cancel_jobs(jobs, reason=SUPERSEDED_ERROR):
+    """
+    Mark the active jobs of `jobs` as cancelled. Queued ones are never
+    claimed; running ones finish their AI call but fail the write fence.
+    """
+    return jobs.filter(status__in=GenerationJob.ACTIVE_STATUSES).update(
+        status=GenerationJob.STATUS_CANCELLED,
+        error=reason,
+        finished_at=timezone.now(),
+    )
+
+
+def _bump_generations(week_ids, kind):
+    """Start a new generation for `kind` on every week; returns {week_id: generation}."""
+    field = GENERATION_FIELDS[kind]
+    weeks = Week.objects.filter(id__in=week_ids)
+    weeks.update(**{field: F(field) + 1})
+    return dict(weeks.values_list('id', field))
+
+
+def supersede_generation(week_id, kind):
+    """
+    Cancel the active job for (week, kind) and start a new generation, so
+    any result still in flight is discarded. Used before a plan is written
+    synchronously (local modes) and by `enqueue_generation(supersede=True)`.
+    """
+    with transaction.atomic():
+        cancel_jobs(GenerationJob.objects.filter(week_id=week_id, kind=kind))
+        return _bump_generations([week_id], kind)[week_id]
+
+
+def enqueue_generation(week_id, kind, context, *, supersede=False):
+    """
+    Single-flight enqueue for (week, kind); returns (job, created).
+    While a job for the same week and kind is queued or running, further
+    requests attach to it instead of paying for another AI call. With
+    `supersede` the active job is cancelled and a new one issued under the
+    next generation, which fences the old job out of writing its result.
+    The web request only pays for these few queries; the AI call happens in
+    `manage.py run_generation_worker`.
+    """
+    if not supersede:
+        job = active_job(week_id, kind)
+        if job:
+            return job, False
+
+    try:
+        with transaction.atomic():
+            generation = supersede_generation(week_id, kind)
+            job = GenerationJob.objects.create(
+                week_id=week_id,
+                kind=kind,
+                context=context or {},
+                generation=generation,
             )
-            print(">>> WORKOUT SAVED OK")
+        return job, True
+    except IntegrityError:
+        # A concurrent request inserted the active job first: attach to it.
+        job = active_job(week_id, kind)
+        if job is None:
+            raise
+        return job, False
+
+
+def enqueue_batch(batch, items, *, supersede=False):
+    """
+    Single-flight enqueue of many (week_id, kind, context) items.
+    Items whose week already has an active job of that kind attach to it
+    (or cancel it when `supersede`); the rest get a new generation and are
+    inserted in one query. Returns (created_jobs, attached_jobs).
+    Meant to run inside the caller's transaction.
+    """
+    # Only the requested (week, kind) pairs: a workout-only batch must not
+    # touch the diet job of the same week.
+    pairs = Q(pk__in=[])
+    for kind in {kind for _, kind, _ in items}:
+        pairs |= Q(kind=kind, week_id__in={week_id for week_id, k, _ in items if k == kind})
+    active = GenerationJob.objects.filter(
+        pairs,
+        status__in=GenerationJob.ACTIVE_STATUSES,
+    )
+    if supersede:
+        cancel_jobs(active)
+        running = {}
+    else:
+        running = {(job.week_id, job.kind): job for job in active}
+
+    attached = []
+    pending = []
+    for week_id, kind, context in items:
+        job = running.get((week_id, kind))
+        if job:
+            attached.append(job)
+        else:
+            pending.append((week_id, kind, context))
+
+    generations = {
+        kind: _bump_generations([week_id for week_id, k, _ in pending if k == kind], kind)
+        for kind in {kind for _, kind, _ in pending}
+    }
+    jobs = GenerationJob.objects.bulk_create([
+        GenerationJob(
+            batch=batch,
+            week_id=week_id,
+            kind=kind,
+            context=context or {},
+            generation=generations[kind][week_id],
+        )
+        for week_id, kind, context in pending
+    ])
+    return jobs, attached
+
+
+def generate_diet_async(week_id, context, *, supersede=False):
+    return enqueue_generation(week_id, GenerationJob.KIND_DIET, context, supersede=supersede)
+
+
+def generate_workout_async(week_id, context, *, supersede=False):
+    return enqueue_generation(week_id, GenerationJob.KIND_WORKOUT, context, supersede=supersede)
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running and return it.
+    Single-week requests go before bulk batches so one large batch does not
+    delay every other coach.
+    The conditional UPDATE makes the claim safe across several workers
+    without relying on SELECT ... FOR UPDATE SKIP LOCKED support.
+    """
+    candidates = list(
+        GenerationJob.objects.filter(status=GenerationJob.STATUS_QUEUED)
+        .order_by(F('batch').asc(nulls_first=True), 'created_at', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = GenerationJob.objects.filter(
+            id=job_id,
+            status=GenerationJob.STATUS_QUEUED,
+        ).update(
+            status=GenerationJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return GenerationJob.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs(stale_after_seconds, max_attempts=3):
+    """
+    Recover jobs left in 'running' by a worker that died mid-generation.
+    Returns (requeued, failed) counts.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after_seconds)
+    stale = GenerationJob.objects.filter(
+        status=GenerationJob.STATUS_RUNNING,
+        started_at__lt=cutoff,
+    )
+    failed_ids = list(
+        stale.filter(attempts__gte=max_attempts).values_list('id', flat=True)
+    )
+    for job in GenerationJob.objects.filter(id__in=failed_ids):
+        _finish_job(job, GenerationJob.STATUS_ERROR, "Worker perdido demasiadas veces")
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=GenerationJob.STATUS_QUEUED,
+        started_at=None,
+    )
+    return requeued, len(failed_ids)
+
+
+def _finish_job(job, status, error=""):
+    # Only a job still running may finish; a cancelled one keeps its status.
+    finished = GenerationJob.objects.filter(
+        id=job.id,
+        status=GenerationJob.STATUS_RUNNING,
+    ).update(
+        status=status,
+        error=error,
+        finished_at=timezone.now(),
+    )
+    if finished and status == GenerationJob.STATUS_ERROR:
+        _, status_field = _RUNNERS[job.kind]
+        Week.objects.filter(
+            id=job.week_id,
+            **{GENERATION_FIELDS[job.kind]: job.generation},
+        ).update(**{status_field: Week.STATUS_ERROR})
+
+
+def run_job(job):
+    """
+    Execute a claimed job in the current thread.
+    Stage timings and DeepSeek accounting are stored on the job, also when it
+    fails or is superseded.
+    """
+    with start_trace() as trace:
+        try:
+            close_old_connections()
+            runner, _ = _RUNNERS[job.kind]
+            runner(job.week_id, job.context or {}, job.generation)
+            status, error = GenerationJob.STATUS_DONE, ""
+        except Superseded:
+            logger.info("%s job %s superseded, result discarded", job.kind, job.id)
+            status, error = GenerationJob.STATUS_CANCELLED, SUPERSEDED_ERROR
         except Exception as e:
-            Week.objects.filter(id=week_id).update(
-                workout_status=Week.STATUS_ERROR
+            logger.exception("%s job %s failed", job.kind, job.id)
+            status, error = GenerationJob.STATUS_ERROR, repr(e)
+
+        try:
+            GenerationJob.objects.filter(id=job.id).update(**trace.as_fields())
+            _finish_job(job, status, error)
+            logger.info(
+                "%s job %s %s in %s ms (attempts=%s tokens=%s/%s fallback=%s)",
+                job.kind, job.id, status, trace.elapsed_ms(), trace.http_attempts,
+                trace.prompt_tokens, trace.completion_tokens, trace.fallback_used,
             )
-            print(">>> WORKOUT THREAD ERROR:", repr(e))
         finally:
             try:
                 close_old_connections()
-            except Exception as e:
-                print(">>> WORKOUT THREAD CLOSE ERROR:", repr(e))
-
-    threading.Thread(target=task, daemon=True).start()
-
+            except Exception:
+                logger.exception("%s job %s: error closing connections", job.kind, job.id)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from plans.models import AIResponseCache
+
+# Counters live in the shared Django cache so every worker process (and
+# manage.py deepseek_cache) sees the same totals.
+STATS_COUNTERS = ("hits", "misses", "stores", "evictions")
+STATS_KEY_PREFIX = "deepseek:cache:stats:"
+
+
+def _bump(counter: str, amount: int = 1) -> None:
+    key = STATS_KEY_PREFIX + counter
+    try:
+        shared_cache.incr(key, amount)
+    except ValueError:
+        if not shared_cache.add(key, amount, timeout=None):
+            shared_cache.incr(key, amount)
+
+
+def make_key(payload: dict) -> str:
+    """
+    Content address for a chat completion request.
+    Only the fields that change the answer take part in the hash.
+    """
+    material = {
+        "model": payload.get("model"),
+        "temperature": payload.get("temperature"),
+        "max_tokens": payload.get("max_tokens"),
+        "messages": payload.get("messages"),
+    }
+    encoded = json.dumps(
+        material,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _expiry_cutoff():
+    return timezone.now() - timedelta(seconds=settings.DEEPSEEK_CACHE_TTL_SECONDS)
+
+
+def get(key: str) -> str | None:
+    entry = (
+        AIResponseCache.objects.filter(key=key, created_at__gte=_expiry_cutoff())
+        .only("id", "response")
+        .first()
+    )
+    if entry is None:
+        _bump("misses")
+        return None
+
+    AIResponseCache.objects.filter(id=entry.id).update(
+        hit_count=F("hit_count") + 1,
+        last_used_at=timezone.now(),
+    )
+    _bump("hits")
+    return entry.response
+
+
+def put(key: str, model: str, response: str) -> None:
+    now = timezone.now()
+    updated = AIResponseCache.objects.filter(key=key).update(
+        model=model,
+        response=response,
+        created_at=now,
+        last_used_at=now,
+    )
+    if not updated:
+        try:
+            AIResponseCache.objects.create(key=key, model=model, response=response)
+        except IntegrityError:
+            # Another worker stored the same prompt first; its answer is as good as ours.
+            pass
+    _bump("stores")
+    evict()
+
+
+def evict() -> int:
+    """Drop expired rows, then the least recently used ones above the size limit."""
+    removed, _ = AIResponseCache.objects.filter(created_at__lt=_expiry_cutoff()).delete()
+
+    max_entries = settings.DEEPSEEK_CACHE_MAX_ENTRIES
+    overflow = AIResponseCache.objects.count() - max_entries
+    if overflow > 0:
+        lru_ids = list(
+            AIResponseCache.objects.order_by("last_used_at", "id")
+            .values_list("id", flat=True)[:overflow]
+        )
+        deleted, _ = AIResponseCache.objects.filter(id__in=lru_ids).delete()
+        removed += deleted
+
+    if removed:
+        _bump("evictions", removed)
+    return removed
+
+
+def clear() -> int:
+    deleted, _ = AIResponseCache.objects.all().delete()
+    return deleted
+
+
+def stats() -> dict:
+    """Shared counters plus the persisted size and lifetime hits of the cache."""
+    values = shared_cache.get_many([STATS_KEY_PREFIX + name for name in STATS_COUNTERS])
+    data = {name: values.get(STATS_KEY_PREFIX + name, 0) for name in STATS_COUNTERS}
+    lookups = data["hits"] + data["misses"]
+    data["hit_rate"] = round(data["hits"] / lookups, 4) if lookups else 0.0
+    data["entries"] = AIResponseCache.objects.count()
+    data["lifetime_hits"] = AIResponseCache.objects.aggregate(
+        total=Sum("hit_count")
+    )["total"] or 0
+    return data
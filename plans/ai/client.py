@@ -0,0 +1,135 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class DeepSeekUnavailable(RuntimeError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker shared by every thread of the process.
+    After `threshold` failures in a row the circuit opens for `cooldown`
+    seconds; the first call after that is a half-open probe whose result
+    closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False  # or the ident of the thread holding the probe
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = threading.get_ident()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release(self) -> None:
+        """
+        End this thread's probe without a verdict (e.g. a 4xx, which says
+        nothing about the endpoint): the next call probes again.
+        No-op once record_success/record_failure ran or for non-probe calls.
+        """
+        with self._lock:
+            if self._probing == threading.get_ident():
+                self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        "DeepSeek circuit opened after %s consecutive failures",
+                        self._failures,
+                    )
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+_session = None
+_session_lock = threading.Lock()
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session so TLS handshakes are paid once per connection."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.DEEPSEEK_POOL_SIZE,
+                    max_retries=0,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    threshold=settings.DEEPSEEK_BREAKER_THRESHOLD,
+                    cooldown=settings.DEEPSEEK_BREAKER_COOLDOWN_SECONDS,
+                )
+    return _breaker
+
+
+def new_deadline() -> float:
+    """Absolute monotonic deadline for one generation."""
+    return time.monotonic() + settings.DEEPSEEK_DEADLINE_SECONDS
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2**attempt))."""
+    ceiling = min(
+        settings.DEEPSEEK_BACKOFF_MAX_SECONDS,
+        settings.DEEPSEEK_BACKOFF_BASE_SECONDS * (2 ** attempt),
+    )
+    return random.uniform(0, ceiling)
@@ -1,9 +1,24 @@
 import logging
 import os
+import time
+
 import requests
+from django.conf import settings
+
+from plans.ai import cache as response_cache
+from plans.ai.client import (
+    DeepSeekUnavailable,
+    backoff_delay,
+    get_breaker,
+    get_session,
+    new_deadline,
+)
+from plans.ai.prompting import estimate_tokens, exercise_line, select_prompt_exercises
+from plans.ai.tracing import record, record_attempt, record_usage, span
 
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEEPSEEK_API_PATH = "/v1/chat/completions"
 DEEPSEEK_TIMEOUT = 60  # seconds
+DEEPSEEK_CONNECT_TIMEOUT = 10  # seconds
 logger = logging.getLogger(__name__)
 
 
@@ -14,6 +29,8 @@ class DeepSeekService:
         *,
         temperature: float = 0.7,
         max_tokens: int = 800,
+        use_cache: bool = True,
+        deadline: float | None = None,
     ) -> str:
         api_key = os.environ.get("DEEPSEEK_API_KEY")
         if not api_key:
@@ -43,50 +60,120 @@ class DeepSeekService:
             "max_tokens": max_tokens,
         }
 
-        # Retry up to 3 times to tolerate transient failures
-        for attempt in range(3):
+        cache_enabled = settings.DEEPSEEK_CACHE_ENABLED
+        cache_key = response_cache.make_key(payload) if cache_enabled else None
+        if cache_enabled and use_cache:
+            with span("cache_lookup"):
+                cached = response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("DeepSeek cache hit key=%s", cache_key[:12])
+                record(cache_hit=True)
+                return cached
+
+        api_url = settings.DEEPSEEK_BASE_URL.rstrip("/") + DEEPSEEK_API_PATH
+        breaker = get_breaker()
+        session = get_session()
+        deadline = deadline or new_deadline()
+        max_attempts = settings.DEEPSEEK_MAX_ATTEMPTS
+        last_error = None
+
+        # Retries share one deadline and back off with jitter between attempts
+        for attempt in range(max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 1:
+                raise RuntimeError("DeepSeek deadline exceeded") from last_error
+
+            if not breaker.allow():
+                raise DeepSeekUnavailable("DeepSeek circuit open") from last_error
+
+            # Every exit below must settle a half-open probe, or the circuit
+            # would stay half-open with no caller ever allowed through again.
             try:
-                response = requests.post(
-                    DEEPSEEK_API_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=DEEPSEEK_TIMEOUT,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                content = data["choices"][0]["message"]["content"]
-                if not content or not str(content).strip():
-                    raise RuntimeError("DeepSeek empty content")
-                return str(content).strip()
-
-            except requests.exceptions.Timeout as exc:
-                logger.warning("DeepSeek timeout (attempt %s/3)", attempt + 1)
-                if attempt == 2:
-                    raise RuntimeError("DeepSeek timeout") from exc
-
-            except requests.exceptions.HTTPError as exc:
-                status = exc.response.status_code if exc.response else "unknown"
-                body = exc.response.text[:500] if exc.response else ""
-                logger.warning("DeepSeek HTTP error status=%s body=%s", status, body)
-                if attempt == 2:
-                    raise RuntimeError(f"DeepSeek HTTP error status={status}") from exc
-
-            except requests.exceptions.RequestException as exc:
-                logger.warning("DeepSeek request error: %s", exc)
-                if attempt == 2:
-                    raise RuntimeError("DeepSeek request error") from exc
-
-            except Exception as exc:
-                logger.warning("DeepSeek response error: %s", exc)
-                if attempt == 2:
-                    raise RuntimeError("DeepSeek response error") from exc
+                record_attempt()
+                try:
+                    with span("deepseek_request"):
+                        response = session.post(
+                            api_url,
+                            headers=headers,
+                            json=payload,
+                            timeout=(DEEPSEEK_CONNECT_TIMEOUT, min(DEEPSEEK_TIMEOUT, remaining)),
+                        )
+                        record(http_status=response.status_code)
+                        response.raise_for_status()
+                        data = response.json()
+
+                    record_usage(data.get("usage"))
+                    content = data["choices"][0]["message"]["content"]
+                    if not content or not str(content).strip():
+                        raise RuntimeError("DeepSeek empty content")
+                    content = str(content).strip()
+                    breaker.record_success()
+                    if cache_enabled:
+                        with span("cache_store"):
+                            response_cache.put(cache_key, payload["model"], content)
+                    return content
+
+                except requests.exceptions.Timeout as exc:
+                    logger.warning("DeepSeek timeout (attempt %s/%s)", attempt + 1, max_attempts)
+                    last_error = RuntimeError("DeepSeek timeout")
+                    last_error.__cause__ = exc
+
+                except requests.exceptions.HTTPError as exc:
+                    status = exc.response.status_code if exc.response is not None else "unknown"
+                    body = exc.response.text[:500] if exc.response is not None else ""
+                    logger.warning("DeepSeek HTTP error status=%s body=%s", status, body)
+                    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+                        # Our request is wrong (bad key, bad payload); retrying will not help
+                        # and the endpoint itself is healthy.
+                        raise RuntimeError(f"DeepSeek HTTP error status={status}") from exc
+                    last_error = RuntimeError(f"DeepSeek HTTP error status={status}")
+                    last_error.__cause__ = exc
+
+                except requests.exceptions.RequestException as exc:
+                    logger.warning("DeepSeek request error: %s", exc)
+                    last_error = RuntimeError("DeepSeek request error")
+                    last_error.__cause__ = exc
+
+                except Exception as exc:
+                    logger.warning("DeepSeek response error: %s", exc)
+                    last_error = RuntimeError("DeepSeek response error")
+                    last_error.__cause__ = exc
+
+                breaker.record_failure()
+                if attempt + 1 >= max_attempts:
+                    break
+
+                delay = backoff_delay(attempt)
+                if time.monotonic() + delay >= deadline:
+                    break
+                with span("backoff"):
+                    time.sleep(delay)
+            finally:
+                breaker.release()
+
+        raise last_error
 
     @staticmethod
-    def generate_workout(context: dict, exercises: list) -> str:
+    def generate_workout(context: dict, exercises: list, *, use_cache: bool = True) -> str:
+        with span("prompt_build"):
+            prompt, exercise_lines = DeepSeekService._workout_prompt(context, exercises)
+        logger.info(
+            "Workout prompt: %s of %s exercises, ~%s tokens",
+            len(exercise_lines),
+            len(exercises),
+            estimate_tokens(prompt),
+        )
+        return DeepSeekService._call_deepseek(
+            prompt,
+            temperature=0.25,
+            max_tokens=900,
+            use_cache=use_cache,
+        )
+
+    @staticmethod
+    def _workout_prompt(context: dict, exercises: list) -> tuple[str, list]:
         exercise_lines = [
-            f"- {ex.title} | Grupo: {ex.muscle_group or 'General'} | Nivel: {ex.level}"
-            for ex in exercises[:120]
+            exercise_line(ex) for ex in select_prompt_exercises(context, exercises)
         ]
         focus_hint = context.get("focus_muscle")
         days_hint = context.get("days_per_week")
@@ -114,14 +201,10 @@ class DeepSeekService:
             "\n\nEjercicios disponibles (usa el nombre exacto):"
             "\n" + "\n".join(exercise_lines)
         )
-        return DeepSeekService._call_deepseek(
-            prompt,
-            temperature=0.25,
-            max_tokens=900,
-        )
+        return prompt, exercise_lines
 
     @staticmethod
-    def generate_diet(context: dict) -> str:
+    def generate_diet(context: dict, *, use_cache: bool = True) -> str:
         restrictions = context.get("diet_notes")
         calories = context.get("diet_calories")
         prompt = (
@@ -142,4 +225,4 @@ class DeepSeekService:
             "Sabado:\n- Desayuno: ...\n- Comida: ...\n- Cena: ...\n- Snack: ...\n\n"
             "Domingo:\n- Desayuno: ...\n- Comida: ...\n- Cena: ...\n- Snack: ...\n"
         )
-        return DeepSeekService._call_deepseek(prompt)
+        return DeepSeekService._call_deepseek(prompt, use_cache=use_cache)
@@ -0,0 +1,153 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+
+from catalog.normalize import normalize_title, title_tokens
+
+# Rough chars-per-token ratio for Spanish text with the DeepSeek tokenizer.
+CHARS_PER_TOKEN = 4
+
+LEVEL_RANKS = {
+    "beginner": 0,
+    "principiante": 0,
+    "intermediate": 1,
+    "intermedio": 1,
+    "advanced": 2,
+    "avanzado": 2,
+}
+
+# Focus options of the coach form mapped to the muscle groups they cover.
+FOCUS_GROUPS = {
+    "pecho": ("pecho", "pectoral"),
+    "espalda": ("espalda", "dorsal", "lumbar"),
+    "piernas": ("pierna", "cuadricep", "femoral", "gluteo", "pantorrilla"),
+    "hombro": ("hombro", "deltoide"),
+    "biceps": ("bicep", "brazo"),
+    "triceps": ("tricep", "brazo"),
+    "core": ("core", "abdomen", "abdominal", "oblicuo"),
+    "cardio": ("cardio", "fullbody", "cuerpocompleto"),
+}
+
+BODYWEIGHT = frozenset({"", "ninguno", "ninguna", "pesocorporal", "sinequipo", "bodyweight"})
+HOME_HINTS = ("sinequipo", "encasa", "pesocorporal")
+HOME_EQUIPMENT = frozenset({"mancuerna", "mancuernas", "banda", "bandas", "liga", "ligas", "tapete"})
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound token estimate; good enough to budget prompt sections."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def exercise_line(exercise) -> str:
+    return f"- {exercise.title} | Grupo: {exercise.muscle_group or 'General'} | Nivel: {exercise.level}"
+
+
+def _level_rank(value):
+    return LEVEL_RANKS.get(normalize_title(value))
+
+
+def _focus_keys(focus):
+    key = normalize_title(focus)
+    if not key:
+        return ()
+    return FOCUS_GROUPS.get(key, (key,))
+
+
+def _available_equipment(context):
+    """Equipment tokens the student has, or None when unrestricted."""
+    declared = context.get("equipment")
+    if declared:
+        if isinstance(declared, str):
+            declared = [declared]
+        return {token for item in declared for token in title_tokens(item)}
+    notes = normalize_title(context.get("ai_notes"))
+    if any(hint in notes for hint in HOME_HINTS):
+        return set(HOME_EQUIPMENT)
+    return None
+
+
+def score_exercise(exercise, student_level, focus_keys, equipment) -> int:
+    score = 0
+
+    level = _level_rank(exercise.level)
+    if student_level is not None and level is not None:
+        distance = level - student_level
+        if distance == 0:
+            score += 3
+        elif abs(distance) == 1:
+            score += 1
+        elif distance > 1:
+            score -= 3
+
+    group = normalize_title(exercise.muscle_group)
+    if focus_keys and any(key in group for key in focus_keys):
+        score += 4
+
+    if equipment is not None:
+        needed = normalize_title(exercise.equipment)
+        if needed in BODYWEIGHT:
+            score += 2
+        elif set(title_tokens(exercise.equipment)) <= equipment:
+            score += 1
+        else:
+            score -= 4
+
+    return score
+
+
+def select_prompt_exercises(context: dict, exercises, budget_tokens: int | None = None) -> list:
+    """
+    Pick the catalog entries worth showing the model for this student.
+    Exercises are scored by level, focus and equipment, then taken round-robin
+    across muscle groups (focus groups twice per round) so every group stays
+    represented, until the estimated token budget is spent. The result is sorted
+    by group and title so equal inputs give byte-identical prompts.
+    """
+    if budget_tokens is None:
+        budget_tokens = settings.DEEPSEEK_PROMPT_CATALOG_TOKENS
+
+    student_level = _level_rank(context.get("level"))
+    focus_keys = _focus_keys(context.get("focus_muscle"))
+    equipment = _available_equipment(context)
+
+    scored = [
+        (score_exercise(exercise, student_level, focus_keys, equipment), exercise)
+        for exercise in exercises
+    ]
+    # Too-advanced or unavailable-equipment entries only stay if nothing else fits.
+    if any(score >= 0 for score, _ in scored):
+        scored = [item for item in scored if item[0] >= 0]
+
+    groups = defaultdict(list)
+    for score, exercise in scored:
+        groups[normalize_title(exercise.muscle_group)].append((score, exercise))
+
+    queues = []
+    for group, items in groups.items():
+        # Best candidate last so pop() is cheap.
+        items.sort(key=lambda item: (-item[0], item[1].title, item[1].id))
+        items.reverse()
+        is_focus = bool(focus_keys) and any(key in group for key in focus_keys)
+        queues.append((not is_focus, -items[-1][0], group, is_focus, items))
+    queues.sort(key=lambda queue: queue[:3])
+
+    selected = []
+    spent = 0
+    exhausted = False
+    while not exhausted:
+        exhausted = True
+        for *_, is_focus, items in queues:
+            for _ in range(2 if is_focus else 1):
+                if not items:
+                    break
+                exhausted = False
+                _, exercise = items.pop()
+                cost = estimate_tokens(exercise_line(exercise)) + 1
+                if spent + cost > budget_tokens:
+                    continue
+                selected.append(exercise)
+                spent += cost
+
+    selected.sort(key=lambda ex: (normalize_title(ex.muscle_group), ex.title, ex.id))
+    return selected
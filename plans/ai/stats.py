@@ -0,0 +1,129 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from plans.models import GenerationJob
+
+# Stages in pipeline order (see plans/ai/async_tasks.py and deepseek.py).
+# "ai_call" wraps prompt_build..cache_store, so stage times are not additive.
+STAGE_ORDER = (
+    "catalog_load",
+    "ai_call",
+    "prompt_build",
+    "cache_lookup",
+    "deepseek_request",
+    "backoff",
+    "cache_store",
+    "parse",
+    "resolve",
+    "fallback",
+    "save",
+)
+
+FINISHED_STATUSES = (GenerationJob.STATUS_DONE, GenerationJob.STATUS_ERROR)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _latency(values) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+    }
+
+
+def _rate(part, total):
+    return round(part / total, 4) if total else None
+
+
+def generation_stats(jobs, days: int) -> dict:
+    """
+    Latency percentiles per stage, fallback rate, token usage and a daily
+    series over the jobs of `jobs` finished in the last `days` days.
+    A stage seen several times in one job (retries) counts once, summed.
+    """
+    since = timezone.now() - timedelta(days=days)
+    rows = jobs.filter(
+        status__in=FINISHED_STATUSES,
+        finished_at__gte=since,
+    ).values_list(
+        'finished_at',
+        'status',
+        'duration_ms',
+        'trace',
+        'fallback_used',
+        'cache_hit',
+        'http_attempts',
+        'prompt_tokens',
+        'completion_tokens',
+    )
+
+    durations = []
+    stages = defaultdict(list)
+    daily = defaultdict(lambda: {"jobs": 0, "fallbacks": 0, "durations": []})
+    errors = fallbacks = cache_hits = attempts = 0
+    prompt_tokens = completion_tokens = 0
+
+    for (finished_at, status, duration_ms, trace, fallback_used, cache_hit,
+         http_attempts, job_prompt_tokens, job_completion_tokens) in rows:
+        per_stage = defaultdict(float)
+        for entry in trace or ():
+            per_stage[entry["stage"]] += entry["ms"]
+        for stage, ms in per_stage.items():
+            stages[stage].append(round(ms, 1))
+
+        day = daily[finished_at.date()]
+        day["jobs"] += 1
+        if duration_ms is not None:
+            durations.append(duration_ms)
+            day["durations"].append(duration_ms)
+        if fallback_used:
+            fallbacks += 1
+            day["fallbacks"] += 1
+        errors += status == GenerationJob.STATUS_ERROR
+        cache_hits += cache_hit
+        attempts += http_attempts
+        prompt_tokens += job_prompt_tokens or 0
+        completion_tokens += job_completion_tokens or 0
+
+    total = sum(day["jobs"] for day in daily.values())
+    ordered_stages = sorted(
+        stages,
+        key=lambda stage: (STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER), stage),
+    )
+    return {
+        "since": since,
+        "days": days,
+        "jobs": total,
+        "errors": errors,
+        "fallback_rate": _rate(fallbacks, total),
+        "cache_hit_rate": _rate(cache_hits, total),
+        "http_attempts_avg": round(attempts / total, 2) if total else None,
+        "duration": _latency(durations),
+        "stages": {stage: _latency(stages[stage]) for stage in ordered_stages},
+        "tokens": {
+            "prompt": prompt_tokens,
+            "completion": completion_tokens,
+            "per_job": round((prompt_tokens + completion_tokens) / total, 1) if total else None,
+        },
+        "daily": [
+            {
+                "date": date,
+                "jobs": day["jobs"],
+                "fallback_rate": _rate(day["fallbacks"], day["jobs"]),
+                "p50_ms": percentile(day["durations"], 50),
+                "p95_ms": percentile(day["durations"], 95),
+            }
+            for date, day in sorted(daily.items())
+        ],
+    }
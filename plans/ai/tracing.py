@@ -0,0 +1,96 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("generation_trace", default=None)
+
+
+class GenerationTrace:
+    """
+    Stage timings and DeepSeek accounting for one generation job.
+    Filled through the module functions below, which are no-ops when no trace
+    is active (e.g. local-mode generation inside a web request).
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.http_attempts = 0
+        self.http_status = None
+        self.cache_hit = False
+        self.fallback_used = False
+        self.missing_count = 0
+        self._started = time.perf_counter()
+
+    def elapsed_ms(self) -> int:
+        return round((time.perf_counter() - self._started) * 1000)
+
+    def as_fields(self) -> dict:
+        """GenerationJob column values for this trace."""
+        return {
+            "trace": self.spans,
+            "duration_ms": self.elapsed_ms(),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "http_attempts": self.http_attempts,
+            "http_status": self.http_status,
+            "cache_hit": self.cache_hit,
+            "fallback_used": self.fallback_used,
+            "missing_count": self.missing_count,
+        }
+
+
+@contextmanager
+def start_trace():
+    trace = GenerationTrace()
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a pipeline stage; failed stages are kept with ok=False."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        trace.spans.append({
+            "stage": stage,
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "ok": ok,
+        })
+
+
+def record(**fields) -> None:
+    trace = _current.get()
+    if trace is None:
+        return
+    for name, value in fields.items():
+        setattr(trace, name, value)
+
+
+def record_usage(usage: dict | None) -> None:
+    """Add the `usage` block of a chat completion (several calls accumulate)."""
+    trace = _current.get()
+    if trace is None or not usage:
+        return
+    for name in ("prompt_tokens", "completion_tokens"):
+        value = usage.get(name)
+        if isinstance(value, int):
+            setattr(trace, name, (getattr(trace, name) or 0) + value)
+
+
+def record_attempt() -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.http_attempts += 1
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PlansConfig(AppConfig):
     name = 'plans'
+
+    def ready(self):
+        from . import signals  # noqa: F401
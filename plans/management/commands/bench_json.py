@@ -0,0 +1,120 @@
+import io
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from backend.parsers import FastJSONParser
+from backend.renderers import FastJSONRenderer, orjson
+from catalog.models import VisualResource
+from catalog.serializers import VisualResourceSerializer
+from plans.models import Diet, Week, Workout
+from plans.serializers import WeekStatusSerializer
+from plans.snapshots import refresh_plan_snapshot
+from plans.views import _with_plan_status
+from students.models import Student
+
+
+def _timed(func, iterations):
+    """Median and best microseconds per call."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return round(statistics.median(samples), 1), round(min(samples), 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el JSONRenderer/JSONParser de DRF con los de orjson (backend/renderers.py) "
+        "sobre payloads reales: plan semanal, estado de semana, catalogo completo y filas con "
+        "Decimal/datetime. Verifica que la salida sea identica byte a byte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--students", type=int, default=500, help="Filas del payload con Decimal/datetime.")
+        parser.add_argument("--output", help="Archivo donde guardar el resultado JSON.")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write("orjson no esta instalado: ambos renderers usan json de la stdlib.")
+        iterations = max(1, options["iterations"])
+        payloads = self._payloads(options["students"])
+
+        stdlib_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        stdlib_parser, fast_parser = JSONParser(), FastJSONParser()
+        results = {}
+        mismatches = []
+        for name, data in payloads.items():
+            expected = stdlib_renderer.render(data)
+            if fast_renderer.render(data) != expected:
+                mismatches.append(name)
+            render_stdlib = _timed(lambda: stdlib_renderer.render(data), iterations)
+            render_fast = _timed(lambda: fast_renderer.render(data), iterations)
+            parse_stdlib = _timed(lambda: stdlib_parser.parse(io.BytesIO(expected)), iterations)
+            parse_fast = _timed(lambda: fast_parser.parse(io.BytesIO(expected)), iterations)
+            results[name] = {
+                "bytes": len(expected),
+                "identical": name not in mismatches,
+                "render_stdlib_us": render_stdlib[0],
+                "render_fast_us": render_fast[0],
+                "render_speedup": round(render_stdlib[0] / render_fast[0], 2) if render_fast[0] else None,
+                "parse_stdlib_us": parse_stdlib[0],
+                "parse_fast_us": parse_fast[0],
+                "parse_speedup": round(parse_stdlib[0] / parse_fast[0], 2) if parse_fast[0] else None,
+            }
+            row = results[name]
+            self.stdout.write(
+                f"{name:<14} {row['bytes']:>9} B  render {row['render_stdlib_us']:>9} -> "
+                f"{row['render_fast_us']:>8} us (x{row['render_speedup']})  parse "
+                f"{row['parse_stdlib_us']:>9} -> {row['parse_fast_us']:>8} us (x{row['parse_speedup']})  "
+                f"{'identico' if row['identical'] else 'DISTINTO'}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump({"iterations": iterations, "results": results}, fh, indent=2, sort_keys=True)
+                fh.write("\n")
+            self.stdout.write(f"Resultado guardado en {options['output']}")
+        if mismatches:
+            raise CommandError(f"Salida distinta al JSONRenderer de DRF en: {', '.join(mismatches)}")
+
+    def _payloads(self, students):
+        workout = (
+            Workout.objects.annotate(total=Count("days__exercises"))
+            .order_by("-total", "-id")
+            .first()
+        )
+        if workout is None:
+            raise CommandError("No hay rutinas; genera datos con seed_scale.")
+        plan = refresh_plan_snapshot(workout.id, persist=False)
+
+        # The PlanStatusView detail payload for the same week.
+        week = _with_plan_status(Week.objects.filter(id=workout.week_id)).first()
+        status = dict(WeekStatusSerializer(week).data)
+        status["workout_content"] = plan.get("content")
+        status["workout_plan"] = plan.get("plan")
+        status["diet_content"] = Diet.objects.filter(week=week).values_list("content", flat=True).first()
+
+        catalog = VisualResourceSerializer(
+            VisualResource.objects.select_related("created_by").order_by("-created_at", "-id"),
+            many=True,
+        ).data
+        # Raw values() rows: Decimal weight_kg and aware datetimes go through the encoder hook.
+        raw_students = list(
+            Student.objects.order_by("id").values(
+                "id", "user__username", "age", "height_cm", "weight_kg", "objective", "level", "created_at",
+            )[:students]
+        )
+        return {
+            "workouts_me": plan,
+            "plan_status": status,
+            "catalog": {"next": None, "results": catalog},
+            "students_raw": {"results": raw_students},
+        }
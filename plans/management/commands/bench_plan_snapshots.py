@@ -0,0 +1,87 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from plans.models import Workout
+from plans.snapshots import _prefetched, build_plan_snapshot, plan_snapshots
+
+
+def _serializer_snapshots(workout_ids):
+    """The previous path; small chunks keep the prefetch IN lists within SQLite's limits."""
+    workouts = _prefetched(Workout.objects.filter(id__in=workout_ids).order_by("id"))
+    return {workout.id: build_plan_snapshot(workout) for workout in workouts.iterator(chunk_size=50)}
+
+
+def _measure(func, iterations):
+    """Median/best milliseconds per call and the queries of one call."""
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "best_ms": round(min(samples), 3),
+        "queries": len(ctx.captured_queries),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el snapshot de rutina armado con WorkoutMeSerializer contra el armado con "
+        "values() (plans/snapshots.py plan_snapshots): verifica que el JSON sea identico y mide "
+        "el tiempo de una rutina (workouts/me) y de un lote (rebuild_plan_snapshots)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workouts", type=int, default=200, help="Rutinas comparadas y reconstruidas en lote.")
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        # Largest plans first, plus whatever has no days at all.
+        ids = list(
+            Workout.objects.annotate(total=Count("days__exercises"))
+            .order_by("-total", "-id")
+            .values_list("id", flat=True)[:max(1, options["workouts"])]
+        )
+        if not ids:
+            raise CommandError("No hay rutinas; genera datos con seed_scale.")
+        ids += list(Workout.objects.filter(days__isnull=True).values_list("id", flat=True)[:5])
+
+        expected = _serializer_snapshots(ids)
+        actual = plan_snapshots(ids)
+        renderer = JSONRenderer()
+        mismatches = [
+            workout_id for workout_id in ids
+            if renderer.render(expected.get(workout_id)) != renderer.render(actual.get(workout_id))
+        ]
+        self.stdout.write(f"Paridad: {len(ids) - len(mismatches)}/{len(ids)} rutinas identicas")
+
+        largest = ids[0]
+        exercises = sum(len(day["exercises"]) for day in actual[largest]["plan"])
+        single_old = _measure(lambda: _serializer_snapshots([largest]), iterations)
+        single_new = _measure(lambda: plan_snapshots([largest]), iterations)
+        batch_iterations = max(1, iterations // 10)
+        batch_old = _measure(lambda: _serializer_snapshots(ids), batch_iterations)
+        batch_new = _measure(lambda: plan_snapshots(ids), batch_iterations)
+
+        for label, old, new in (
+            (f"1 rutina ({exercises} ejercicios)", single_old, single_new),
+            (f"{len(ids)} rutinas", batch_old, batch_new),
+        ):
+            self.stdout.write(
+                f"{label:<28} serializer {old['median_ms']:>9} ms / {old['queries']} queries  ->  "
+                f"values {new['median_ms']:>9} ms / {new['queries']} queries  "
+                f"(x{round(old['median_ms'] / new['median_ms'], 2) if new['median_ms'] else '-'})"
+            )
+
+        if mismatches:
+            raise CommandError(f"Snapshots distintos para las rutinas: {mismatches[:20]}")
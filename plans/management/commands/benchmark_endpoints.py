@@ -0,0 +1,292 @@
+import json
+import math
+import statistics
+import time
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from catalog.models import VisualResource
+from plans.models import Diet, GenerationBatch, Week, Workout, WorkoutExercise
+from students.models import Student
+
+# (URL prefix in backend/urls.py, urlconf module) of the routes that must be covered.
+URLCONFS = (
+    ("api/accounts/", "accounts.urls"),
+    ("api/students/", "students.urls"),
+    ("api/plans/", "plans.urls"),
+    ("api/catalog/", "catalog.urls"),
+)
+
+# Writes may enqueue AI jobs; admission limits would turn repeated iterations into 429s.
+UNLIMITED_ADMISSION = {
+    "GENERATION_COACH_RATE_PER_MINUTE": 10 ** 6,
+    "GENERATION_COACH_BURST": 10 ** 6,
+    "GENERATION_GLOBAL_RATE_PER_MINUTE": 10 ** 6,
+    "GENERATION_GLOBAL_BURST": 10 ** 6,
+    "GENERATION_COACH_MAX_IN_FLIGHT": 10 ** 6,
+    "GENERATION_BULK_COACH_RATE_PER_MINUTE": 10 ** 6,
+    "GENERATION_BULK_COACH_BURST": 10 ** 6,
+    "GENERATION_COACH_MAX_QUEUED": 10 ** 6,
+    "GENERATION_MAX_QUEUE_DEPTH": 10 ** 6,
+}
+
+
+class Case:
+    """One request shape: `data` may be a callable of the iteration number."""
+
+    def __init__(self, name, method, route, path, role=None, data=None):
+        self.name = name
+        self.method = method
+        self.route = route
+        self.path = path
+        self.role = role
+        self.data = data
+
+    def payload(self, iteration):
+        data = self.data(iteration) if callable(self.data) else self.data
+        return json.dumps(data) if data is not None else None
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(q / 100 * len(ordered))) - 1]
+
+
+def _routes():
+    for prefix, module in URLCONFS:
+        for pattern in import_module(module).urlpatterns:
+            yield prefix + str(pattern.pattern)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide p50/p95, numero de queries y bytes de cada endpoint de accounts, students, "
+        "plans y catalog con el cliente de pruebas y escribe un baseline JSON. "
+        "Todo corre en una transaccion que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--coach", help="Username del coach (por defecto el que tiene mas alumnos).")
+        parser.add_argument("--output", help="Archivo donde guardar el JSON (por defecto stdout).")
+        parser.add_argument("--compare", help="Baseline JSON previo contra el que mostrar diferencias.")
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        fixtures_started = time.monotonic()
+
+        with transaction.atomic(), override_settings(**UNLIMITED_ADMISSION):
+            fixtures = self._fixtures(options["coach"])
+            cases = self._cases(fixtures)
+            clients = {
+                role: self._client(user)
+                for role, user in (("root", fixtures["root"]), ("coach", fixtures["coach"]),
+                                   ("student", fixtures["student"].user), (None, None))
+            }
+            results = {}
+            for case in cases:
+                results[case.name] = self._measure(clients[case.role], case, iterations)
+                self.stderr.write(
+                    f"{case.name:<28} p50 {results[case.name]['p50_ms']:>8} ms  "
+                    f"queries {results[case.name]['queries']:>3}  status {results[case.name]['status']}"
+                )
+            transaction.set_rollback(True)
+
+        covered = {case.route for case in cases}
+        report = {
+            "meta": {
+                "generated_at": timezone.now().isoformat(),
+                "db_vendor": connection.vendor,
+                "iterations": iterations,
+                "rows": {
+                    "students": Student.objects.count(),
+                    "weeks": Week.objects.count(),
+                    "workouts": Workout.objects.count(),
+                    "workout_exercises": WorkoutExercise.objects.count(),
+                    "diets": Diet.objects.count(),
+                    "catalog": VisualResource.objects.count(),
+                },
+                "coach_students": fixtures["coach_students"],
+                "uncovered_routes": sorted(set(_routes()) - covered),
+                "seconds": round(time.monotonic() - fixtures_started, 1),
+            },
+            "results": results,
+        }
+
+        encoded = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(encoded + "\n")
+            self.stderr.write(f"Baseline guardado en {options['output']}")
+        else:
+            self.stdout.write(encoded)
+
+        if options["compare"]:
+            self._compare(options["compare"], results)
+
+    def _client(self, user):
+        if user is None:
+            return Client(HTTP_HOST="localhost")
+        token = str(RefreshToken.for_user(user).access_token)
+        return Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def _fixtures(self, coach_username):
+        root = User.objects.filter(role="ROOT").order_by("id").first()
+        coaches = User.objects.filter(role="ADMIN")
+        if coach_username:
+            coaches = coaches.filter(username=coach_username)
+        coach = coaches.annotate(total=Count("students")).order_by("-total", "id").first()
+        if root is None or coach is None:
+            raise CommandError("Se necesita un usuario ROOT y un coach ADMIN (ver seed_scale).")
+
+        # A student whose active week has both plans, so the read endpoints return content.
+        student = (
+            Student.objects.filter(coach=coach)
+            .annotate(
+                planned=Exists(Week.objects.filter(
+                    student=OuterRef("pk"),
+                    is_active=True,
+                    workout__isnull=False,
+                    diet__isnull=False,
+                ))
+            )
+            .order_by("-planned", "id")
+            .select_related("user")
+            .first()
+        )
+        if student is None:
+            raise CommandError(f"El coach {coach.username} no tiene alumnos.")
+        week = Week.objects.filter(student=student).order_by("-is_active", "-created_at").first()
+        if week is None:
+            raise CommandError(f"El alumno {student.user.username} no tiene semanas.")
+        video = VisualResource.objects.filter(is_public=True).order_by("id").first()
+        if video is None:
+            raise CommandError("El catalogo esta vacio.")
+        batch = GenerationBatch.objects.create(created_by=coach)
+
+        return {
+            "root": root,
+            "coach": coach,
+            "coach_students": coach.total,
+            "student": student,
+            "week": week,
+            "video": video,
+            "batch": batch,
+        }
+
+    def _cases(self, fx):
+        student, week, video = fx["student"], fx["week"], fx["video"]
+        stamp = int(time.time())
+        plan = [{"day": "Lunes", "exercises": [{"exercise_id": video.id, "sets": 3, "reps": "10-12"}]}]
+        return [
+            # Reads first, so the writes below do not change what they see.
+            Case("accounts_me", "GET", "api/accounts/me/", "/api/accounts/me/", "coach"),
+            Case("accounts_root_test", "GET", "api/accounts/root-test/", "/api/accounts/root-test/", "root"),
+            Case("accounts_admin_test", "GET", "api/accounts/admin-test/", "/api/accounts/admin-test/", "coach"),
+            Case("students_list", "GET", "api/students/", "/api/students/", "coach"),
+            Case("students_me", "GET", "api/students/me/", "/api/students/me/", "student"),
+            Case("students_summary", "GET", "api/students/summary/", "/api/students/summary/", "coach"),
+            Case("students_detail", "GET", "api/students/<int:pk>/", f"/api/students/{student.id}/", "coach"),
+            Case("catalog_list", "GET", "api/catalog/videos/", "/api/catalog/videos/"),
+            Case("catalog_search", "GET", "api/catalog/videos/", "/api/catalog/videos/?q=press%20banca"),
+            Case("catalog_detail", "GET", "api/catalog/videos/<int:pk>/", f"/api/catalog/videos/{video.id}/"),
+            Case("weeks_active", "GET", "api/plans/weeks/active/", "/api/plans/weeks/active/", "student"),
+            Case("workouts_me", "GET", "api/plans/workouts/me/", "/api/plans/workouts/me/", "student"),
+            Case("diets_me", "GET", "api/plans/diets/me/", "/api/plans/diets/me/", "student"),
+            Case("status_list", "GET", "api/plans/status/", "/api/plans/status/", "coach"),
+            Case("status_week", "GET", "api/plans/status/", f"/api/plans/status/?week_id={week.id}", "coach"),
+            Case("status_wait", "GET", "api/plans/status/wait/",
+                 f"/api/plans/status/wait/?week_id={week.id}&timeout=0", "coach"),
+            Case("status_active", "GET", "api/plans/status/active/",
+                 f"/api/plans/status/active/?student_id={student.id}", "coach"),
+            Case("bulk_status", "GET", "api/plans/bulk/<int:pk>/", f"/api/plans/bulk/{fx['batch'].id}/", "coach"),
+            Case("generation_stats", "GET", "api/plans/generation/stats/", "/api/plans/generation/stats/", "coach"),
+            # Writes; the surrounding transaction is rolled back at the end.
+            Case("accounts_admin_create", "POST", "api/accounts/admin/create/", "/api/accounts/admin/create/",
+                 "root", lambda i: {"username": f"bench_admin_{stamp}_{i}", "password": "bench-pass-123"}),
+            Case("students_create", "POST", "api/students/", "/api/students/", "coach",
+                 lambda i: {"username": f"bench_student_{stamp}_{i}", "password": "bench-pass-123", "age": 30,
+                            "height_cm": 175, "weight_kg": "75.00", "objective": "Fuerza", "level": "intermedio"}),
+            Case("students_update", "PATCH", "api/students/<int:pk>/", f"/api/students/{student.id}/",
+                 "coach", {"objective": "Volumen"}),
+            Case("catalog_create", "POST", "api/catalog/videos/", "/api/catalog/videos/", "root",
+                 lambda i: {"title": f"Bench ejercicio {stamp} {i}", "video_url": "https://videos.example.com/b.mp4",
+                            "muscle_group": "Pecho", "level": "BEGINNER"}),
+            Case("catalog_update", "PATCH", "api/catalog/videos/<int:pk>/", f"/api/catalog/videos/{video.id}/",
+                 "root", {"description": "Actualizado por benchmark_endpoints"}),
+            Case("workouts_create", "POST", "api/plans/workouts/", "/api/plans/workouts/", "coach",
+                 {"week_id": week.id, "plan": plan}),
+            Case("workouts_ai_local", "POST", "api/plans/workouts/ai/", "/api/plans/workouts/ai/", "coach",
+                 {"week_id": week.id, "mode": "local"}),
+            Case("workouts_ai_queue", "POST", "api/plans/workouts/ai/", "/api/plans/workouts/ai/", "coach",
+                 {"week_id": week.id, "regenerate": True}),
+            Case("diets_create", "POST", "api/plans/diets/", "/api/plans/diets/", "coach",
+                 {"week_id": week.id, "content": "Lunes:\n- Desayuno: avena"}),
+            Case("diets_ai_local", "POST", "api/plans/diets/ai/", "/api/plans/diets/ai/", "coach",
+                 {"week_id": week.id, "mode": "local", "regenerate": True}),
+            Case("bulk_create", "POST", "api/plans/bulk/", "/api/plans/bulk/", "coach",
+                 {"week_ids": [week.id], "regenerate": True}),
+            Case("weeks_create", "POST", "api/plans/weeks/", "/api/plans/weeks/", "coach",
+                 {"student": student.id, "start_date": str(week.start_date), "end_date": str(week.end_date)}),
+        ]
+
+    def _measure(self, client, case, iterations):
+        timings, queries, sizes, statuses = [], [], [], set()
+        cold_ms = None
+        # The first request fills caches and snapshots; it is reported apart.
+        for iteration in range(iterations + 1):
+            payload = case.payload(iteration)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                if payload is None:
+                    response = client.generic(case.method, case.path)
+                else:
+                    response = client.generic(case.method, case.path, payload, content_type="application/json")
+                elapsed = (time.perf_counter() - started) * 1000
+            if iteration == 0:
+                cold_ms = round(elapsed, 2)
+                continue
+            timings.append(elapsed)
+            queries.append(len(captured.captured_queries))
+            sizes.append(len(response.content))
+            statuses.add(response.status_code)
+
+        return {
+            "method": case.method,
+            "route": case.route,
+            "path": case.path,
+            "status": sorted(statuses),
+            "cold_ms": cold_ms,
+            "p50_ms": round(_percentile(timings, 50), 2),
+            "p95_ms": round(_percentile(timings, 95), 2),
+            "queries": int(statistics.median(queries)),
+            "queries_max": max(queries),
+            "bytes": int(statistics.median(sizes)),
+        }
+
+    def _compare(self, path, results):
+        with open(path, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+        self.stderr.write(f"\nComparacion con {path}:")
+        for name, current in results.items():
+            before = baseline.get(name)
+            if before is None:
+                self.stderr.write(f"{name:<28} nuevo")
+                continue
+            change = (current["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+            line = f"{name:<28} p50 {before['p50_ms']:>8} -> {current['p50_ms']:>8} ms ({change:+.0f}%)"
+            if current["queries"] != before["queries"]:
+                line += f"  queries {before['queries']} -> {current['queries']}"
+            if current["bytes"] != before["bytes"]:
+                line += f"  bytes {before['bytes']} -> {current['bytes']}"
+            self.stderr.write(line)
+        for name in sorted(set(baseline) - set(results)):
+            self.stderr.write(f"{name:<28} eliminado")
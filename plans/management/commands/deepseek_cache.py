@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from plans.ai import cache as response_cache
+
+
+class Command(BaseCommand):
+    help = "Muestra estadisticas de la cache de respuestas DeepSeek o la vacia."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Elimina todas las entradas.")
+        parser.add_argument("--evict", action="store_true", help="Aplica TTL y limite LRU ahora.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            self.stdout.write(f"Entradas eliminadas: {response_cache.clear()}")
+        elif options["evict"]:
+            self.stdout.write(f"Entradas desalojadas: {response_cache.evict()}")
+
+        for name, value in response_cache.stats().items():
+            self.stdout.write(f"{name}: {value}")
@@ -0,0 +1,266 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from plans.ai.deepseek import DEEPSEEK_API_PATH
+
+DAY_NAMES = ("Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo")
+MEALS = ("Desayuno", "Comida", "Cena", "Snack")
+# "- <title> | Grupo: <group> | Nivel: <level>" (plans/ai/prompting.py exercise_line)
+EXERCISE_LINE = re.compile(r"^- (?P<title>.+?) \| Grupo: (?P<group>.+?) \| Nivel: ", re.MULTILINE)
+DAYS_HINT = re.compile(r"Dias por semana: (\d+)")
+
+
+class StubConfig:
+    """Fault and latency knobs shared by every handler thread."""
+
+    def __init__(self, options):
+        self.latency = options["latency"]
+        self.latency_ms = max(0.0, options["latency_ms"])
+        self.latency_spread = max(0.0, options["latency_spread"])
+        self.error_rate = options["error_rate"]
+        self.error_statuses = options["error_statuses"]
+        self.timeout_rate = options["timeout_rate"]
+        self.timeout_seconds = options["timeout_seconds"]
+        self.truncate_rate = options["truncate_rate"]
+        self.unknown_rate = options["unknown_rate"]
+        self.exercises_per_day = max(1, options["exercises_per_day"])
+        self.verbose = options["verbosity"] > 1
+        self._rng = random.Random(options["seed"])
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def rng(self):
+        """Per-request generator, so handler threads never share one."""
+        with self._lock:
+            return random.Random(self._rng.getrandbits(64))
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def delay(self, rng):
+        """Seconds to wait before answering, drawn from the configured distribution."""
+        median = self.latency_ms / 1000
+        if self.latency == "fixed" or not median:
+            return median
+        if self.latency == "uniform":
+            return max(0.0, rng.uniform(median * (1 - self.latency_spread), median * (1 + self.latency_spread)))
+        if self.latency == "exponential":
+            return rng.expovariate(1 / median)
+        # lognormal: latency_ms is the median, latency_spread the sigma (long right tail).
+        return rng.lognormvariate(0, self.latency_spread) * median
+
+
+def _canned_workout(prompt, config, rng):
+    """Weekly plan in the JSON shape the prompt asks for, using its listed exercises."""
+    exercises = [(match["title"], match["group"]) for match in EXERCISE_LINE.finditer(prompt)]
+    days_hint = DAYS_HINT.search(prompt)
+    days = min(6, max(1, int(days_hint.group(1)))) if days_hint else 4
+
+    if not exercises:
+        exercises = [("Sentadilla", "Piernas"), ("Press banca", "Pecho"), ("Remo", "Espalda")]
+    by_group = {}
+    for title, group in exercises:
+        by_group.setdefault(group, []).append(title)
+    groups = sorted(by_group)
+
+    week = []
+    for index in range(days):
+        # Two muscle groups per day, rotating through the ones in the prompt.
+        day_groups = [groups[(index * 2 + offset) % len(groups)] for offset in range(min(2, len(groups)))]
+        pool = [title for group in day_groups for title in by_group[group]]
+        chosen = rng.sample(pool, min(config.exercises_per_day, len(pool)))
+        items = []
+        for title in chosen:
+            if rng.random() < config.unknown_rate:
+                title = f"{title} variante stub"
+            items.append({
+                "name": title,
+                "sets": rng.choice((3, 4, 5)),
+                "reps": rng.choice(("6-8", "8-10", "10-12", "12-15")),
+            })
+        week.append({"day": DAY_NAMES[index], "exercises": items})
+    return json.dumps({"week": week}, ensure_ascii=False)
+
+
+def _canned_diet(rng):
+    lines = []
+    for day in DAY_NAMES:
+        lines.append(f"{day}:")
+        lines.extend(f"- {meal}: plato stub de {rng.randrange(300, 800)} kcal" for meal in MEALS)
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self) -> StubConfig:
+        return self.server.config
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.config.snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path != DEEPSEEK_API_PATH:
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self.config.count("unauthorized")
+            self._send_json(401, {"error": {"message": "Authentication Fails", "type": "authentication_error"}})
+            return
+        try:
+            payload = json.loads(body)
+            prompt = payload["messages"][-1]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self.config.count("bad_request")
+            self._send_json(400, {"error": {"message": "Invalid request body", "type": "invalid_request_error"}})
+            return
+
+        config = self.config
+        rng = config.rng()
+        config.count("requests")
+
+        if rng.random() < config.timeout_rate:
+            # Longer than the client's read timeout: it gives up and retries.
+            config.count("timeouts")
+            time.sleep(config.timeout_seconds)
+        else:
+            time.sleep(config.delay(rng))
+
+        if config.error_statuses and rng.random() < config.error_rate:
+            status = rng.choice(config.error_statuses)
+            config.count(f"status_{status}")
+            headers = {"Retry-After": "1"} if status == 429 else {}
+            self._send_json(status, {"error": {"message": "Injected by deepseek_stub", "type": "server_error"}}, headers)
+            return
+
+        is_workout = "Ejercicios disponibles" in prompt
+        content = _canned_workout(prompt, config, rng) if is_workout else _canned_diet(rng)
+        finish_reason = "stop"
+        if rng.random() < config.truncate_rate:
+            config.count("truncated")
+            content = content[: len(content) // 2]
+            finish_reason = "length"
+        config.count("workouts" if is_workout else "diets")
+
+        self._send_json(200, {
+            "id": f"stub-{rng.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "deepseek-chat"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }],
+            # Rough 4-characters-per-token estimate, enough for the token accounting.
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        })
+
+    def _send_json(self, status, data, headers=None):
+        encoded = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(encoded)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(encoded)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out and closed the connection first.
+            pass
+
+    def log_message(self, format, *args):
+        if self.config.verbose:
+            super().log_message(format, *args)
+
+
+class Command(BaseCommand):
+    help = (
+        "Servidor local compatible con /v1/chat/completions de DeepSeek para pruebas de carga "
+        "sin coste: latencia configurable, errores, timeouts, JSON truncado y rutinas armadas "
+        "con los ejercicios del prompt. Usar con DEEPSEEK_BASE_URL=http://<host>:<port>."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8787)
+        parser.add_argument(
+            "--latency",
+            choices=("fixed", "uniform", "lognormal", "exponential"),
+            default="lognormal",
+            help="Distribucion de la latencia de respuesta.",
+        )
+        parser.add_argument("--latency-ms", type=float, default=1500, help="Mediana (media en exponential).")
+        parser.add_argument(
+            "--latency-spread",
+            type=float,
+            default=0.5,
+            help="Sigma en lognormal; fraccion +/- de la mediana en uniform.",
+        )
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraccion de respuestas con error HTTP.")
+        parser.add_argument(
+            "--error-statuses",
+            default="500,503,429",
+            help="Codigos HTTP de los errores inyectados, separados por comas.",
+        )
+        parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraccion de peticiones que no responden a tiempo.")
+        parser.add_argument("--timeout-seconds", type=float, default=75, help="Espera de las peticiones con timeout.")
+        parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraccion de respuestas con el contenido cortado.")
+        parser.add_argument(
+            "--unknown-rate",
+            type=float,
+            default=0.0,
+            help="Fraccion de ejercicios con un nombre que no existe en el catalogo.",
+        )
+        parser.add_argument("--exercises-per-day", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            options["error_statuses"] = [
+                int(code) for code in options["error_statuses"].split(",") if code.strip()
+            ]
+        except ValueError:
+            raise CommandError("--error-statuses debe ser una lista de codigos HTTP")
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), StubHandler)
+        server.daemon_threads = True
+        server.config = StubConfig(options)
+        host, port = server.server_address[:2]
+        self.stdout.write(
+            f"Stub DeepSeek en http://{host}:{port}{DEEPSEEK_API_PATH} "
+            f"(latencia {options['latency']} {options['latency_ms']:.0f} ms)"
+        )
+        self.stdout.write(f"Configura DEEPSEEK_BASE_URL=http://{host}:{port}; contadores en /stats")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Stub detenido: {json.dumps(server.config.snapshot(), sort_keys=True)}")
@@ -0,0 +1,302 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from plans.ai.stats import generation_stats, percentile
+from plans.models import GenerationJob, Week
+
+TERMINAL_STATUSES = (Week.STATUS_READY, Week.STATUS_ERROR)
+
+
+class WeekResult:
+    """Timings of one week pushed through generate -> status -> workouts/me."""
+
+    def __init__(self, coach, week_id):
+        self.coach = coach
+        self.week_id = week_id
+        self.outcome = None
+        self.job_id = None
+        self.attached = False
+        self.throttled = 0
+        self.polls = 0
+        self.post_ms = None
+        self.ready_s = None
+        self.me_ms = None
+        self.me_status = None
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class QueueSampler(threading.Thread):
+    """Samples queued/running generation jobs from the database at a fixed interval."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                counts = dict(
+                    GenerationJob.objects.filter(status__in=GenerationJob.ACTIVE_STATUSES)
+                    .values_list("status")
+                    .annotate(total=Count("id"))
+                )
+                self.samples.append((
+                    counts.get(GenerationJob.STATUS_QUEUED, 0),
+                    counts.get(GenerationJob.STATUS_RUNNING, 0),
+                ))
+                self._stop_event.wait(self.interval)
+        finally:
+            close_old_connections()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _ms(start):
+    return round((time.monotonic() - start) * 1000, 1)
+
+
+def _summary(values, digits=1) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": round(max(values), digits) if values else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga del flujo IA contra un servidor en marcha: varios coaches en paralelo "
+        "piden rutinas (workouts/ai/), esperan el estado (status/wait/) y el alumno lee la rutina "
+        "(workouts/me/). Reporta throughput, profundidad de cola y tiempo hasta ready. "
+        "Pensado para usarse con deepseek_stub y un worker de generacion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--coaches", type=int, default=5, help="Coaches concurrentes.")
+        parser.add_argument("--coach-prefix", default="", help="Solo coaches cuyo username empieza asi.")
+        parser.add_argument("--weeks-per-coach", type=int, default=10)
+        parser.add_argument("--mode", choices=("ai", "draft"), default="ai")
+        parser.add_argument(
+            "--use-cache",
+            action="store_true",
+            help="Permite respuestas de la cache DeepSeek (por defecto se envia no_cache).",
+        )
+        parser.add_argument("--think-ms", type=float, default=0, help="Pausa entre semanas de un coach.")
+        parser.add_argument("--wait-timeout", type=float, default=300, help="Segundos maximos hasta ready por semana.")
+        parser.add_argument("--sample-interval", type=float, default=1.0, help="Segundos entre muestras de la cola.")
+        parser.add_argument("--output", help="Archivo donde guardar el reporte JSON.")
+
+    def handle(self, *args, **options):
+        self.base_url = options["base_url"].rstrip("/")
+        self.options = options
+        plan = self._plan(options)
+        total_weeks = sum(len(weeks) for _, weeks in plan)
+        self.stdout.write(f"{len(plan)} coaches, {total_weeks} semanas contra {self.base_url}")
+
+        started_at = timezone.now()
+        started = time.monotonic()
+        sampler = QueueSampler(max(0.1, options["sample_interval"]))
+        sampler.start()
+        try:
+            with ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix="coach") as pool:
+                per_coach = list(pool.map(lambda item: self._run_coach(*item), plan))
+        finally:
+            sampler.stop()
+        elapsed = time.monotonic() - started
+
+        results = [result for coach_results in per_coach for result in coach_results]
+        report = self._report(results, sampler.samples, elapsed, started_at)
+        self._print(report)
+        if options["output"]:
+            report["weeks"] = [result.as_dict() for result in results]
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2, sort_keys=True, default=str)
+                fh.write("\n")
+            self.stdout.write(f"Reporte guardado en {options['output']}")
+
+    def _plan(self, options):
+        """[(coach, [(week_id, student_user), ...]), ...] of active weeks per coach."""
+        coaches = User.objects.filter(role="ADMIN")
+        if options["coach_prefix"]:
+            coaches = coaches.filter(username__startswith=options["coach_prefix"])
+        coaches = coaches.annotate(total=Count("students")).filter(total__gt=0).order_by("-total", "id")
+        coaches = list(coaches[:max(1, options["coaches"])])
+        if not coaches:
+            raise CommandError("No hay coaches con alumnos (ver seed_scale).")
+
+        plan = []
+        for coach in coaches:
+            weeks = list(
+                Week.objects.filter(student__coach=coach, is_active=True)
+                .select_related("student__user")
+                .order_by("id")[:max(1, options["weeks_per_coach"])]
+            )
+            if weeks:
+                plan.append((coach, [(week.id, week.student.user) for week in weeks]))
+        if not plan:
+            raise CommandError("Los coaches elegidos no tienen semanas activas.")
+        return plan
+
+    def _session(self, user):
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {RefreshToken.for_user(user).access_token}"
+        return session
+
+    def _run_coach(self, coach, weeks):
+        try:
+            coach_session = self._session(coach)
+            results = []
+            for index, (week_id, student_user) in enumerate(weeks):
+                if index and self.options["think_ms"]:
+                    time.sleep(self.options["think_ms"] / 1000)
+                result = WeekResult(coach.username, week_id)
+                try:
+                    self._run_week(coach_session, self._session(student_user), result)
+                except requests.RequestException as exc:
+                    result.outcome = f"request_error: {exc.__class__.__name__}"
+                results.append(result)
+            return results
+        finally:
+            close_old_connections()
+
+    def _run_week(self, coach_session, student_session, result):
+        options = self.options
+        started = time.monotonic()
+        deadline = started + options["wait_timeout"]
+        payload = {
+            "week_id": result.week_id,
+            "mode": options["mode"],
+            "no_cache": not options["use_cache"],
+        }
+
+        while True:
+            post_started = time.monotonic()
+            response = coach_session.post(f"{self.base_url}/api/plans/workouts/ai/", json=payload, timeout=30)
+            if response.status_code != 429:
+                break
+            # Admission control: honour Retry-After like a real client would.
+            result.throttled += 1
+            retry_after = float(response.headers.get("Retry-After") or 1)
+            if time.monotonic() + retry_after >= deadline:
+                result.outcome = "throttled"
+                return
+            time.sleep(retry_after)
+        result.post_ms = _ms(post_started)
+        if response.status_code >= 400:
+            result.outcome = f"http_{response.status_code}"
+            return
+        body = response.json()
+        result.job_id = body.get("job_id")
+        result.attached = bool(body.get("attached"))
+
+        etag = None
+        status = body.get("status")
+        while status not in TERMINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                result.outcome = "timeout"
+                return
+            headers = {"If-None-Match": etag} if etag else {}
+            response = coach_session.get(
+                f"{self.base_url}/api/plans/status/wait/",
+                params={"week_id": result.week_id, "timeout": min(remaining, 25)},
+                headers=headers,
+                timeout=40,
+            )
+            result.polls += 1
+            etag = response.headers.get("ETag", etag)
+            if response.status_code == 304:
+                # Not held (too many waiters on that process): poll again later.
+                if response.headers.get("Retry-After"):
+                    time.sleep(min(float(response.headers["Retry-After"]), max(0.0, remaining)))
+                continue
+            if response.status_code >= 400:
+                result.outcome = f"status_http_{response.status_code}"
+                return
+            status = response.json()["workout_status"]
+        result.ready_s = round(time.monotonic() - started, 3)
+        result.outcome = status
+
+        if status == Week.STATUS_READY:
+            me_started = time.monotonic()
+            response = student_session.get(f"{self.base_url}/api/plans/workouts/me/", timeout=30)
+            result.me_ms = _ms(me_started)
+            result.me_status = response.status_code
+
+    def _report(self, results, samples, elapsed, started_at) -> dict:
+        outcomes = {}
+        for result in results:
+            outcomes[result.outcome] = outcomes.get(result.outcome, 0) + 1
+        ready = [result for result in results if result.outcome == Week.STATUS_READY]
+        queued = [sample[0] for sample in samples]
+        running = [sample[1] for sample in samples]
+
+        jobs = GenerationJob.objects.filter(
+            created_at__gte=started_at,
+            kind=GenerationJob.KIND_WORKOUT,
+        )
+        stats = generation_stats(jobs, days=1)
+        return {
+            "started_at": started_at,
+            "seconds": round(elapsed, 1),
+            "weeks": len(results),
+            "outcomes": outcomes,
+            "attached": sum(result.attached for result in results),
+            "throttled_responses": sum(result.throttled for result in results),
+            "throughput_per_minute": round(len(ready) / elapsed * 60, 2) if elapsed else None,
+            "time_to_ready_s": _summary([result.ready_s for result in ready], digits=3),
+            "post_ms": _summary([result.post_ms for result in results if result.post_ms is not None]),
+            "workouts_me_ms": _summary([result.me_ms for result in ready if result.me_ms is not None]),
+            "workouts_me_errors": sum(1 for result in ready if result.me_status != 200),
+            "queue_depth": {
+                "samples": len(samples),
+                "queued_max": max(queued, default=0),
+                "queued_avg": round(sum(queued) / len(queued), 1) if queued else None,
+                "running_max": max(running, default=0),
+            },
+            "jobs": {
+                name: stats[name]
+                for name in ("jobs", "errors", "fallback_rate", "cache_hit_rate", "http_attempts_avg", "duration", "tokens")
+            },
+        }
+
+    def _print(self, report):
+        ttr = report["time_to_ready_s"]
+        queue = report["queue_depth"]
+        jobs = report["jobs"]
+        self.stdout.write(f"Duracion: {report['seconds']} s, semanas: {report['weeks']}, resultados: {report['outcomes']}")
+        self.stdout.write(
+            f"Throughput: {report['throughput_per_minute']} rutinas/min "
+            f"(unidas a un job: {report['attached']}, respuestas 429: {report['throttled_responses']})"
+        )
+        self.stdout.write(f"Tiempo hasta ready: p50 {ttr['p50']} s, p95 {ttr['p95']} s, max {ttr['max']} s")
+        self.stdout.write(
+            f"POST workouts/ai: p50 {report['post_ms']['p50']} ms; "
+            f"workouts/me: p50 {report['workouts_me_ms']['p50']} ms, errores {report['workouts_me_errors']}"
+        )
+        self.stdout.write(
+            f"Cola: max {queue['queued_max']} en espera (media {queue['queued_avg']}), "
+            f"max {queue['running_max']} en curso"
+        )
+        self.stdout.write(
+            f"Jobs: {jobs['jobs']} terminados, {jobs['errors']} con error, fallback {jobs['fallback_rate']}, "
+            f"intentos HTTP medios {jobs['http_attempts_avg']}"
+        )
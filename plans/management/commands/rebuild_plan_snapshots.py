@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from plans.models import Workout
+from plans.snapshots import rebuild_stale_snapshots
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los snapshots de rutina pendientes (nuevos, legacy o invalidados por el catalogo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Invalida todos los snapshots antes de reconstruir.",
+        )
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            Workout.objects.update(plan_snapshot=None)
+        rebuilt = rebuild_stale_snapshots()
+        self.stdout.write(f"Snapshots reconstruidos: {rebuilt}")
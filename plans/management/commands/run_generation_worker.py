@@ -0,0 +1,85 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from plans.ai.async_tasks import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de generacion IA (rutinas y dietas) con concurrencia limitada."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.GENERATION_WORKER_CONCURRENCY,
+            help="Numero maximo de generaciones simultaneas.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.GENERATION_WORKER_POLL_SECONDS,
+            help="Segundos de espera cuando la cola esta vacia.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa los trabajos pendientes y termina.",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        poll_interval = max(0.1, options["poll_interval"])
+        self._stopping = False
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self._sweep_stale_jobs()
+        last_sweep = time.monotonic()
+
+        self.stdout.write(f"Worker de generacion iniciado (concurrency={concurrency})")
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="generation") as pool:
+            while not self._stopping:
+                # Jobs of a worker that crashed after we started are recovered here,
+                # not only at startup; otherwise their weeks stay attached to them.
+                if time.monotonic() - last_sweep >= settings.GENERATION_STALE_SWEEP_SECONDS:
+                    self._sweep_stale_jobs()
+                    last_sweep = time.monotonic()
+
+                while len(in_flight) < concurrency:
+                    job = claim_next_job()
+                    if job is None:
+                        break
+                    in_flight.add(pool.submit(run_job, job))
+
+                if not in_flight:
+                    if options["once"]:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, in_flight = wait(
+                    in_flight,
+                    timeout=poll_interval,
+                    return_when=FIRST_COMPLETED,
+                )
+
+            if in_flight:
+                self.stdout.write(f"Esperando {len(in_flight)} trabajos en curso...")
+                wait(in_flight)
+
+        self.stdout.write("Worker de generacion detenido")
+
+    def _sweep_stale_jobs(self):
+        requeued, failed = requeue_stale_jobs(settings.GENERATION_JOB_STALE_SECONDS)
+        if requeued or failed:
+            self.stdout.write(f"Trabajos recuperados: {requeued}, marcados con error: {failed}")
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,237 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from catalog.cache import bump_catalog_version
+from catalog.models import VisualResource
+from catalog.normalize import normalize_title
+from plans.models import Diet, Week, Workout, WorkoutDay, WorkoutExercise
+from students.counters import recount_coach
+from students.models import Student
+
+MUSCLE_GROUPS = ("Pecho", "Espalda", "Piernas", "Hombro", "Biceps", "Triceps", "Core", "Cardio")
+MOVEMENTS = {
+    "Pecho": ("Press banca", "Aperturas", "Fondos", "Press inclinado", "Cruce de poleas"),
+    "Espalda": ("Remo", "Jalon al pecho", "Dominadas", "Peso muerto", "Pullover"),
+    "Piernas": ("Sentadilla", "Prensa", "Zancadas", "Peso muerto rumano", "Extension de cuadriceps"),
+    "Hombro": ("Press militar", "Elevaciones laterales", "Pajaros", "Face pull", "Press Arnold"),
+    "Biceps": ("Curl", "Curl martillo", "Curl concentrado", "Curl predicador"),
+    "Triceps": ("Extension de triceps", "Press frances", "Patada de triceps", "Fondos en banco"),
+    "Core": ("Plancha", "Crunch", "Rueda abdominal", "Elevacion de piernas", "Pallof press"),
+    "Cardio": ("Burpees", "Saltos de cuerda", "Remo ergometro", "Bicicleta", "Sprints"),
+}
+EQUIPMENT = ("mancuernas", "barra", "polea", "maquina", "banda", "kettlebell", "")
+LEVELS = (
+    VisualResource.LEVEL_BEGINNER,
+    VisualResource.LEVEL_INTERMEDIATE,
+    VisualResource.LEVEL_ADVANCED,
+)
+STUDENT_LEVELS = ("principiante", "intermedio", "avanzado")
+OBJECTIVES = ("Volumen", "Definicion", "Fuerza", "Perdida de grasa", "Mantenimiento")
+DAY_NAMES = ("Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado")
+MEALS = ("Desayuno", "Comida", "Cena", "Snack")
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sinteticos a escala (catalogo, coaches, alumnos, semanas, rutinas "
+        "estructuradas y dietas) con inserciones masivas. Los snapshots de rutina quedan "
+        "pendientes y se construyen al leerlos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="scale", help="Prefijo de los usernames generados.")
+        parser.add_argument("--coaches", type=int, default=3)
+        parser.add_argument("--students", type=int, default=1000, help="Alumnos por coach.")
+        parser.add_argument("--weeks", type=int, default=24, help="Semanas por alumno; la ultima queda activa.")
+        parser.add_argument("--catalog", type=int, default=3000, help="Ejercicios del catalogo.")
+        parser.add_argument("--days", type=int, default=4, help="Dias por rutina.")
+        parser.add_argument("--exercises", type=int, default=6, help="Ejercicios por dia.")
+        parser.add_argument("--workout-ratio", type=float, default=0.9, help="Fraccion de semanas con rutina.")
+        parser.add_argument("--diet-ratio", type=float, default=0.7, help="Fraccion de semanas con dieta.")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Elimina antes los datos generados con el mismo prefijo.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = options["prefix"]
+        self.counts = {}
+        started = time.monotonic()
+
+        if options["clear"]:
+            self._clear()
+
+        # Un solo hash: PBKDF2 por usuario haria que la semilla tarde minutos.
+        self.password = make_password(self.prefix)
+        root = self._root()
+        exercise_ids = self._seed_catalog(root, options["catalog"])
+
+        # Re-running without --clear adds more coaches instead of colliding.
+        first = User.objects.filter(username__startswith=f"{self.prefix}_coach", role="ADMIN").count()
+        coach_ids = []
+        for coach_idx in range(first, first + options["coaches"]):
+            with transaction.atomic():
+                coach = User.objects.create(
+                    username=f"{self.prefix}_coach{coach_idx}",
+                    password=self.password,
+                    role="ADMIN",
+                )
+                self._add("User", 1)
+                self._seed_students(coach, exercise_ids, options)
+            coach_ids.append(coach.id)
+            self.stdout.write(f"Coach {coach.username}: {options['students']} alumnos")
+
+        for coach_id in [root.id, *coach_ids]:
+            recount_coach(coach_id)
+
+        for name, value in self.counts.items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(f"Tiempo: {time.monotonic() - started:.1f} s")
+
+    def _add(self, name, amount):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def _bulk(self, model, rows):
+        created = model.objects.bulk_create(rows, batch_size=self.batch_size)
+        self._add(model.__name__, len(created))
+        return created
+
+    def _clear(self):
+        users = User.objects.filter(username__startswith=f"{self.prefix}_")
+        # Workouts first: WorkoutExercise protects the catalog rows they use.
+        Workout.objects.filter(week__student__coach__in=users).delete()
+        deleted_users = users.exclude(role="ROOT").delete()[0]
+        deleted_catalog = VisualResource.objects.filter(created_by__in=users).delete()[0]
+        users.delete()
+        bump_catalog_version()
+        self.stdout.write(f"Eliminadas: {deleted_users} filas de usuarios y sus planes, {deleted_catalog} del catalogo")
+
+    def _root(self):
+        root, _ = User.objects.get_or_create(
+            username=f"{self.prefix}_root",
+            defaults={"role": "ROOT", "password": self.password},
+        )
+        return root
+
+    def _seed_catalog(self, root, total):
+        rows = []
+        for index in range(total):
+            group = MUSCLE_GROUPS[index % len(MUSCLE_GROUPS)]
+            movement = self.rng.choice(MOVEMENTS[group])
+            equipment = self.rng.choice(EQUIPMENT)
+            title = f"{movement} {equipment} {index}".replace("  ", " ")
+            rows.append(VisualResource(
+                title=title,
+                normalized_title=normalize_title(title),
+                description=f"{movement} para {group.lower()}. Controla la fase excentrica.",
+                video_url=f"https://videos.example.com/{self.prefix}/{index}.mp4",
+                muscle_group=group,
+                level=self.rng.choice(LEVELS),
+                duration_seconds=self.rng.randrange(20, 240),
+                equipment=equipment,
+                is_public=self.rng.random() > 0.05,
+                created_by=root,
+            ))
+        created = self._bulk(VisualResource, rows)
+        # bulk_create skips the post_save signal that invalidates the cached lists.
+        bump_catalog_version()
+        ids = list(VisualResource.objects.values_list("id", flat=True))
+        self.stdout.write(f"Catalogo: {len(created)} ejercicios nuevos, {len(ids)} en total")
+        return ids
+
+    def _seed_students(self, coach, exercise_ids, options):
+        users = self._bulk(User, [
+            User(
+                username=f"{coach.username}_alumno{index}",
+                password=self.password,
+                role="STUDENT",
+            )
+            for index in range(options["students"])
+        ])
+        students = self._bulk(Student, [
+            Student(
+                user=user,
+                coach=coach,
+                age=self.rng.randrange(16, 65),
+                height_cm=self.rng.randrange(150, 200),
+                weight_kg=round(self.rng.uniform(50, 110), 2),
+                objective=self.rng.choice(OBJECTIVES),
+                level=self.rng.choice(STUDENT_LEVELS),
+            )
+            for user in users
+        ])
+
+        # Bounded memory: weeks and plans are written a slice of students at a time.
+        chunk = max(1, self.batch_size // max(1, options["weeks"]))
+        for start in range(0, len(students), chunk):
+            self._seed_weeks(students[start:start + chunk], exercise_ids, options)
+
+    def _seed_weeks(self, students, exercise_ids, options):
+        today = timezone.localdate()
+        monday = today - timedelta(days=today.weekday())
+        total_weeks = options["weeks"]
+        per_day = min(options["exercises"], len(exercise_ids))
+
+        plans = []  # (has_workout, has_diet) per week, same order as `weeks`
+        weeks = []
+        for student in students:
+            for index in range(total_weeks):
+                start_date = monday - timedelta(weeks=total_weeks - 1 - index)
+                has_workout = self.rng.random() < options["workout_ratio"]
+                has_diet = self.rng.random() < options["diet_ratio"]
+                plans.append((has_workout, has_diet))
+                weeks.append(Week(
+                    student=student,
+                    start_date=start_date,
+                    end_date=start_date + timedelta(days=6),
+                    is_active=index == total_weeks - 1,
+                    workout_status=Week.STATUS_READY if has_workout else Week.STATUS_PENDING,
+                    diet_status=Week.STATUS_READY if has_diet else Week.STATUS_PENDING,
+                ))
+        weeks = self._bulk(Week, weeks)
+
+        workouts = self._bulk(Workout, [
+            Workout(week=week, content="Rutina generada por seed_scale")
+            for week, (has_workout, _) in zip(weeks, plans)
+            if has_workout
+        ])
+        days = self._bulk(WorkoutDay, [
+            WorkoutDay(workout=workout, name=DAY_NAMES[index % len(DAY_NAMES)], order=index)
+            for workout in workouts
+            for index in range(options["days"])
+        ])
+        self._bulk(WorkoutExercise, [
+            WorkoutExercise(
+                day=day,
+                exercise_id=exercise_id,
+                sets=self.rng.choice((3, 4, 5)),
+                reps=self.rng.choice(("6-8", "8-10", "10-12", "12-15")),
+                order=order,
+            )
+            for day in days
+            for order, exercise_id in enumerate(self.rng.sample(exercise_ids, per_day))
+        ])
+        self._bulk(Diet, [
+            Diet(week=week, content=self._diet_text())
+            for week, (_, has_diet) in zip(weeks, plans)
+            if has_diet
+        ])
+
+    def _diet_text(self):
+        lines = []
+        for day in ("Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"):
+            lines.append(f"{day}:")
+            lines.extend(f"- {meal}: {self.rng.randrange(300, 800)} kcal" for meal in MEALS)
+        return "\n".join(lines)
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 14:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0005_workout_structure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('workout', 'Workout'), ('diet', 'Diet')], max_length=12)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('error', 'Error')], default='queued', max_length=12)),
+                ('context', models.JSONField(blank=True, default=dict)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('week', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to='plans.week')),
+            ],
+            options={
+                'ordering': ('created_at', 'id'),
+                'indexes': [models.Index(fields=['status', 'created_at'], name='plans_job_status_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0008_generationbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workout',
+            name='plan_snapshot',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0009_workout_plan_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='week',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='plan_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 17:40
+
+from django.db import migrations
+
+
+def repair_week_status(apps, schema_editor):
+    """
+    One-off replacement for the old write-on-read status sync: weeks left
+    'pending' although their workout/diet was already saved become 'ready'.
+    """
+    Week = apps.get_model("plans", "Week")
+    Week.objects.filter(
+        workout_status="pending",
+        workout__isnull=False,
+    ).update(workout_status="ready")
+    Week.objects.filter(
+        diet_status="pending",
+        diet__isnull=False,
+    ).update(diet_status="ready")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0010_week_updated_at_workout_plan_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_week_status, migrations.RunPython.noop),
+    ]
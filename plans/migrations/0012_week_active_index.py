@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+def deactivate_duplicate_active_weeks(apps, schema_editor):
+    """Keep only the newest active week per student so the constraint can be added."""
+    Week = apps.get_model("plans", "Week")
+    seen = set()
+    stale_ids = []
+    active = Week.objects.filter(is_active=True).order_by("student_id", "-created_at", "-id")
+    for week_id, student_id in active.values_list("id", "student_id"):
+        if student_id in seen:
+            stale_ids.append(week_id)
+        else:
+            seen.add(student_id)
+    if stale_ids:
+        Week.objects.filter(id__in=stale_ids).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0011_repair_legacy_week_status'),
+        ('students', '0002_student_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(deactivate_duplicate_active_weeks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='week',
+            index=models.Index(fields=['student', 'is_active'], name='plans_week_student_active_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='week',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('student',), name='plans_week_one_active_per_student'),
+        ),
+    ]
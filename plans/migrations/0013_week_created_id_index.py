@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0012_week_active_index'),
+        ('students', '0003_student_coach_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='week',
+            index=models.Index(fields=['-created_at', '-id'], name='plans_week_created_id_idx'),
+        ),
+    ]
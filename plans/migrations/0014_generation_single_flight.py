@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-18 22:00
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def cancel_duplicate_active_jobs(apps, schema_editor):
+    """Keep only the newest queued/running job per (week, kind) so the constraint can be added."""
+    GenerationJob = apps.get_model("plans", "GenerationJob")
+    seen = set()
+    stale_ids = []
+    active = GenerationJob.objects.filter(status__in=("queued", "running")).order_by(
+        "week_id", "kind", "-created_at", "-id"
+    )
+    for job_id, week_id, kind in active.values_list("id", "week_id", "kind"):
+        if (week_id, kind) in seen:
+            stale_ids.append(job_id)
+        else:
+            seen.add((week_id, kind))
+    if stale_ids:
+        GenerationJob.objects.filter(id__in=stale_ids).update(
+            status="cancelled",
+            error="Reemplazado por una generacion mas reciente",
+            finished_at=timezone.now(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0013_week_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='week',
+            name='diet_generation',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='week',
+            name='workout_generation',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='generationjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('error', 'Error'), ('cancelled', 'Cancelled')], default='queued', max_length=12),
+        ),
+        migrations.RunPython(cancel_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='generationjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('queued', 'running'))), fields=('week', 'kind'), name='plans_job_one_active_per_week_kind'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-18 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0014_generation_single_flight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='completion_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='duration_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='fallback_used',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='http_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='http_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='missing_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='prompt_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='trace',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='generationjob',
+            index=models.Index(fields=['finished_at'], name='plans_job_finished_idx'),
+        ),
+    ]
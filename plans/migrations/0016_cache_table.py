@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 23:30
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Table of the DatabaseCache used when REDIS_URL is unset (backend/settings.py).
+    # A no-op with Redis configured or when the table already exists.
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0015_generationjob_trace'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
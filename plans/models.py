@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from students.models import Student
 from catalog.models import VisualResource
@@ -39,7 +40,25 @@ class Week(models.Model):
         default=STATUS_PENDING,
     )
 
+    # Bumped by every new generation; only the job holding the current value may write.
+    workout_generation = models.PositiveIntegerField(default=0, editable=False)
+    diet_generation = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'is_active'], name='plans_week_student_active_idx'),
+            models.Index(fields=['-created_at', '-id'], name='plans_week_created_id_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student'],
+                condition=models.Q(is_active=True),
+                name='plans_week_one_active_per_student',
+            ),
+        ]
 
     def __str__(self):
         return f"Week {self.start_date} - {self.end_date} ({self.student.user.username})"
@@ -53,6 +72,11 @@ class Workout(models.Model):
 
     content = models.TextField()
 
+    # Salida exacta de WorkoutMeSerializer; None = pendiente de reconstruir.
+    plan_snapshot = models.JSONField(null=True, blank=True, editable=False)
+    # Ultimo cambio de un ejercicio del catalogo usado en este plan.
+    plan_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -113,3 +137,113 @@ class Diet(models.Model):
 
     def __str__(self):
         return f"Diet - Week {self.week.id}"
+
+
+class GenerationBatch(models.Model):
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='generation_batches'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Batch #{self.id} ({self.created_by.username})"
+
+
+class GenerationJob(models.Model):
+    KIND_WORKOUT = "workout"
+    KIND_DIET = "diet"
+
+    KIND_CHOICES = (
+        (KIND_WORKOUT, "Workout"),
+        (KIND_DIET, "Diet"),
+    )
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_ERROR = "error"
+    STATUS_CANCELLED = "cancelled"
+
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_ERROR, "Error"),
+        (STATUS_CANCELLED, "Cancelled"),
+    )
+
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    week = models.ForeignKey(
+        Week,
+        on_delete=models.CASCADE,
+        related_name='generation_jobs'
+    )
+
+    batch = models.ForeignKey(
+        GenerationBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    status = models.CharField(
+        max_length=12,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+    )
+    context = models.JSONField(default=dict, blank=True)
+    # Week.<kind>_generation this job was issued; its result is dropped once superseded.
+    generation = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    # Trazas de la ultima ejecucion (plans/ai/tracing.py): [{"stage", "ms", "ok"}, ...]
+    trace = models.JSONField(default=list, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    http_attempts = models.PositiveSmallIntegerField(default=0)
+    http_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    cache_hit = models.BooleanField(default=False)
+    fallback_used = models.BooleanField(default=False)
+    missing_count = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('created_at', 'id')
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='plans_job_status_created_idx'),
+            models.Index(fields=['finished_at'], name='plans_job_finished_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['week', 'kind'],
+                condition=models.Q(status__in=('queued', 'running')),
+                name='plans_job_one_active_per_week_kind',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job #{self.id} - Week {self.week_id} ({self.status})"
+
+
+class AIResponseCache(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=60)
+    response = models.TextField()
+    hit_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} {self.key[:12]} ({self.hit_count} hits)"
@@ -0,0 +1,342 @@
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from catalog.index import STOPWORDS
+from catalog.normalize import normalize_title, strip_accents, title_tokens
+
+FOODS_PATH = Path(__file__).resolve().parent / "data" / "foods.json"
+
+DAYS = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"]
+
+# Meal name -> food categories that make it up.
+MEALS = (
+    ("Desayuno", "desayuno", ("protein", "carb", "fruit", "fat")),
+    ("Comida", "comida", ("protein", "carb", "veg", "fat")),
+    ("Cena", "cena", ("protein", "carb", "veg")),
+    ("Snack", "snack", ("protein", "fruit")),
+)
+
+# Keywords in diet_notes -> food tags to drop.
+EXCLUSION_KEYWORDS = {
+    "vegetariano": ("carne", "pescado", "mariscos"),
+    "vegetariana": ("carne", "pescado", "mariscos"),
+    "vegano": ("carne", "pescado", "mariscos", "huevo", "lactosa"),
+    "vegana": ("carne", "pescado", "mariscos", "huevo", "lactosa"),
+    "lactosa": ("lactosa",),
+    "lacteo": ("lactosa",),
+    "lacteos": ("lactosa",),
+    "gluten": ("gluten",),
+    "celiaco": ("gluten",),
+    "celiaca": ("gluten",),
+    "huevo": ("huevo",),
+    "huevos": ("huevo",),
+    "pescado": ("pescado",),
+    "mariscos": ("mariscos",),
+    "marisco": ("mariscos",),
+    "camaron": ("mariscos",),
+    "nueces": ("frutos_secos",),
+    "almendras": ("frutos_secos",),
+    "cacahuate": ("cacahuate",),
+    "mani": ("cacahuate",),
+    "cerdo": ("cerdo",),
+    "puerco": ("cerdo",),
+    "res": ("res",),
+    "soya": ("soya",),
+    "soja": ("soya",),
+}
+# Words that only rule foods out after a negation ("sin carne", "no como carne");
+# on their own ("come carne") they say nothing.
+NEGATED_KEYWORDS = {
+    "carne": ("carne",),
+    "carnes": ("carne",),
+    "leche": ("lactosa",),
+    "pescados": ("pescado",),
+    "trigo": ("gluten",),
+}
+NEGATION = re.compile(
+    r"\b(?:sin|no (?:come|como|comer|consume|consumo|toma|tomo|quiere|puede comer)|evitar|evita"
+    r"|alergia a|alergico a|alergica a)\s+(?:(?:el|la|los|las|al|del|de)\s+)?([a-z]+)"
+)
+EXCLUSION_PHRASES = {
+    "frutossecos": ("frutos_secos",),
+    "carneroja": ("res", "cerdo"),
+}
+
+# Macro rows of the solver: kcal, protein, carbs, fat.
+MACRO_WEIGHTS = np.array([3.0, 2.0, 0.5, 0.5])
+PORTION_WEIGHT = 0.02
+SOLVER_ITERATIONS = 150
+ROUND_TO_GRAMS = 5
+
+KCAL_TOLERANCE = 0.05
+PROTEIN_TOLERANCE = 0.10
+# Alternative food rotations tried for days that miss the tolerance.
+ROTATION_ATTEMPTS = 3
+# The max_g portions in foods.json are sized for about this many kcal a day;
+# higher targets scale them up so the solver can reach the target.
+PORTION_REFERENCE_KCAL = 2000
+
+
+@lru_cache(maxsize=1)
+def load_foods() -> List[Dict[str, Any]]:
+    with FOODS_PATH.open(encoding="utf-8") as fh:
+        return json.load(fh)["foods"]
+
+
+def parse_exclusions(notes: str | None) -> set:
+    """Food tags (and `sin <palabra>` names) the coach's notes rule out."""
+    if not notes:
+        return set()
+    text = strip_accents(notes).lower()
+    words = re.findall(r"[a-z]+", text)
+    squashed = normalize_title(notes)
+
+    excluded = set()
+    for word in words:
+        excluded.update(EXCLUSION_KEYWORDS.get(word, ()))
+    for phrase, tags in EXCLUSION_PHRASES.items():
+        if phrase in squashed:
+            excluded.update(tags)
+    # "sin atun", "no como papa": drop foods with that word in their name,
+    # plus the tags of words like "carne" that name a whole food group.
+    for match in NEGATION.finditer(text):
+        word = match.group(1)
+        if word in STOPWORDS:
+            continue
+        excluded.add(f"name:{word}")
+        excluded.update(NEGATED_KEYWORDS.get(word, ()))
+    return excluded
+
+
+def _word_forms(word: str) -> set:
+    """The word with its plural/singular, so "sin fresa" also drops "Fresas"."""
+    forms = {word, f"{word}s", f"{word}es"}
+    if word.endswith("es"):
+        forms.add(word[:-2])
+    if word.endswith("s"):
+        forms.add(word[:-1])
+    return forms
+
+
+def _allowed(food, excluded) -> bool:
+    if excluded.intersection(food["tags"]):
+        return False
+    # Whole words only: "sin sal" keeps the salmon.
+    words = set(title_tokens(food["name"]))
+    return not any(
+        tag.startswith("name:") and words.intersection(_word_forms(tag[5:]))
+        for tag in excluded
+    )
+
+
+def daily_targets(context: Dict[str, Any]) -> Dict[str, float]:
+    """kcal and macro targets from weight, objective and an optional kcal override."""
+    weight = float(context.get("weight") or 70)
+    objective = normalize_title(context.get("objective"))
+
+    if "volumen" in objective or "ganar" in objective:
+        kcal, protein_per_kg = weight * 30 * 1.15, 1.8
+    elif "def" in objective or "baja" in objective or "perder" in objective:
+        kcal, protein_per_kg = weight * 30 * 0.8, 2.2
+    else:
+        kcal, protein_per_kg = weight * 30, 1.8
+
+    try:
+        override = int(float(context.get("diet_calories")))
+    except (TypeError, ValueError):
+        override = None
+    if override and override > 0:
+        kcal = float(override)
+
+    protein = weight * protein_per_kg
+    fat = kcal * 0.27 / 9
+    carbs = max((kcal - protein * 4 - fat * 9) / 4, 50.0)
+    return {"kcal": kcal, "protein": protein, "carbs": carbs, "fat": fat}
+
+
+def _choose_components(foods, excluded, shift=0):
+    """
+    Foods for every (day, meal, slot), rotating through the allowed options
+    so consecutive days differ and no food repeats within a day.
+    Returns a list per day of (meal_name, [food, ...]).
+    """
+    allowed = [food for food in foods if _allowed(food, excluded)]
+    options = {}
+    for _, meal_key, categories in MEALS:
+        for category in categories:
+            options[(meal_key, category)] = [
+                food for food in allowed
+                if food["category"] == category and meal_key in food["meals"]
+            ]
+
+    week = []
+    for day_idx in range(len(DAYS)):
+        used = set()
+        meals = []
+        for meal_idx, (meal_name, meal_key, categories) in enumerate(MEALS):
+            components = []
+            for slot_idx, category in enumerate(categories):
+                choices = options[(meal_key, category)]
+                if not choices:
+                    continue
+                start = day_idx + shift * len(DAYS) + meal_idx * 3 + slot_idx
+                for step in range(len(choices)):
+                    food = choices[(start + step) % len(choices)]
+                    if food["name"] not in used:
+                        break
+                used.add(food["name"])
+                components.append(food)
+            if components:
+                meals.append((meal_name, components))
+        week.append(meals)
+    return week
+
+
+def solve_portions(composition, low, high, target):
+    """
+    Batched box-constrained least squares, one problem per day.
+    composition: (days, n, 4) macros per gram; low/high: (days, n) grams;
+    target: (4,). Minimises the weighted relative macro error plus a small
+    pull towards mid-range portions, by accelerated projected gradient
+    (FISTA) on variables scaled to [0, 1]. Returns grams with shape (days, n).
+    """
+    span = high - low
+    # Relative residual r = (composition^T x - target) / target, x = low + span * z.
+    scale = MACRO_WEIGHTS / target
+    design = composition * span[..., None] * scale            # (days, n, 4)
+    offset = (np.einsum("dnk,dn->dk", composition, low) - target) * scale
+
+    hessian = np.einsum("dnk,dmk->dnm", design, design)
+    hessian += PORTION_WEIGHT * np.eye(span.shape[1])
+    step = 1.0 / np.linalg.eigvalsh(hessian)[:, -1]           # 1 / largest eigenvalue
+
+    linear = np.einsum("dnk,dk->dn", design, offset) - PORTION_WEIGHT * 0.5
+    z = np.full(span.shape, 0.5)
+    y = z
+    momentum = 1.0
+    for _ in range(SOLVER_ITERATIONS):
+        gradient = np.matmul(hessian, y[..., None])[..., 0] + linear
+        z_next = np.clip(y - step[:, None] * gradient, 0.0, 1.0)
+        momentum_next = (1 + (1 + 4 * momentum * momentum) ** 0.5) / 2
+        y = z_next + ((momentum - 1) / momentum_next) * (z_next - z)
+        z, momentum = z_next, momentum_next
+
+    grams = low + span * z
+    return np.clip(np.round(grams / ROUND_TO_GRAMS) * ROUND_TO_GRAMS, low, high)
+
+
+def _solve_week(week, target):
+    """Solve one rotation; returns (grams, totals, relative kcal/protein error) per day."""
+    flat = [[food for _, components in meals for food in components] for meals in week]
+    composition = np.array(
+        [[[food["kcal"], food["protein"], food["carbs"], food["fat"]] for food in day] for day in flat],
+        dtype=float,
+    ) / 100.0
+    low = np.array([[food["min_g"] for food in day] for day in flat], dtype=float)
+    high = np.array([[food["max_g"] for food in day] for day in flat], dtype=float)
+    high *= max(1.0, target[0] / PORTION_REFERENCE_KCAL)
+
+    grams = solve_portions(composition, low, high, target)
+    totals = np.einsum("dnk,dn->dk", composition, grams)
+    error = np.abs(totals[:, :2] - target[:2]) / target[:2]
+    return grams, totals, error
+
+
+def build_diet_plan(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Seven days of meals whose portions are solved to the daily targets.
+    Every day has the same number of components, so a whole week is one
+    batched NumPy solve; days still outside the kcal/protein tolerance are
+    retried with the next food rotation and the closest result is kept.
+    Raises ValueError when the notes exclude every food.
+    """
+    targets = daily_targets(context)
+    excluded = parse_exclusions(context.get("diet_notes"))
+    foods = load_foods()
+    target = np.array([targets["kcal"], targets["protein"], targets["carbs"], targets["fat"]])
+    tolerance = np.array([KCAL_TOLERANCE, PROTEIN_TOLERANCE])
+
+    best = [None] * len(DAYS)
+    for shift in range(ROTATION_ATTEMPTS):
+        week = _choose_components(foods, excluded, shift)
+        if not any(week):
+            raise ValueError("Las notas del coach excluyen todos los alimentos de la tabla.")
+        grams, totals, error = _solve_week(week, target)
+        for day_idx in range(len(DAYS)):
+            score = float((error[day_idx] / tolerance).max())
+            if best[day_idx] is None or score < best[day_idx][0]:
+                best[day_idx] = (score, week[day_idx], grams[day_idx], totals[day_idx])
+        if all(entry[0] <= 1 for entry in best):
+            break
+
+    days = []
+    for day_idx, (score, meals, grams, totals) in enumerate(best):
+        position = 0
+        day_meals = []
+        for meal_name, components in meals:
+            items = []
+            for food in components:
+                items.append({"food": food["name"], "grams": int(grams[position])})
+                position += 1
+            day_meals.append({"meal": meal_name, "items": items})
+        kcal, protein, carbs, fat = totals
+        days.append({
+            "day": DAYS[day_idx],
+            "meals": day_meals,
+            "totals": {
+                "kcal": round(kcal),
+                "protein": round(protein),
+                "carbs": round(carbs),
+                "fat": round(fat),
+            },
+            "within_tolerance": score <= 1,
+        })
+
+    return {
+        "targets": {key: round(value) for key, value in targets.items()},
+        "excluded": sorted({tag.replace("name:", "") for tag in excluded}),
+        "days": days,
+    }
+
+
+def render_diet(plan: Dict[str, Any]) -> str:
+    """Plain-text diet in the same day/meal layout the AI prompt asks for."""
+    targets = plan["targets"]
+    header = [
+        "Plan semanal calculado (sin IA). Objetivo diario: "
+        f"{targets['kcal']} kcal | Proteina {targets['protein']} g | "
+        f"Carbohidratos {targets['carbs']} g | Grasa {targets['fat']} g",
+        f"Excluido por notas del coach: {', '.join(plan['excluded'])}" if plan["excluded"] else "",
+        "Hidratacion: 2-3 L agua dia. Ajusta por actividad.",
+    ]
+    missed = [day["day"] for day in plan["days"] if not day["within_tolerance"]]
+    if missed:
+        header.append(
+            "Aviso: con los alimentos disponibles estos dias quedan fuera del objetivo "
+            f"({', '.join(missed)}); revisa las porciones marcadas."
+        )
+
+    blocks = ["\n".join(line for line in header if line)]
+    for day in plan["days"]:
+        lines = [f"{day['day']}:"]
+        for meal in day["meals"]:
+            foods = " + ".join(f"{item['food']} {item['grams']} g" for item in meal["items"])
+            lines.append(f"- {meal['meal']}: {foods}")
+        totals = day["totals"]
+        lines.append(
+            f"Total: {totals['kcal']} kcal | P {totals['protein']} g | "
+            f"C {totals['carbs']} g | G {totals['fat']} g"
+            + ("" if day["within_tolerance"] else " (fuera del objetivo)")
+        )
+        blocks.append("\n".join(lines))
+
+    return "\n\n".join(blocks)
+
+
+def build_local_diet(context: Dict[str, Any]) -> str:
+    return render_diet(build_diet_plan(context))
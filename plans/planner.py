@@ -0,0 +1,237 @@
+import math
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+from catalog.models import VisualResource
+from catalog.normalize import normalize_title
+from plans.ai.prompting import FOCUS_GROUPS
+
+DAY_NAMES = {
+    1: ["Lunes"],
+    2: ["Lunes", "Jueves"],
+    3: ["Lunes", "Miercoles", "Viernes"],
+    4: ["Lunes", "Martes", "Jueves", "Viernes"],
+    5: ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes"],
+    6: ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado"],
+}
+
+# Muscle regions trained by each day type, in the order they appear in the session.
+FULL_BODY = ("piernas", "pecho", "espalda", "hombro", "core")
+UPPER = ("pecho", "espalda", "hombro", "biceps", "triceps")
+LOWER = ("piernas", "core")
+PUSH = ("pecho", "hombro", "triceps")
+PULL = ("espalda", "biceps", "core")
+LEGS = ("piernas", "core")
+
+SPLITS = {
+    1: (FULL_BODY,),
+    2: (FULL_BODY, FULL_BODY),
+    3: (FULL_BODY, FULL_BODY, FULL_BODY),
+    4: (UPPER, LOWER, UPPER, LOWER),
+    5: (PUSH, PULL, LEGS, UPPER, LOWER),
+    6: (PUSH, PULL, LEGS, PUSH, PULL, LEGS),
+}
+
+# Weekly working sets per region for a beginner; scaled by level and focus.
+WEEKLY_SETS = {
+    "piernas": 12,
+    "pecho": 9,
+    "espalda": 9,
+    "hombro": 6,
+    "biceps": 4,
+    "triceps": 4,
+    "core": 4,
+    "cardio": 0,
+}
+
+LEVEL_INDEX = {
+    "beginner": 0,
+    "principiante": 0,
+    "intermediate": 1,
+    "intermedio": 1,
+    "advanced": 2,
+    "avanzado": 2,
+}
+LEVEL_VOLUME = (1.0, 1.35, 1.6)
+LEVEL_SETS = (3, 4, 4)
+LEVEL_MAX_PER_DAY = (5, 6, 7)
+FOCUS_VOLUME = 1.5
+
+DEFAULT_DAYS = 6
+DEFAULT_REPS = "10-12"
+OBJECTIVE_REPS = (
+    ("fuerza", "5-8"),
+    ("volumen", "8-12"),
+    ("hipertrofia", "8-12"),
+    ("definicion", "12-15"),
+    ("perdida", "12-15"),
+    ("resistencia", "15-20"),
+)
+REGION_REPS = {"core": "15-20", "cardio": "20-30 min"}
+
+
+@lru_cache(maxsize=512)
+def classify_region(muscle_group: str | None) -> str | None:
+    """Map a free-text catalog muscle group to one of the planner regions."""
+    group = normalize_title(muscle_group)
+    if not group:
+        return None
+    for region, keys in FOCUS_GROUPS.items():
+        if any(key in group for key in keys):
+            return region
+    return None
+
+
+@lru_cache(maxsize=64)
+def _level_index(level) -> int:
+    key = normalize_title(level)
+    for name, index in LEVEL_INDEX.items():
+        if name in key:
+            return index
+    return 0
+
+
+def _days(days_per_week) -> int:
+    try:
+        days = int(days_per_week)
+    except (TypeError, ValueError):
+        return DEFAULT_DAYS
+    return max(1, min(days, DEFAULT_DAYS))
+
+
+def _reps_for(objective, region) -> str:
+    if region in REGION_REPS:
+        return REGION_REPS[region]
+    key = normalize_title(objective)
+    for word, reps in OBJECTIVE_REPS:
+        if word in key:
+            return reps
+    return DEFAULT_REPS
+
+
+def _build_pools(exercises, student_level):
+    """
+    Exercises per region, easiest suitable first. Entries above the student's
+    level are only kept when the region has nothing at or below it.
+    """
+    pools = defaultdict(list)
+    for exercise in exercises:
+        region = classify_region(exercise.muscle_group)
+        if region is None:
+            continue
+        level = _level_index(exercise.level)
+        pools[region].append((level, exercise))
+
+    for region, items in pools.items():
+        suitable = [item for item in items if item[0] <= student_level]
+        candidates = suitable or items
+        # Prefer the student's own level, then the closest easier one.
+        candidates.sort(key=lambda item: (abs(student_level - item[0]), item[1].title, item[1].id))
+        pools[region] = [exercise for _, exercise in candidates]
+    return pools
+
+
+def build_local_plan(exercises: Sequence[VisualResource], context: Dict[str, Any] | None = None):
+    """
+    Deterministic week plan built from the catalog alone.
+    Picks a split for `days_per_week` (full body, upper/lower, push/pull/legs),
+    spreads each region's weekly set target over the days that train it,
+    filters exercises by level and gives `focus_muscle` extra volume.
+    Returns the resolved-plan shape used by `save_workout_from_plan`.
+    """
+    context = context or {}
+    if not exercises:
+        return []
+
+    student_level = _level_index(context.get("level"))
+    days = _days(context.get("days_per_week"))
+    day_names = DAY_NAMES[days]
+    templates = SPLITS[days]
+    sets_per_exercise = LEVEL_SETS[student_level]
+    max_per_day = LEVEL_MAX_PER_DAY[student_level]
+    focus = classify_region(context.get("focus_muscle")) or normalize_title(context.get("focus_muscle"))
+    objective = context.get("objective")
+
+    pools = _build_pools(exercises, student_level)
+    cursors = defaultdict(int)
+
+    # Exercises per region per week, split evenly over the days that include it.
+    region_days = defaultdict(list)
+    for day_idx, template in enumerate(templates):
+        for region in template:
+            region_days[region].append(day_idx)
+    if focus in pools and focus not in region_days:
+        # A focus outside the split (e.g. cardio) gets a slot every other day.
+        for day_idx in range(0, days, 2):
+            region_days[focus].append(day_idx)
+
+    slots = [[] for _ in range(days)]
+    for region, day_indexes in region_days.items():
+        if not pools.get(region):
+            continue
+        weekly_sets = WEEKLY_SETS.get(region, 4) * LEVEL_VOLUME[student_level]
+        if region == focus:
+            weekly_sets = max(weekly_sets * FOCUS_VOLUME, sets_per_exercise * len(day_indexes))
+        weekly_exercises = max(len(day_indexes), math.ceil(weekly_sets / sets_per_exercise))
+        for position in range(weekly_exercises):
+            day_idx = day_indexes[position % len(day_indexes)]
+            slots[day_idx].append(region)
+
+    resolved: List[Dict[str, Any]] = []
+    for day_idx, day_name in enumerate(day_names):
+        order_in_day = {region: index for index, region in enumerate(templates[day_idx])}
+        if focus:
+            order_in_day[focus] = -1
+        day_slots = sorted(slots[day_idx], key=lambda region: order_in_day.get(region, len(order_in_day)))
+        # Trim from the end, which holds the smaller muscle groups.
+        day_slots = day_slots[:max_per_day]
+
+        used = set()
+        items = []
+        for region in day_slots:
+            pool = pools[region]
+            for _ in range(len(pool)):
+                exercise = pool[cursors[region] % len(pool)]
+                cursors[region] += 1
+                if exercise.id not in used:
+                    break
+            else:
+                continue
+            used.add(exercise.id)
+            items.append(
+                {
+                    "exercise": exercise,
+                    "sets": sets_per_exercise,
+                    "reps": _reps_for(objective, region),
+                    "notes": exercise.muscle_group or "",
+                    "order": len(items),
+                }
+            )
+
+        if items:
+            resolved.append({"day": day_name, "order": day_idx, "exercises": items})
+
+    if not resolved:
+        # Catalog without recognisable muscle groups: plain full-body rotation.
+        pool = list(exercises)
+        for day_idx, day_name in enumerate(day_names):
+            picks = [pool[(day_idx * 4 + n) % len(pool)] for n in range(min(4, len(pool)))]
+            resolved.append(
+                {
+                    "day": day_name,
+                    "order": day_idx,
+                    "exercises": [
+                        {
+                            "exercise": exercise,
+                            "sets": sets_per_exercise,
+                            "reps": _reps_for(objective, None),
+                            "notes": exercise.muscle_group or "",
+                            "order": order,
+                        }
+                        for order, exercise in enumerate(picks)
+                    ],
+                }
+            )
+
+    return resolved
@@ -1,13 +1,15 @@
+from django.db import transaction
 from rest_framework import serializers
 
-from catalog.models import VisualResource
+from catalog.index import get_catalog_snapshot
+from plans.ai.async_tasks import supersede_generation
 from plans.workout_plan import (
     parse_text_workout,
     resolve_manual_plan,
     resolve_named_plan,
     save_workout_from_plan,
 )
-from .models import Week, Workout, Diet, WorkoutDay, WorkoutExercise
+from .models import GenerationJob, Week, Workout, Diet, WorkoutDay, WorkoutExercise
 
 
 # ------------------------------------------------------------------
@@ -23,18 +25,20 @@ class WeekCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         student = validated_data.pop('student')
 
-        # Desactivar semanas previas del alumno
-        Week.objects.filter(
-            student=student,
-            is_active=True
-        ).update(is_active=False)
-
-        # Crear nueva semana activa
-        week = Week.objects.create(
-            student=student,
-            is_active=True,
-            **validated_data
-        )
+        # Una sola semana activa por alumno (constraint en Week.Meta)
+        with transaction.atomic():
+            # Desactivar semanas previas del alumno
+            Week.objects.filter(
+                student=student,
+                is_active=True
+            ).update(is_active=False)
+
+            # Crear nueva semana activa
+            week = Week.objects.create(
+                student=student,
+                is_active=True,
+                **validated_data
+            )
 
         return week
 
@@ -55,7 +59,14 @@ class WeekActiveSerializer(serializers.ModelSerializer):
 
 
 class WeekStatusSerializer(serializers.ModelSerializer):
+    """
+    Expects weeks annotated with `has_workout`/`has_diet` (see
+    plans.views._with_plan_status). A legacy week still marked pending
+    whose plan already exists is reported as ready without writing.
+    """
     student = serializers.CharField(source='student.user.username')
+    workout_status = serializers.SerializerMethodField()
+    diet_status = serializers.SerializerMethodField()
 
     class Meta:
         model = Week
@@ -70,6 +81,18 @@ class WeekStatusSerializer(serializers.ModelSerializer):
             'created_at',
         )
 
+    @staticmethod
+    def _effective_status(stored, exists):
+        if exists and stored == Week.STATUS_PENDING:
+            return Week.STATUS_READY
+        return stored
+
+    def get_workout_status(self, obj):
+        return self._effective_status(obj.workout_status, getattr(obj, 'has_workout', False))
+
+    def get_diet_status(self, obj):
+        return self._effective_status(obj.diet_status, getattr(obj, 'has_diet', False))
+
 
 # ------------------------------------------------------------------
 # WORKOUTS
@@ -159,10 +182,9 @@ class WorkoutCreateSerializer(serializers.ModelSerializer):
                 )
         elif raw_content:
             named_plan = parse_text_workout(raw_content)
-            exercises = VisualResource.objects.all()
             resolved_plan, missing_names = resolve_named_plan(
                 named_plan,
-                exercises,
+                get_catalog_snapshot(),
                 ignore_missing=False,
             )
             if missing_names:
@@ -180,8 +202,11 @@ class WorkoutCreateSerializer(serializers.ModelSerializer):
                 {"plan": "No hay ejercicios validos en el plan."}
             )
 
-        workout = save_workout_from_plan(week, resolved_plan)
-        Week.objects.filter(id=week_id).update(workout_status=Week.STATUS_READY)
+        # A manual plan replaces whatever the AI is still generating for the week.
+        with transaction.atomic():
+            supersede_generation(week_id, GenerationJob.KIND_WORKOUT)
+            workout = save_workout_from_plan(week, resolved_plan)
+            Week.objects.filter(id=week_id).update(workout_status=Week.STATUS_READY)
         return workout
 
 
@@ -214,14 +239,17 @@ class DietCreateSerializer(serializers.ModelSerializer):
         week_id = validated_data.pop('week_id')
         week = Week.objects.get(id=week_id)
 
-        # Garantizar una sola dieta por semana
-        Diet.objects.filter(week=week).delete()
+        with transaction.atomic():
+            supersede_generation(week_id, GenerationJob.KIND_DIET)
 
-        diet = Diet.objects.create(
-            week=week,
-            content=validated_data['content']
-        )
-        Week.objects.filter(id=week_id).update(diet_status=Week.STATUS_READY)
+            # Garantizar una sola dieta por semana
+            Diet.objects.filter(week=week).delete()
+
+            diet = Diet.objects.create(
+                week=week,
+                content=validated_data['content']
+            )
+            Week.objects.filter(id=week_id).update(diet_status=Week.STATUS_READY)
         return diet
 
 
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from catalog.models import VisualResource
+from plans.snapshots import invalidate_plan_snapshots
+
+
+@receiver(post_save, sender=VisualResource)
+def invalidate_snapshots_on_catalog_edit(sender, instance, created, **kwargs):
+    # Un ejercicio nuevo no aparece en ningun plan todavia.
+    if not created:
+        invalidate_plan_snapshots([instance.id])
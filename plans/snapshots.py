@@ -0,0 +1,126 @@
+import json
+from typing import Iterable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from rest_framework import serializers
+
+from plans.models import Workout, WorkoutDay, WorkoutExercise
+
+
+def _prefetched(queryset):
+    return queryset.select_related('week').prefetch_related('days__exercises__exercise')
+
+
+def build_plan_snapshot(workout: Workout) -> dict:
+    """Render the exact WorkoutMeSerializer payload as plain JSON data."""
+    from plans.serializers import WorkoutMeSerializer
+
+    data = WorkoutMeSerializer(workout).data
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def plan_snapshots(workout_ids: Iterable[int]) -> dict[int, dict]:
+    """
+    Same payload as build_plan_snapshot, keyed by workout id, built from
+    plain rows: one query for the workouts and one flat day/exercise/catalog
+    join grouped here, with no model instances or serializer fields.
+    Keys are inserted in serializer order so the rendered JSON is identical.
+    """
+    created_at = serializers.DateTimeField()
+    snapshots = {
+        workout_id: {
+            'week': week_id,
+            'content': content,
+            'plan': [],
+            'created_at': created_at.to_representation(created),
+        }
+        for workout_id, week_id, content, created in Workout.objects.filter(
+            id__in=list(workout_ids),
+        ).values_list('id', 'week_id', 'content', 'created_at')
+    }
+    if not snapshots:
+        return snapshots
+
+    # LEFT JOINs: a day without exercises still comes back, with NULL columns.
+    rows = WorkoutDay.objects.filter(workout_id__in=list(snapshots)).order_by(
+        'workout_id', 'order', 'id', 'exercises__order', 'exercises__id',
+    ).values_list(
+        'workout_id', 'id', 'name', 'order',
+        'exercises__id', 'exercises__sets', 'exercises__reps', 'exercises__notes', 'exercises__order',
+        'exercises__exercise_id', 'exercises__exercise__title', 'exercises__exercise__muscle_group',
+        'exercises__exercise__level', 'exercises__exercise__video_url', 'exercises__exercise__equipment',
+    )
+    day = None
+    for (workout_id, day_id, day_name, day_order,
+         item_id, sets, reps, notes, item_order,
+         exercise_id, title, muscle_group, level, video_url, equipment) in rows:
+        if day is None or day['id'] != day_id:
+            day = {'id': day_id, 'name': day_name, 'order': day_order, 'exercises': []}
+            snapshots[workout_id]['plan'].append(day)
+        if item_id is None:
+            continue
+        day['exercises'].append({
+            'id': item_id,
+            'exercise_id': exercise_id,
+            'exercise': {
+                'id': exercise_id,
+                'title': title,
+                'muscle_group': muscle_group,
+                'level': level,
+                'video_url': video_url,
+                'equipment': equipment,
+            },
+            'sets': sets,
+            'reps': reps,
+            'notes': notes,
+            'order': item_order,
+        })
+    return snapshots
+
+
+def refresh_plan_snapshot(workout_id: int, persist: bool = True) -> dict | None:
+    snapshot = plan_snapshots([workout_id]).get(workout_id)
+    if snapshot is not None and persist:
+        Workout.objects.filter(id=workout_id).update(plan_snapshot=snapshot)
+    return snapshot
+
+
+def get_plan_snapshot(
+    workout_id: int,
+    snapshot: dict | None = None,
+    persist: bool = True,
+) -> dict | None:
+    """
+    Return the stored snapshot, rebuilding it first when it is stale.
+    With persist=False the rebuilt snapshot is only returned, for read
+    paths that must not write.
+    """
+    if snapshot is not None:
+        return snapshot
+    return refresh_plan_snapshot(workout_id, persist=persist)
+
+
+def invalidate_plan_snapshots(exercise_ids: Iterable[int]) -> int:
+    """Mark every plan that uses one of these catalog exercises as stale."""
+    workout_ids = WorkoutExercise.objects.filter(
+        exercise_id__in=list(exercise_ids),
+    ).values('day__workout_id')
+    return Workout.objects.filter(id__in=workout_ids).update(
+        plan_snapshot=None,
+        plan_updated_at=timezone.now(),
+    )
+
+
+def rebuild_stale_snapshots(batch_size: int = 200) -> int:
+    rebuilt = 0
+    last_id = 0
+    stale = Workout.objects.filter(plan_snapshot__isnull=True).order_by('id')
+    while True:
+        ids = list(stale.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return rebuilt
+        for workout_id, snapshot in plan_snapshots(ids).items():
+            Workout.objects.filter(id=workout_id).update(plan_snapshot=snapshot)
+            rebuilt += 1
+        last_id = ids[-1]
@@ -1,3 +1,365 @@
-from django.test import TestCase
+import io
+import os
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from backend.parsers import FastJSONParser
+from backend.renderers import FastJSONRenderer
+from plans.ai.client import CircuitBreaker
+from plans.ai.deepseek import DeepSeekService
+from plans.ai.async_tasks import (
+    Superseded,
+    claim_next_job,
+    enqueue_batch,
+    fenced_write,
+    generate_diet_async,
+)
+from catalog.models import VisualResource
+from plans.models import Diet, GenerationJob, Week, Workout, WorkoutDay, WorkoutExercise
+from plans.nutrition import build_diet_plan, load_foods, parse_exclusions, render_diet
+from plans.serializers import DietCreateSerializer
+from plans.snapshots import _prefetched, build_plan_snapshot, plan_snapshots
+from plans.admission import admit_generation, bulk_bucket, coach_bucket
+from plans.ai import cache as response_cache
+from plans.views import _status_etag, _status_waiters
+from students.models import Student
+
+
+def make_week(coach=None, username="alumno"):
+    coach = coach or User.objects.create_user(username=f"coach_{username}", password="x", role="ADMIN")
+    user = User.objects.create_user(username=username, password="x", role="STUDENT")
+    student = Student.objects.create(
+        user=user,
+        coach=coach,
+        age=30,
+        height_cm=175,
+        weight_kg="72.50",
+        objective="Fuerza",
+        level="intermedio",
+    )
+    start = date(2026, 10, 12)
+    return Week.objects.create(student=student, start_date=start, end_date=start + timedelta(days=6))
+
+
+def make_workout(week):
+    """Two days with exercises (one sparse) and an empty rest day."""
+    press = VisualResource.objects.create(
+        title="Press inclinado con mancuerna",
+        video_url="https://example.com/press.mp4",
+        muscle_group="Pecho",
+        equipment="Mancuernas",
+        created_by=week.student.coach,
+    )
+    squat = VisualResource.objects.create(
+        title="Sentadilla búlgara",
+        video_url="https://example.com/sentadilla.mp4",
+        created_by=week.student.coach,
+    )
+    workout = Workout.objects.create(week=week, content="Lunes:\n- Press inclinado 4x8-10")
+    monday = WorkoutDay.objects.create(workout=workout, name="Lunes", order=1)
+    WorkoutExercise.objects.create(day=monday, exercise=press, sets=4, reps="8-10", notes="Pausa 2\" abajo", order=1)
+    WorkoutExercise.objects.create(day=monday, exercise=squat, order=2)
+    WorkoutDay.objects.create(workout=workout, name="Martes", order=2)
+    friday = WorkoutDay.objects.create(workout=workout, name="Viernes", order=5)
+    WorkoutExercise.objects.create(day=friday, exercise=squat, sets=3, reps="12", order=1)
+    return workout
+
+
+class EnqueueBatchTests(TestCase):
+    def test_superseding_workouts_keeps_the_diet_job(self):
+        week = make_week()
+        diet_job, _ = generate_diet_async(week.id, {})
+
+        jobs, attached = enqueue_batch(
+            None,
+            [(week.id, GenerationJob.KIND_WORKOUT, {})],
+            supersede=True,
+        )
+
+        diet_job.refresh_from_db()
+        self.assertEqual(diet_job.status, GenerationJob.STATUS_QUEUED)
+        self.assertEqual([job.kind for job in jobs], [GenerationJob.KIND_WORKOUT])
+        self.assertEqual(attached, [])
+
+
+class ManualSaveTests(TestCase):
+    def test_manual_diet_fences_out_the_running_job(self):
+        week = make_week()
+        generate_diet_async(week.id, {})
+        job = claim_next_job()
+
+        serializer = DietCreateSerializer(data={"week_id": week.id, "content": "Dieta manual"})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.STATUS_CANCELLED)
+        with self.assertRaises(Superseded):
+            with fenced_write(week.id, GenerationJob.KIND_DIET, job.generation):
+                pass
+        self.assertEqual(Diet.objects.get(week=week).content, "Dieta manual")
+
+
+@override_settings(DEEPSEEK_CACHE_ENABLED=False, DEEPSEEK_MAX_ATTEMPTS=1)
+@mock.patch.dict(os.environ, {"DEEPSEEK_API_KEY": "test"})
+class CircuitBreakerProbeTests(TestCase):
+    def test_client_error_on_the_probe_releases_it(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+        response = requests.Response()
+        response.status_code = 401
+        session = mock.Mock(post=mock.Mock(return_value=response))
+        with mock.patch("plans.ai.deepseek.get_breaker", return_value=breaker), \
+                mock.patch("plans.ai.deepseek.get_session", return_value=session):
+            with self.assertRaises(RuntimeError):
+                DeepSeekService._call_deepseek("prompt")
+
+        self.assertTrue(breaker.allow())
+
+
+class PlanStatusWaitTests(TestCase):
+    def setUp(self):
+        self.week = make_week()
+        self.client = APIClient()
+        self.client.force_authenticate(self.week.student.coach)
+
+    def test_non_numeric_week_id_is_rejected(self):
+        response = self.client.get("/api/plans/status/wait/", {"week_id": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_extra_waiters_are_not_held(self):
+        etag = _status_etag(self.week.workout_status, self.week.diet_status)
+        while _status_waiters.acquire(blocking=False):
+            self.addCleanup(_status_waiters.release)
+
+        with mock.patch("plans.views.time.sleep") as sleep:
+            response = self.client.get(
+                "/api/plans/status/wait/",
+                {"week_id": self.week.id, "timeout": 10},
+                HTTP_IF_NONE_MATCH=etag,
+            )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("Retry-After", response.headers)
+        sleep.assert_not_called()
+
+
+@override_settings(GENERATION_BULK_COACH_RATE_PER_MINUTE=1, GENERATION_BULK_COACH_BURST=10)
+class BulkAdmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.coach = User.objects.create_user(username="coach_lote", password="x", role="ADMIN")
+
+    def test_batches_pay_one_token_per_job(self):
+        self.assertTrue(admit_generation(self.coach, jobs=8, interactive=False).allowed)
+        admission = admit_generation(self.coach, jobs=4, interactive=False)
+        self.assertFalse(admission.allowed)
+        self.assertGreater(admission.retry_after, 0)
+
+    @override_settings(GENERATION_BULK_COACH_BURST=100, GENERATION_GLOBAL_BURST=10, GENERATION_GLOBAL_RATE_PER_MINUTE=1)
+    def test_batches_also_pay_the_global_bucket(self):
+        other = User.objects.create_user(username="otro_coach", password="x", role="ADMIN")
+        self.assertTrue(admit_generation(self.coach, jobs=8, interactive=False).allowed)
+
+        admission = admit_generation(other, jobs=4, interactive=False)
+        self.assertFalse(admission.allowed)
+        self.assertEqual(admission.detail, "Servicio de generacion saturado")
+        # The rejected batch's own bucket is refunded.
+        self.assertTrue(bulk_bucket(other).take(100) == 0)
+
+    @override_settings(GENERATION_BULK_COACH_BURST=100, GENERATION_GLOBAL_BURST=10, GENERATION_GLOBAL_RATE_PER_MINUTE=1)
+    def test_batch_above_the_global_burst_leaves_it_in_debt(self):
+        self.assertTrue(admit_generation(self.coach, jobs=25, interactive=False).allowed)
+        admission = admit_generation(self.coach, interactive=True)
+        self.assertFalse(admission.allowed)
+        self.assertGreaterEqual(admission.retry_after, 15 * 60)
+
+    @override_settings(GENERATION_MAX_QUEUE_DEPTH=5)
+    def test_batch_larger_than_the_free_queue_is_rejected(self):
+        generate_diet_async(make_week(self.coach).id, {})
+        self.assertFalse(admit_generation(self.coach, jobs=5, interactive=False).allowed)
+        self.assertTrue(admit_generation(self.coach, jobs=4, interactive=False).allowed)
+
+
+class AttachRefundTests(TestCase):
+    def test_joining_a_job_in_flight_costs_no_tokens(self):
+        cache.clear()
+        week = make_week()
+        client = APIClient()
+        client.force_authenticate(week.student.coach)
+
+        first = client.post("/api/plans/diets/ai/", {"week_id": week.id}, format="json")
+        tokens = coach_bucket(week.student.coach)._level(time.time())
+        # Joins before admission when the job is already visible...
+        second = client.post("/api/plans/diets/ai/", {"week_id": week.id}, format="json")
+        # ...and after it when both requests race past that check.
+        with mock.patch("plans.views.active_job", return_value=None):
+            third = client.post("/api/plans/diets/ai/", {"week_id": week.id}, format="json")
+
+        self.assertFalse(first.data["attached"])
+        self.assertTrue(second.data["attached"])
+        self.assertTrue(third.data["attached"])
+        self.assertAlmostEqual(coach_bucket(week.student.coach)._level(time.time()), tokens, places=1)
+
+
+class ResponseCacheStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_are_shared_through_the_cache(self):
+        response_cache.get("missing")
+        response_cache.put("key", "deepseek-chat", "respuesta")
+        response_cache.get("key")
+
+        stats = response_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (1, 1, 1))
+        self.assertEqual(cache.get(response_cache.STATS_KEY_PREFIX + "hits"), 1)
+
+
+class RegenerateBypassesCacheTests(TestCase):
+    def test_regenerate_queues_a_job_without_the_cache(self):
+        week = make_week()
+        client = APIClient()
+        client.force_authenticate(week.student.coach)
+
+        response = client.post("/api/plans/workouts/ai/", {"week_id": week.id, "regenerate": True}, format="json")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        job = GenerationJob.objects.get(week=week, kind=GenerationJob.KIND_WORKOUT)
+        self.assertTrue(job.context["no_cache"])
+
+
+class LocalDietTests(TestCase):
+    def test_sin_matches_whole_words(self):
+        plan = build_diet_plan({"weight": 70, "diet_notes": "sin sal, sin de azucar, sin fresa"})
+        foods = {item["food"] for day in plan["days"] for meal in day["meals"] for item in meal["items"]}
+
+        self.assertIn("Salmon", foods)
+        self.assertIn("Crema de cacahuate", foods)
+        self.assertNotIn("Fresas", foods)
+
+    def test_negations_cover_common_phrasings_and_food_groups(self):
+        for notes in ("No como carne", "sin carne", "evita la carne", "alergia a las carnes"):
+            self.assertIn("carne", parse_exclusions(notes), notes)
+        self.assertNotIn("carne", parse_exclusions("Come carne tres veces por semana"))
+
+        plan = build_diet_plan({"weight": 70, "diet_notes": "no como carne"})
+        foods = {item["food"] for day in plan["days"] for meal in day["meals"] for item in meal["items"]}
+        self.assertFalse(foods & {"Pechuga de pollo", "Pechuga de pavo", "Carne de res magra", "Lomo de cerdo"})
+
+    def test_high_targets_reach_the_tolerance(self):
+        plan = build_diet_plan({"weight": 120, "objective": "volumen"})
+        self.assertGreater(plan["targets"]["kcal"], 4000)
+        self.assertTrue(all(day["within_tolerance"] for day in plan["days"]))
+
+    def test_days_outside_the_tolerance_are_flagged(self):
+        plan = build_diet_plan({"weight": 70})
+        plan["days"][2]["within_tolerance"] = False
+
+        text = render_diet(plan)
+        self.assertIn("fuera del objetivo (Miercoles)", text)
+        self.assertEqual(text.count("(fuera del objetivo)"), 1)
+
+    def test_excluding_every_food_is_a_clear_error(self):
+        notes = "vegano " + " ".join(f"sin {food['name'].split()[0]}" for food in load_foods())
+        with self.assertRaises(ValueError):
+            build_diet_plan({"weight": 70, "diet_notes": notes})
+
+        week = make_week()
+        client = APIClient()
+        client.force_authenticate(week.student.coach)
+        response = client.post(
+            "/api/plans/diets/ai/",
+            {"week_id": week.id, "mode": "local", "notes": notes},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("excluyen", response.data["detail"])
+
+
+class PlanSnapshotTests(TestCase):
+    def test_values_snapshot_matches_the_serializer(self):
+        workout = make_workout(make_week())
+        empty = Workout.objects.create(week=make_week(username="sin_dias"), content="")
+
+        renderer = JSONRenderer()
+        snapshots = plan_snapshots([workout.id, empty.id])
+        for instance in _prefetched(Workout.objects.filter(id__in=[workout.id, empty.id])):
+            self.assertEqual(
+                renderer.render(snapshots[instance.id]),
+                renderer.render(build_plan_snapshot(instance)),
+            )
+        self.assertEqual([day["name"] for day in snapshots[workout.id]["plan"]], ["Lunes", "Martes", "Viernes"])
+
+
+class FastJSONTests(TestCase):
+    def test_renderer_output_is_byte_identical(self):
+        workout = make_workout(make_week())
+        payloads = [
+            plan_snapshots([workout.id])[workout.id],
+            {
+                "weight_kg": Decimal("72.50"),
+                "created_at": datetime(2026, 10, 18, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+                "day": date(2026, 10, 12),
+                "notes": "Pausa\u2028larga \u00f1 \U0001f4aa",
+            },
+            {"ratios": [0.1, 1e-05, 3e-05, 1e-07, 1.5e-10, 1e300]},
+            {"big": 2 ** 70},
+            {7: "clave entera"},
+        ]
+        for data in payloads:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_matches_drf(self):
+        for body in (
+            '{"week_id": 12, "notes": "sin lactosa \\u00f1", "calories": 2500.5}',
+            '{"ids": [123456789012345678901234567890]}',
+            '[1, 2.5, null, true, "\\ud83d\\udcaa"]',
+        ):
+            body = body.encode("utf-8")
+            self.assertEqual(
+                FastJSONParser().parse(io.BytesIO(body)),
+                JSONParser().parse(io.BytesIO(body)),
+            )
+
+
+class BulkRegenerateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.week = make_week()
+        Diet.objects.create(week=self.week, content="Dieta anterior")
+        self.client = APIClient()
+        self.client.force_authenticate(self.week.student.coach)
+
+    def post(self, **data):
+        return self.client.post(
+            "/api/plans/bulk/",
+            {"week_ids": [self.week.id], "kinds": ["diet"], **data},
+            format="json",
+        )
+
+    def test_existing_diets_are_kept_without_regenerate(self):
+        response = self.post()
+        self.assertEqual(response.data["skipped_diets"], [self.week.id])
+        self.assertEqual(response.data["jobs"], 0)
+
+    def test_regenerate_replaces_existing_diets(self):
+        response = self.post(regenerate=True)
+
+        self.assertEqual(response.data["skipped_diets"], [])
+        job = GenerationJob.objects.get(week=self.week, kind=GenerationJob.KIND_DIET)
+        self.assertTrue(job.context["regenerate"])
+        self.week.refresh_from_db()
+        self.assertEqual(self.week.diet_status, Week.STATUS_GENERATING)
@@ -9,6 +9,11 @@ from .views import (
     DietMeView,
     DietAICreateView,
     PlanStatusView,
+    BulkGenerationView,
+    BulkGenerationStatusView,
+    GenerationStatsView,
+    PlanStatusWaitView,
+    PlanActiveWeekView,
 )
 
 urlpatterns = [
@@ -26,7 +31,14 @@ urlpatterns = [
     path('diets/me/', DietMeView.as_view()),
     path('diets/ai/', DietAICreateView.as_view()),
 
+    # Generacion masiva
+    path('bulk/', BulkGenerationView.as_view()),
+    path('bulk/<int:pk>/', BulkGenerationStatusView.as_view()),
+    path('generation/stats/', GenerationStatsView.as_view()),
+
     # Status (PASO 4)
     path('status/', PlanStatusView.as_view()),
+    path('status/wait/', PlanStatusWaitView.as_view()),
+    path('status/active/', PlanActiveWeekView.as_view()),
 ]
 
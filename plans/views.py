@@ -1,43 +1,120 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.permissions import IsAdmin, IsAlumno
+from backend.conditional import make_etag, not_modified, set_validators
+from backend.pagination import KeysetPagination, filter_date_range
+from catalog.index import get_catalog_snapshot
 from students.models import Student
-from .models import Week, Workout, Diet
+from .models import Week, Workout, Diet, GenerationBatch, GenerationJob
 from .serializers import (
     WeekCreateSerializer,
     WeekActiveSerializer,
     WorkoutCreateSerializer,
-    WorkoutMeSerializer,
     DietCreateSerializer,
     DietMeSerializer,
     WeekStatusSerializer,
 )
+from plans.admission import admit_generation
+from plans.ai.stats import generation_stats
+from plans.nutrition import build_local_diet
+from plans.planner import build_local_plan
+from plans.snapshots import get_plan_snapshot
+from plans.workout_plan import save_workout_from_plan
 from plans.ai.async_tasks import (
+    active_job,
     generate_workout_async,
     generate_diet_async,
+    enqueue_batch,
+    supersede_generation,
 )
 
 
-def _sync_week_status(week: Week):
-    """
-    Ensure status flags reflect persisted workout/diet records.
-    Useful when legacy data left statuses in 'pending' but the related
-    objects already exist.
-    """
-    updates = {}
-    if hasattr(week, "workout") or Workout.objects.filter(week=week).exists():
-        if week.workout_status != Week.STATUS_READY:
-            updates["workout_status"] = Week.STATUS_READY
-    if hasattr(week, "diet") or Diet.objects.filter(week=week).exists():
-        if week.diet_status != Week.STATUS_READY:
-            updates["diet_status"] = Week.STATUS_READY
-    if updates:
-        Week.objects.filter(id=week.id).update(**updates)
-        for key, value in updates.items():
-            setattr(week, key, value)
+def _throttled_response(admission):
+    response = Response(
+        {
+            "detail": admission.detail,
+            "retry_after": admission.retry_after,
+            "queue_depth": admission.queue_depth,
+        },
+        status=429,
+    )
+    response["Retry-After"] = str(admission.retry_after)
+    return response
+
+
+def _attached_response(job, message, mode):
+    """A request for a week already generating joins the job in flight."""
+    return Response({
+        "message": message,
+        "status": Week.STATUS_GENERATING,
+        "mode": mode,
+        "job_id": job.id,
+        "attached": True,
+    })
+
+
+def _with_plan_status(weeks):
+    """Annotate plan existence with EXISTS subqueries so listing stays one query."""
+    return weeks.select_related('student__user').annotate(
+        has_workout=Exists(Workout.objects.filter(week=OuterRef('pk'))),
+        has_diet=Exists(Diet.objects.filter(week=OuterRef('pk'))),
+    )
+
+
+def _missing_plan_response(user, detail):
+    """Explain a missing plan only after the fast single-row read came back empty."""
+    if not Student.objects.filter(user=user).exists():
+        return Response({"detail": "Alumno no encontrado"}, status=404)
+    if not Week.objects.filter(student__user=user, is_active=True).exists():
+        return Response({"detail": "No hay semana activa"}, status=404)
+    return Response({"detail": detail}, status=404)
+
+
+def _coach_weeks(user):
+    if user.role == "ROOT":
+        return Week.objects.all()
+    return Week.objects.filter(student__coach=user)
+
+
+def _workout_context(week: Week, data) -> dict:
+    return {
+        "age": week.student.age,
+        "weight": float(week.student.weight_kg),
+        "height": week.student.height_cm,
+        "level": week.student.level,
+        "objective": week.student.objective,
+        "focus_muscle": data.get("focus_muscle"),
+        "days_per_week": data.get("days_per_week"),
+        "ai_notes": data.get("ai_notes"),
+        "equipment": data.get("equipment"),
+        # Regenerating asks for a new answer, not the cached one.
+        "no_cache": bool(data.get("no_cache") or data.get("regenerate")),
+    }
+
+
+def _diet_context(week: Week, data) -> dict:
+    return {
+        "age": week.student.age,
+        "weight": float(week.student.weight_kg),
+        "height": week.student.height_cm,
+        "objective": week.student.objective,
+        "diet_notes": data.get("notes"),
+        "diet_calories": data.get("calories"),
+        # Regenerating asks for a new answer, not the cached one.
+        "no_cache": bool(data.get("no_cache") or data.get("regenerate")),
+        # Without it the worker keeps an existing diet (see _run_diet).
+        "regenerate": bool(data.get("regenerate")),
+    }
 
 
 # ------------------------------------------------------------------
@@ -53,16 +130,20 @@ class WeekActiveView(APIView):
     permission_classes = [IsAuthenticated, IsAlumno]
 
     def get(self, request):
-        try:
-            student = Student.objects.get(user=request.user)
-            week = Week.objects.get(student=student, is_active=True)
-        except Student.DoesNotExist:
-            return Response({"detail": "Alumno no encontrado"}, status=404)
-        except Week.DoesNotExist:
-            return Response({"detail": "No hay semana activa"}, status=404)
+        week = Week.objects.select_related('student__user').filter(
+            student__user=request.user,
+            is_active=True,
+        ).order_by('-created_at').first()
+        if week is None:
+            return _missing_plan_response(request.user, "No hay semana activa")
+
+        etag = make_etag("week", week.id, week.updated_at.isoformat(), week.student.user.username)
+        cached = not_modified(request, etag, week.updated_at)
+        if cached:
+            return cached
 
         serializer = WeekActiveSerializer(week)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, week.updated_at)
 
 
 # ------------------------------------------------------------------
@@ -78,68 +159,114 @@ class WorkoutMeView(APIView):
     permission_classes = [IsAuthenticated, IsAlumno]
 
     def get(self, request):
-        try:
-            student = Student.objects.get(user=request.user)
-            week = Week.objects.get(student=student, is_active=True)
-            workout = Workout.objects.select_related('week').prefetch_related(
-                'days__exercises__exercise'
-            ).get(week=week)
-        except Student.DoesNotExist:
-            return Response({"detail": "Alumno no encontrado"}, status=404)
-        except Week.DoesNotExist:
-            return Response({"detail": "No hay semana activa"}, status=404)
-        except Workout.DoesNotExist:
-            return Response({"detail": "No hay rutina asignada"}, status=404)
-
-        serializer = WorkoutMeSerializer(workout)
-        return Response(serializer.data)
+        row = Workout.objects.filter(
+            week__student__user=request.user,
+            week__is_active=True,
+        ).order_by('-week__created_at').values_list(
+            'id',
+            'created_at',
+            'plan_updated_at',
+            'plan_snapshot',
+        ).first()
+        if row is None:
+            return _missing_plan_response(request.user, "No hay rutina asignada")
+
+        workout_id, created_at, plan_updated_at, snapshot = row
+        last_modified = max(filter(None, (created_at, plan_updated_at)))
+        etag = make_etag("workout", workout_id, created_at.isoformat(), plan_updated_at and plan_updated_at.isoformat())
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
+
+        response = Response(get_plan_snapshot(workout_id, snapshot))
+        return set_validators(response, etag, last_modified)
 
 
 class WorkoutAICreateView(APIView):
+    """
+    Generate a week's workout. `mode` selects the engine:
+    - "ai" (default): queued DeepSeek generation.
+    - "local": catalog-only planner, saved within the request.
+    - "draft": local plan saved now, replaced by the AI one when it finishes.
+    Requests made while the week is already generating join that job;
+    `regenerate: true` cancels it instead and starts over, bypassing the
+    response cache. The current plan stays visible until its replacement
+    is saved.
+    """
     permission_classes = [IsAuthenticated, IsAdmin]
 
+    MODES = ("ai", "local", "draft")
+
     def post(self, request):
         week_id = request.data.get("week_id")
         if not week_id:
             return Response({"detail": "week_id es requerido"}, status=400)
 
-        if request.user.role == "ROOT":
-            week = Week.objects.filter(id=week_id).first()
-        else:
-            week = Week.objects.filter(
-                id=week_id,
-                student__coach=request.user
-            ).first()
+        mode = request.data.get("mode") or "ai"
+        if mode not in self.MODES:
+            return Response({"detail": "mode debe ser ai, local o draft"}, status=400)
 
+        week = _coach_weeks(request.user).filter(id=week_id).first()
         if not week:
             return Response({"detail": "Semana no encontrada"}, status=404)
 
-        # Siempre permitimos regenerar: si ya hay rutina, se elimina para crear una nueva.
-        if Workout.objects.filter(week=week).exists():
-            Workout.objects.filter(week=week).delete()
-            Week.objects.filter(id=week.id).update(
-                workout_status=Week.STATUS_PENDING
-            )
-
-        context = {
-            "age": week.student.age,
-            "weight": float(week.student.weight_kg),
-            "height": week.student.height_cm,
-            "level": week.student.level,
-            "objective": week.student.objective,
-            "focus_muscle": request.data.get("focus_muscle"),
-            "days_per_week": request.data.get("days_per_week"),
-            "ai_notes": request.data.get("ai_notes"),
-        }
-
-        Week.objects.filter(id=week.id).update(
-            workout_status=Week.STATUS_GENERATING
-        )
-        generate_workout_async(week.id, context)
+        regenerate = bool(request.data.get("regenerate"))
+        if mode != "local" and not regenerate:
+            job = active_job(week.id, GenerationJob.KIND_WORKOUT)
+            if job:
+                return _attached_response(job, "Rutina en proceso", mode)
+
+        admission = None
+        if mode != "local":
+            admission = admit_generation(request.user)
+            if not admission.allowed:
+                return _throttled_response(admission)
+
+        context = _workout_context(week, request.data)
+
+        resolved_plan = None
+        if mode in ("local", "draft"):
+            resolved_plan = build_local_plan(get_catalog_snapshot(), context)
+            if not resolved_plan:
+                if admission:
+                    admission.refund(1)
+                return Response({"detail": "No hay ejercicios en el catalogo"}, status=400)
+
+        if mode == "local":
+            with transaction.atomic():
+                supersede_generation(week.id, GenerationJob.KIND_WORKOUT)
+                save_workout_from_plan(week, resolved_plan)
+                Week.objects.filter(id=week.id).update(
+                    workout_status=Week.STATUS_READY
+                )
+            return Response({
+                "message": "Rutina generada",
+                "status": Week.STATUS_READY,
+                "mode": mode,
+            }, status=201)
+
+        context["draft"] = mode == "draft"
+        # The draft is written with the job so the worker never sees one without the other.
+        with transaction.atomic():
+            job, created = generate_workout_async(week.id, context, supersede=regenerate)
+            if created:
+                if resolved_plan:
+                    save_workout_from_plan(week, resolved_plan)
+                Week.objects.filter(id=week.id).update(
+                    workout_status=Week.STATUS_GENERATING
+                )
+        if not created:
+            # Joined a job admitted earlier: nothing new was queued.
+            admission.refund(1)
+            return _attached_response(job, "Rutina en proceso", mode)
 
         return Response({
             "message": "Rutina en proceso",
             "status": Week.STATUS_GENERATING,
+            "mode": mode,
+            "job_id": job.id,
+            "attached": False,
+            "queue_depth": admission.queue_depth + 1,
         })
 
 
@@ -156,69 +283,298 @@ class DietMeView(APIView):
     permission_classes = [IsAuthenticated, IsAlumno]
 
     def get(self, request):
-        try:
-            student = Student.objects.get(user=request.user)
-            week = Week.objects.get(student=student, is_active=True)
-            diet = Diet.objects.get(week=week)
-        except Student.DoesNotExist:
-            return Response({"detail": "Alumno no encontrado"}, status=404)
-        except Week.DoesNotExist:
-            return Response({"detail": "No hay semana activa"}, status=404)
-        except Diet.DoesNotExist:
-            return Response({"detail": "No hay dieta asignada"}, status=404)
+        diet = Diet.objects.select_related('week').filter(
+            week__student__user=request.user,
+            week__is_active=True,
+        ).order_by('-week__created_at').first()
+        if diet is None:
+            return _missing_plan_response(request.user, "No hay dieta asignada")
+
+        etag = make_etag("diet", diet.id, diet.created_at.isoformat())
+        cached = not_modified(request, etag, diet.created_at)
+        if cached:
+            return cached
 
         serializer = DietMeSerializer(diet)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, diet.created_at)
 
 
 class DietAICreateView(APIView):
+    """
+    Generate a week's diet. `mode` is "ai" (default, queued DeepSeek call)
+    or "local" (food-table solver, saved within the request).
+    An existing diet is only replaced with `regenerate: true`, which also
+    cancels a generation in flight and bypasses the response cache;
+    otherwise requests join that job.
+    """
     permission_classes = [IsAuthenticated, IsAdmin]
 
+    MODES = ("ai", "local")
+
     def post(self, request):
         week_id = request.data.get("week_id")
         if not week_id:
             return Response({"detail": "week_id es requerido"}, status=400)
 
-        if request.user.role == "ROOT":
-            week = Week.objects.filter(id=week_id).first()
-        else:
-            week = Week.objects.filter(
-                id=week_id,
-                student__coach=request.user
-            ).first()
+        mode = request.data.get("mode") or "ai"
+        if mode not in self.MODES:
+            return Response({"detail": "mode debe ser ai o local"}, status=400)
 
+        week = _coach_weeks(request.user).filter(id=week_id).first()
         if not week:
             return Response({"detail": "Semana no encontrada"}, status=404)
 
-        if Diet.objects.filter(week=week).exists():
-            Week.objects.filter(id=week.id).update(
-                diet_status=Week.STATUS_READY
-            )
+        regenerate = bool(request.data.get("regenerate"))
+        if not regenerate:
+            if mode != "local":
+                job = active_job(week.id, GenerationJob.KIND_DIET)
+                if job:
+                    return _attached_response(job, "Dieta en proceso", mode)
+
+            if Diet.objects.filter(week=week).exists():
+                Week.objects.filter(id=week.id).update(
+                    diet_status=Week.STATUS_READY
+                )
+                return Response({
+                    "message": "La dieta ya existe",
+                    "status": Week.STATUS_READY,
+                })
+
+        context = _diet_context(week, request.data)
+
+        if mode == "local":
+            try:
+                content = build_local_diet(context)
+            except ValueError as exc:
+                return Response({"detail": str(exc)}, status=400)
+            with transaction.atomic():
+                supersede_generation(week.id, GenerationJob.KIND_DIET)
+                Diet.objects.filter(week=week).delete()
+                Diet.objects.create(week=week, content=content)
+                Week.objects.filter(id=week.id).update(
+                    diet_status=Week.STATUS_READY
+                )
             return Response({
-                "message": "La dieta ya existe",
+                "message": "Dieta generada",
                 "status": Week.STATUS_READY,
-            })
+                "mode": mode,
+            }, status=201)
+
+        admission = admit_generation(request.user)
+        if not admission.allowed:
+            return _throttled_response(admission)
+
+        with transaction.atomic():
+            job, created = generate_diet_async(week.id, context, supersede=regenerate)
+            if created:
+                Week.objects.filter(id=week.id).update(
+                    diet_status=Week.STATUS_GENERATING
+                )
+        if not created:
+            admission.refund(1)
+            return _attached_response(job, "Dieta en proceso", mode)
 
-        context = {
-            "age": week.student.age,
-            "weight": float(week.student.weight_kg),
-            "height": week.student.height_cm,
-            "objective": week.student.objective,
-            "diet_notes": request.data.get("notes"),
-            "diet_calories": request.data.get("calories"),
-        }
+        return Response({
+            "message": "Dieta en proceso",
+            "status": Week.STATUS_GENERATING,
+            "mode": mode,
+            "job_id": job.id,
+            "attached": False,
+            "queue_depth": admission.queue_depth + 1,
+        })
+
+
+# ------------------------------------------------------------------
+# BULK GENERATION (COACH)
+# ------------------------------------------------------------------
+
+class BulkGenerationView(APIView):
+    """
+    Queue AI generation for many weeks at once.
+    Body: {"week_ids": [...]} or {"all_active": true}, optional "kinds"
+    (["workout", "diet"] by default) plus the same options accepted by the
+    single-week AI endpoints. Weeks already generating a kind join that job
+    and weeks with a diet keep it, unless `regenerate` is set. The worker
+    pool fans the jobs out with its configured concurrency.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def post(self, request):
+        kinds = request.data.get("kinds") or [GenerationJob.KIND_WORKOUT, GenerationJob.KIND_DIET]
+        if isinstance(kinds, str):
+            kinds = [kinds]
+        valid_kinds = {GenerationJob.KIND_WORKOUT, GenerationJob.KIND_DIET}
+        if not kinds or set(kinds) - valid_kinds:
+            return Response({"detail": "kinds debe contener 'workout' y/o 'diet'"}, status=400)
+
+        weeks = _coach_weeks(request.user).select_related('student')
+        week_ids = request.data.get("week_ids")
+        requested_ids = set()
+        if week_ids:
+            try:
+                requested_ids = {int(value) for value in week_ids}
+            except (TypeError, ValueError):
+                return Response({"detail": "week_ids debe ser una lista de enteros"}, status=400)
+            weeks = weeks.filter(id__in=requested_ids)
+        elif request.data.get("all_active"):
+            weeks = weeks.filter(is_active=True)
+        else:
+            return Response({"detail": "Envia week_ids o all_active"}, status=400)
+
+        max_weeks = settings.GENERATION_BULK_MAX_WEEKS
+        weeks = list(weeks.order_by('id')[:max_weeks + 1])
+        if len(weeks) > max_weeks:
+            return Response(
+                {"detail": f"Maximo {max_weeks} semanas por lote"},
+                status=400,
+            )
+        if not weeks:
+            return Response({"detail": "Semana no encontrada"}, status=404)
 
-        Week.objects.filter(id=week.id).update(
-            diet_status=Week.STATUS_GENERATING
+        ids = [week.id for week in weeks]
+        items = []
+        skipped_diets = []
+        regenerate = bool(request.data.get("regenerate"))
+        if GenerationJob.KIND_DIET in kinds and not regenerate:
+            skipped_diets = list(
+                Diet.objects.filter(week_id__in=ids).values_list('week_id', flat=True)
+            )
+        job_count = (
+            (len(weeks) if GenerationJob.KIND_WORKOUT in kinds else 0)
+            + (len(weeks) - len(skipped_diets) if GenerationJob.KIND_DIET in kinds else 0)
         )
-        generate_diet_async(week.id, context)
+
+        admission = admit_generation(request.user, jobs=job_count, interactive=False)
+        if not admission.allowed:
+            return _throttled_response(admission)
+
+        try:
+            with transaction.atomic():
+                if GenerationJob.KIND_WORKOUT in kinds:
+                    # La rutina actual se conserva hasta que el trabajo guarde la nueva.
+                    Week.objects.filter(id__in=ids).update(
+                        workout_status=Week.STATUS_GENERATING
+                    )
+                    items.extend(
+                        (week.id, GenerationJob.KIND_WORKOUT, _workout_context(week, request.data))
+                        for week in weeks
+                    )
+
+                if GenerationJob.KIND_DIET in kinds:
+                    Week.objects.filter(id__in=skipped_diets).update(
+                        diet_status=Week.STATUS_READY
+                    )
+                    pending_diets = [week for week in weeks if week.id not in set(skipped_diets)]
+                    Week.objects.filter(id__in=[week.id for week in pending_diets]).update(
+                        diet_status=Week.STATUS_GENERATING
+                    )
+                    items.extend(
+                        (week.id, GenerationJob.KIND_DIET, _diet_context(week, request.data))
+                        for week in pending_diets
+                    )
+
+                batch = GenerationBatch.objects.create(created_by=request.user)
+                jobs, attached = enqueue_batch(
+                    batch,
+                    items,
+                    supersede=regenerate,
+                )
+        except IntegrityError:
+            # Otro lote o peticion encolo alguna de estas semanas al mismo tiempo.
+            admission.refund(job_count)
+            return Response(
+                {"detail": "Algunas semanas empezaron a generarse en otra peticion, reintenta"},
+                status=409,
+            )
+        # Weeks that joined a job in flight queued nothing new.
+        admission.refund(len(attached))
 
         return Response({
-            "message": "Dieta en proceso",
-            "status": Week.STATUS_GENERATING,
+            "message": "Generacion masiva en proceso",
+            "batch_id": batch.id,
+            "weeks": len(weeks),
+            "jobs": len(jobs),
+            "attached_job_ids": sorted(job.id for job in attached),
+            "skipped_diets": sorted(skipped_diets),
+            "not_found": sorted(requested_ids - set(ids)),
+            "queue_depth": admission.queue_depth + len(jobs),
         })
 
 
+class BulkGenerationStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, pk):
+        batches = GenerationBatch.objects.filter(id=pk)
+        if request.user.role != "ROOT":
+            batches = batches.filter(created_by=request.user)
+        batch = batches.first()
+        if not batch:
+            return Response({"detail": "Lote no encontrado"}, status=404)
+
+        rows = batch.jobs.order_by('week_id', 'kind').values(
+            'week_id',
+            'kind',
+            'status',
+            'week__student__user__username',
+        )
+
+        summary = {choice: 0 for choice, _ in GenerationJob.STATUS_CHOICES}
+        per_week = {}
+        for row in rows:
+            summary[row['status']] += 1
+            entry = per_week.setdefault(row['week_id'], {
+                "week_id": row['week_id'],
+                "student": row['week__student__user__username'],
+            })
+            entry[row['kind']] = row['status']
+
+        total = sum(summary.values())
+        finished = (
+            summary[GenerationJob.STATUS_DONE]
+            + summary[GenerationJob.STATUS_ERROR]
+            + summary[GenerationJob.STATUS_CANCELLED]
+        )
+        return Response({
+            "batch_id": batch.id,
+            "created_at": batch.created_at,
+            "total": total,
+            "finished": finished,
+            "progress": round(finished / total, 4) if total else 1.0,
+            "summary": summary,
+            "weeks": list(per_week.values()),
+        })
+
+
+class GenerationStatsView(APIView):
+    """
+    Stage latency percentiles, fallback rate and token usage of finished
+    generation jobs. Query params: `days` (default 7, max 90) and `kind`.
+    Coaches see their own students' jobs; ROOT sees all of them.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    MAX_DAYS = 90
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get("days", 7))
+        except ValueError:
+            return Response({"detail": "days invalido"}, status=400)
+        days = max(1, min(days, self.MAX_DAYS))
+
+        jobs = GenerationJob.objects.all()
+        if request.user.role != "ROOT":
+            jobs = jobs.filter(week__student__coach=request.user)
+        kind = request.query_params.get("kind")
+        if kind:
+            if kind not in (GenerationJob.KIND_WORKOUT, GenerationJob.KIND_DIET):
+                return Response({"detail": "kind debe ser 'workout' o 'diet'"}, status=400)
+            jobs = jobs.filter(kind=kind)
+
+        return Response(generation_stats(jobs, days))
+
+
 # ------------------------------------------------------------------
 # STATUS (COACH)
 # ------------------------------------------------------------------
@@ -229,26 +585,20 @@ class PlanStatusView(APIView):
     def get(self, request):
         week_id = request.query_params.get("week_id")
 
-        if request.user.role == "ROOT":
-            weeks = Week.objects.all()
-        else:
-            weeks = Week.objects.filter(student__coach=request.user)
+        weeks = _coach_weeks(request.user)
 
         if week_id:
-            week = weeks.filter(id=week_id).prefetch_related(
-                'workout__days__exercises__exercise',
-                'diet',
-            ).first()
+            week = _with_plan_status(weeks).filter(id=week_id).select_related('diet').first()
             if not week:
                 return Response({"detail": "Semana no encontrada"}, status=404)
-            _sync_week_status(week)
             serializer = WeekStatusSerializer(week)
             data = serializer.data
-            try:
-                workout_data = WorkoutMeSerializer(week.workout).data
+            row = Workout.objects.filter(week=week).values_list('id', 'plan_snapshot').first()
+            workout_data = get_plan_snapshot(*row, persist=False) if row else None
+            if workout_data:
                 data["workout_content"] = workout_data.get("content")
                 data["workout_plan"] = workout_data.get("plan")
-            except Workout.DoesNotExist:
+            else:
                 data["workout_content"] = None
                 data["workout_plan"] = []
             try:
@@ -257,9 +607,143 @@ class PlanStatusView(APIView):
                 data["diet_content"] = None
             return Response(data)
 
-        weeks = weeks.order_by("-created_at")
-        for wk in weeks:
-            _sync_week_status(wk)
+        weeks = filter_date_range(weeks, request, "start_date", "start_date")
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(_with_plan_status(weeks), request, view=self)
+        serializer = WeekStatusSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class PlanActiveWeekView(APIView):
+    """
+    Active week of one student, by `student_id` or `username`.
+    Served by the (student, is_active) index instead of listing every week.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        student_id = request.query_params.get("student_id")
+        username = request.query_params.get("username")
+
+        weeks = _with_plan_status(_coach_weeks(request.user)).filter(is_active=True)
+        if student_id:
+            try:
+                weeks = weeks.filter(student_id=int(student_id))
+            except ValueError:
+                return Response({"detail": "student_id invalido"}, status=400)
+        elif username:
+            weeks = weeks.filter(student__user__username=username)
+        else:
+            return Response({"detail": "student_id o username es requerido"}, status=400)
+
+        week = weeks.first()
+        if not week:
+            return Response({"detail": "No hay semana activa"}, status=404)
+
+        return Response(WeekStatusSerializer(week).data)
+
+
+# Long-polls held at once in this process (see PlanStatusWaitView).
+_status_waiters = threading.BoundedSemaphore(settings.PLAN_STATUS_MAX_WAITERS)
+
+
+def _week_id_param(request):
+    """(week_id, None) from the query string, or (None, 400 response)."""
+    week_id = request.query_params.get("week_id")
+    if not week_id:
+        return None, Response({"detail": "week_id es requerido"}, status=400)
+    try:
+        return int(week_id), None
+    except ValueError:
+        return None, Response({"detail": "week_id debe ser un numero entero"}, status=400)
+
+
+def _status_etag(workout_status: str, diet_status: str) -> str:
+    return quote_etag(f"w:{workout_status};d:{diet_status}")
+
+
+def _statuses_from_etag(etag: str | None) -> dict:
+    """Recover the statuses the client last saw from the ETag it sends back."""
+    statuses = {}
+    for part in (etag or "").strip('W/"').split(";"):
+        key, _, value = part.partition(":")
+        if key in ("w", "d") and value:
+            statuses[key] = value
+    return statuses
+
+
+class PlanStatusWaitView(APIView):
+    """
+    Long-poll variant of the status endpoint.
+    The client sends the ETag it received last (If-None-Match, or `since`
+    for clients that cannot set headers). The request is held until
+    workout_status/diet_status differ from it, then a small delta is
+    returned; the workout plan and diet text are only included in the
+    response where they turn ready. On timeout a 304 is returned.
+
+    A held request occupies a gunicorn thread, so only
+    PLAN_STATUS_MAX_WAITERS requests per process are held; the rest are
+    answered at once and told to poll again after PLAN_STATUS_RETRY_AFTER.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        week_id, error = _week_id_param(request)
+        if error:
+            return error
+
+        client_etags = parse_etags(
+            request.headers.get("If-None-Match") or request.query_params.get("since") or ""
+        )
+        try:
+            timeout = float(request.query_params.get("timeout", settings.PLAN_STATUS_WAIT_SECONDS))
+        except ValueError:
+            timeout = settings.PLAN_STATUS_WAIT_SECONDS
+
+        holding = _status_waiters.acquire(blocking=False)
+        try:
+            hold = max(0.0, min(timeout, settings.PLAN_STATUS_WAIT_SECONDS)) if holding else 0.0
+            deadline = time.monotonic() + hold
+
+            weeks = _coach_weeks(request.user).filter(id=week_id)
+            while True:
+                row = weeks.values('workout_status', 'diet_status').first()
+                if not row:
+                    return Response({"detail": "Semana no encontrada"}, status=404)
+
+                etag = _status_etag(row['workout_status'], row['diet_status'])
+                if etag not in client_etags:
+                    break
+                if time.monotonic() >= deadline:
+                    response = Response(status=304)
+                    response["ETag"] = etag
+                    if not holding:
+                        response["Retry-After"] = str(settings.PLAN_STATUS_RETRY_AFTER)
+                    return response
+                time.sleep(settings.PLAN_STATUS_WAIT_INTERVAL)
+        finally:
+            if holding:
+                _status_waiters.release()
+
+        previous = _statuses_from_etag(client_etags[0] if client_etags else None)
+        data = {
+            "id": week_id,
+            "workout_status": row['workout_status'],
+            "diet_status": row['diet_status'],
+        }
+
+        if row['workout_status'] == Week.STATUS_READY and previous.get("w") != Week.STATUS_READY:
+            workout_row = Workout.objects.filter(week_id=week_id).values_list('id', 'plan_snapshot').first()
+            workout_data = get_plan_snapshot(*workout_row, persist=False) if workout_row else None
+            if workout_data:
+                data["workout_content"] = workout_data.get("content")
+                data["workout_plan"] = workout_data.get("plan")
+
+        if row['diet_status'] == Week.STATUS_READY and previous.get("d") != Week.STATUS_READY:
+            data["diet_content"] = Diet.objects.filter(week_id=week_id).values_list(
+                'content', flat=True
+            ).first()
 
-        serializer = WeekStatusSerializer(weeks, many=True)
-        return Response(serializer.data)
+        response = Response(data)
+        response["ETag"] = etag
+        return response
@@ -1,22 +1,13 @@
 import json
 import re
-import unicodedata
 from typing import Any, Dict, Iterable, List, Sequence, Tuple
 
 from django.db import transaction
 
+from catalog.index import CatalogIndex
 from catalog.models import VisualResource
 from plans.models import Workout, WorkoutDay, WorkoutExercise, Week
-
-
-def _normalize_name(name: str) -> str:
-    """Normalize exercise names to compare ignoring accents, spaces, and casing."""
-    if not name:
-        return ""
-    normalized = unicodedata.normalize("NFKD", str(name))
-    ascii_only = normalized.encode("ascii", "ignore").decode("ascii")
-    collapsed = re.sub(r"[^a-z0-9]+", "", ascii_only.lower())
-    return collapsed
+from plans.snapshots import refresh_plan_snapshot
 
 
 def _safe_int(value: Any) -> int | None:
@@ -169,9 +160,11 @@ def resolve_named_plan(
 ) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
     Resolve a plan that references exercises by name.
+    `exercises` may be a prebuilt CatalogIndex (e.g. the shared catalog
+    snapshot); misspelled names are recovered by its fuzzy lookup.
     Returns a tuple of (resolved_plan, missing_names).
     """
-    catalog = { _normalize_name(ex.title): ex for ex in exercises }
+    catalog = exercises if isinstance(exercises, CatalogIndex) else CatalogIndex(exercises)
     resolved: List[Dict[str, Any]] = []
     missing: List[str] = []
 
@@ -181,7 +174,7 @@ def resolve_named_plan(
 
         for order, item in enumerate(day.get("exercises") or []):
             exercise_name = str(item.get("name") or "").strip()
-            exercise_obj = catalog.get(_normalize_name(exercise_name))
+            exercise_obj = catalog.lookup(exercise_name)
             if not exercise_obj:
                 missing.append(exercise_name)
                 if ignore_missing:
@@ -277,69 +270,6 @@ def resolve_manual_plan(
     return resolved, list(dict.fromkeys(missing_ids))
 
 
-def build_fallback_plan(
-    exercises: Sequence[VisualResource],
-    level: str | None = None,
-    *,
-    days_count: int | None = None,
-    focus_muscle: str | None = None,
-) -> List[Dict[str, Any]]:
-    """
-    Deterministic fallback using catalog exercises, rotating them across the week.
-    """
-    if not exercises:
-        return []
-
-    target_sets = 3
-    normalized_level = (level or "").lower()
-    if "inter" in normalized_level or "advance" in normalized_level:
-        target_sets = 4
-
-    day_names = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado"]
-    if days_count:
-        try:
-            days_count = max(3, min(int(days_count), len(day_names)))
-        except (TypeError, ValueError):
-            days_count = None
-    if days_count:
-        day_names = day_names[:days_count]
-
-    focus = (focus_muscle or "").strip().lower()
-    if focus:
-        focused = [ex for ex in exercises if (ex.muscle_group or "").strip().lower() == focus]
-        remainder = [ex for ex in exercises if (ex.muscle_group or "").strip().lower() != focus]
-        ordered_exercises = focused + remainder if focused else list(exercises)
-    else:
-        ordered_exercises = list(exercises)
-    resolved: List[Dict[str, Any]] = []
-    cursor = 0
-
-    for day_idx, day_name in enumerate(day_names):
-        exercises_for_day = []
-        for order in range(min(4, len(ordered_exercises))):
-            exercise = ordered_exercises[cursor % len(ordered_exercises)]
-            exercises_for_day.append(
-                {
-                    "exercise": exercise,
-                    "sets": target_sets,
-                    "reps": "10-12",
-                    "notes": exercise.muscle_group or "",
-                    "order": order,
-                }
-            )
-            cursor += 1
-
-        resolved.append(
-            {
-                "day": day_name,
-                "order": day_idx,
-                "exercises": exercises_for_day,
-            }
-        )
-
-    return resolved
-
-
 def _format_prescription(sets: int | None, reps: str) -> str:
     reps_clean = str(reps or "").strip()
     if sets and reps_clean:
@@ -385,6 +315,7 @@ def save_workout_from_plan(
 ) -> Workout:
     """
     Persist the structured workout plan and return the Workout instance created.
+    The read snapshot served to students is written in the same transaction.
     """
     if not resolved_plan:
         raise ValueError("No hay ejercicios validos para guardar.")
@@ -415,4 +346,6 @@ def save_workout_from_plan(
                     order=item.get("order") or 0,
                 )
 
+        refresh_plan_snapshot(workout.id)
+
     return workout
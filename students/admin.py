@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student
+from .models import CoachCounters, Student
 
 
 @admin.register(Student)
@@ -14,3 +14,16 @@ class StudentAdmin(admin.ModelAdmin):
     )
     list_filter = ('objective', 'level', 'coach')
     search_fields = ('user__username', 'coach__username')
+
+
+@admin.register(CoachCounters)
+class CoachCountersAdmin(admin.ModelAdmin):
+    list_display = (
+        'coach',
+        'students_total',
+        'active_weeks',
+        'pending_workouts',
+        'pending_diets',
+        'updated_at'
+    )
+    search_fields = ('coach__username',)
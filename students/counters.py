@@ -0,0 +1,63 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from accounts.models import User
+from .models import CoachCounters, Student
+
+COUNTER_FIELDS = ('students_total', 'active_weeks', 'pending_workouts', 'pending_diets')
+
+
+def compute_coach_counters(coach_id) -> dict:
+    """All four dashboard totals in one conditional aggregate query."""
+    active = Q(weeks__is_active=True)
+    return Student.objects.filter(coach_id=coach_id).aggregate(
+        students_total=Count('id', distinct=True),
+        active_weeks=Count('weeks', filter=active, distinct=True),
+        pending_workouts=Count(
+            'weeks', filter=active & Q(weeks__workout__isnull=True), distinct=True
+        ),
+        pending_diets=Count(
+            'weeks', filter=active & Q(weeks__diet__isnull=True), distinct=True
+        ),
+    )
+
+
+def recount_coach(coach_id) -> dict:
+    counts = compute_coach_counters(coach_id)
+    CoachCounters.objects.update_or_create(coach_id=coach_id, defaults=counts)
+    return counts
+
+
+# Coaches with a recount pending in this thread's transaction.
+_pending = threading.local()
+
+
+def _pending_coaches() -> set:
+    if not hasattr(_pending, 'coaches'):
+        _pending.coaches = set()
+    return _pending.coaches
+
+
+def schedule_recount(coach_id) -> None:
+    """
+    Recount a coach once the current transaction commits.
+    Several writes for the same coach in one transaction (a cascade delete,
+    a plan regeneration) share a single recount: every write registers a
+    callback, and the first one to run after the commit does the work.
+    """
+    if coach_id is None:
+        return
+    _pending_coaches().add(coach_id)
+
+    def callback():
+        pending = _pending_coaches()
+        if coach_id not in pending:
+            return
+        pending.discard(coach_id)
+        # Deleting the coach cascades to its students and schedules a recount too.
+        if User.objects.filter(id=coach_id).exists():
+            recount_coach(coach_id)
+
+    transaction.on_commit(callback)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from students.counters import COUNTER_FIELDS, compute_coach_counters
+from students.models import CoachCounters
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores del dashboard de cada coach y corrige los que no coinciden."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--coach",
+            type=int,
+            help="Solo el coach con este id.",
+        )
+
+    def handle(self, *args, **options):
+        coaches = User.objects.filter(role__in=("ADMIN", "ROOT"))
+        if options["coach"]:
+            coaches = coaches.filter(id=options["coach"])
+
+        stored = {
+            row["coach_id"]: row
+            for row in CoachCounters.objects.filter(coach__in=coaches).values("coach_id", *COUNTER_FIELDS)
+        }
+
+        fixed = 0
+        for coach_id in coaches.values_list("id", flat=True):
+            counts = compute_coach_counters(coach_id)
+            current = stored.get(coach_id)
+            if current and all(current[field] == counts[field] for field in COUNTER_FIELDS):
+                continue
+            CoachCounters.objects.update_or_create(coach_id=coach_id, defaults=counts)
+            fixed += 1
+            self.stdout.write(f"Coach {coach_id}: {counts}")
+
+        self.stdout.write(f"Contadores corregidos: {fixed}")
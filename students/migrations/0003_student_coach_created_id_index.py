@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_student_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['coach', '-created_at', '-id'], name='students_coach_created_id_idx'),
+        ),
+    ]
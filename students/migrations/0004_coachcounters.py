@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 21:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_role'),
+        ('students', '0003_student_coach_created_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoachCounters',
+            fields=[
+                ('coach', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('students_total', models.PositiveIntegerField(default=0)),
+                ('active_weeks', models.PositiveIntegerField(default=0)),
+                ('pending_workouts', models.PositiveIntegerField(default=0)),
+                ('pending_diets', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
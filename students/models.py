@@ -23,6 +23,38 @@ class Student(models.Model):
     level = models.CharField(max_length=50)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['coach', '-created_at', '-id'],
+                name='students_coach_created_id_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - Coach: {self.coach.username}"
+
+
+class CoachCounters(models.Model):
+    """
+    Dashboard totals of one coach, kept current by students.signals and
+    repaired by `manage.py reconcile_coach_counters`.
+    """
+    coach = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters'
+    )
+
+    students_total = models.PositiveIntegerField(default=0)
+    active_weeks = models.PositiveIntegerField(default=0)
+    pending_workouts = models.PositiveIntegerField(default=0)
+    pending_diets = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Counters - Coach: {self.coach_id}"
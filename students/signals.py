@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from plans.models import Diet, Week, Workout
+from .counters import schedule_recount
+from .models import Student
+
+
+def _coach_of_student(student_id):
+    return Student.objects.filter(id=student_id).values_list('coach_id', flat=True).first()
+
+
+def _coach_of_week(week_id):
+    return Week.objects.filter(id=week_id).values_list('student__coach_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Student)
+def remember_previous_coach(sender, instance, **kwargs):
+    # Reassigning a student changes both coaches' totals.
+    instance._previous_coach_id = None
+    if instance.pk is not None:
+        instance._previous_coach_id = _coach_of_student(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def recount_on_student_change(sender, instance, **kwargs):
+    schedule_recount(instance.coach_id)
+    previous = getattr(instance, '_previous_coach_id', None)
+    if previous != instance.coach_id:
+        schedule_recount(previous)
+
+
+@receiver(post_save, sender=Week)
+@receiver(post_delete, sender=Week)
+def recount_on_week_change(sender, instance, **kwargs):
+    # Las semanas desactivadas al crear una nueva entran en el mismo recuento.
+    schedule_recount(_coach_of_student(instance.student_id))
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+@receiver(post_save, sender=Diet)
+@receiver(post_delete, sender=Diet)
+def recount_on_plan_change(sender, instance, created=True, **kwargs):
+    if created:
+        schedule_recount(_coach_of_week(instance.week_id))
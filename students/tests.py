@@ -1,3 +1,43 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from .models import CoachCounters, Student
+
+
+class CoachCountersTests(TestCase):
+    def setUp(self):
+        self.first = User.objects.create_user(username="coach_a", password="x", role="ADMIN")
+        self.second = User.objects.create_user(username="coach_b", password="x", role="ADMIN")
+        user = User.objects.create_user(username="alumno", password="x", role="STUDENT")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student = Student.objects.create(
+                user=user,
+                coach=self.first,
+                age=30,
+                height_cm=175,
+                weight_kg="72.50",
+                objective="Fuerza",
+                level="intermedio",
+            )
+
+    def total(self, coach):
+        return CoachCounters.objects.get(coach=coach).students_total
+
+    def test_reassigning_a_student_recounts_both_coaches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.coach = self.second
+            self.student.save()
+
+        self.assertEqual(self.total(self.first), 0)
+        self.assertEqual(self.total(self.second), 1)
+
+    def test_writes_in_one_transaction_share_a_recount(self):
+        with mock.patch("students.counters.recount_coach") as recount:
+            with self.captureOnCommitCallbacks(execute=True):
+                for age in (31, 32, 33):
+                    self.student.age = age
+                    self.student.save()
+
+        recount.assert_called_once_with(self.first.id)
@@ -2,6 +2,7 @@ from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 
 from accounts.permissions import IsAdmin
+from backend.pagination import KeysetPagination, filter_date_range
 from .models import Student
 from .serializers import (
     StudentCreateSerializer,
@@ -12,9 +13,14 @@ from .serializers import (
 
 class StudentCreateListView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Student.objects.filter(coach=self.request.user)
+        queryset = Student.objects.filter(coach=self.request.user)
+        if self.request.method == 'GET':
+            queryset = queryset.select_related('user')
+            queryset = filter_date_range(queryset, self.request, 'created_at', 'created')
+        return queryset.order_by('-created_at', '-id')
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -37,6 +43,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 
 from accounts.permissions import IsAlumno
+from backend.conditional import make_etag, not_modified, set_validators
 from .models import Student
 from .serializers import StudentMeSerializer
 
@@ -45,9 +52,25 @@ class StudentMeView(APIView):
     permission_classes = [IsAuthenticated, IsAlumno]
 
     def get(self, request):
-        student = Student.objects.get(user=request.user)
+        student = Student.objects.select_related('user', 'coach').filter(
+            user=request.user
+        ).first()
+        if student is None:
+            return Response({"detail": "Alumno no encontrado"}, status=404)
+
+        etag = make_etag(
+            "student",
+            student.id,
+            student.updated_at.isoformat(),
+            student.user.username,
+            student.coach.username,
+        )
+        cached = not_modified(request, etag, student.updated_at)
+        if cached:
+            return cached
+
         serializer = StudentMeSerializer(student)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, student.updated_at)
     
 from rest_framework import generics
 from accounts.permissions import IsAdmin
@@ -73,32 +96,24 @@ class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from plans.models import Week
+from .counters import COUNTER_FIELDS, recount_coach
+from .models import CoachCounters
 
 
 class CoachSummaryView(APIView):
+    """
+    Dashboard totals read from the coach's CoachCounters row (one primary-key
+    lookup). The row is built with a single aggregate query the first time.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         if request.user.role not in ("ADMIN", "ROOT"):
             return Response({"detail": "No autorizado"}, status=403)
 
-        students_qs = Student.objects.filter(coach=request.user)
-        total_students = students_qs.count()
-
-        active_weeks_qs = Week.objects.filter(
-            student__coach=request.user,
-            is_active=True
-        )
-
-        active_weeks = active_weeks_qs.count()
-        pending_workouts = active_weeks_qs.filter(workout__isnull=True).count()
-        pending_diets = active_weeks_qs.filter(diet__isnull=True).count()
+        counters = CoachCounters.objects.filter(pk=request.user.pk).values(*COUNTER_FIELDS).first()
+        if counters is None:
+            counters = recount_coach(request.user.pk)
 
-        return Response({
-            "students_total": total_students,
-            "active_weeks": active_weeks,
-            "pending_workouts": pending_workouts,
-            "pending_diets": pending_diets,
-        })
+        return Response(counters)
 